@@ -1,4 +1,5 @@
 const http = require('http');
+const crypto = require('crypto');
 const fs = require('fs');
 const path = require('path');
 const url = require('url');
@@ -6,6 +7,10 @@ const opentype = require('opentype.js');
 
 const PORT = Number(process.env.PORT || 3001);
 const FONTS_DIR = path.join(process.cwd(), 'public/fonts');
+// Метрики, предрасчитанные при сборке (content_engine/font_metrics.py), по хэшу файла шрифта
+const PRECOMPUTED_METRICS_PATH = path.join(process.cwd(), 'public/font-metrics.json');
+const PRECOMPUTED_METRICS_FORMAT = 'khmer-font-metrics';
+const PRECOMPUTED_METRICS_VERSION = 1;
 const FONT_EXTENSIONS = new Set(['.ttf', '.otf', '.woff', '.woff2']);
 const FONT_LABEL_OVERRIDES = {
   KhmerOSBattambang: 'Khmer OS Battambang',
@@ -39,6 +44,7 @@ const fontValidationCache = new Map();
 
 // ─── Кэш метрик: fontId → { consonants, subscripts, vowels, diacritics } ──
 const metricsCache = new Map();
+let precomputedMetrics = null;
 
 // Все кодпоинты кхмерских согласных
 const KHMER_CONSONANTS = Array.from({ length: 0x17A3 - 0x1780 }, (_, i) => 0x1780 + i);
@@ -147,7 +153,8 @@ async function getShaperForFont(fontId) {
   const hbFace = hb.createFace(hbBlob, 0);
   const hbFont = hb.createFont(hbFace);
   const otFont = opentype.parse(arrayBuffer);
-  const shaper = { hbBlob, hbFace, hbFont, otFont };
+  const fontHash = crypto.createHash('sha256').update(fontData).digest('hex').slice(0, 16);
+  const shaper = { hbBlob, hbFace, hbFont, otFont, fontHash };
   shaperCache.set(fontEntry.id, shaper);
   return { ...shaper, fontEntry };
 }
@@ -369,6 +376,28 @@ async function buildFontMetrics(hbFont, otFont) {
   return { unitsPerEm, consonants, subscripts, vowels, indepVowels, diacritics };
 }
 
+/**
+ * Предрасчитанные метрики: hash → { fontId, file, metrics }.
+ * Файл читается один раз; если его нет или версия другая — пустой объект,
+ * и метрики считаются как раньше.
+ */
+function loadPrecomputedMetrics() {
+  if (precomputedMetrics) return precomputedMetrics;
+  precomputedMetrics = {};
+  if (!fs.existsSync(PRECOMPUTED_METRICS_PATH)) return precomputedMetrics;
+  try {
+    const data = JSON.parse(fs.readFileSync(PRECOMPUTED_METRICS_PATH, 'utf8'));
+    if (data.format === PRECOMPUTED_METRICS_FORMAT && data.version === PRECOMPUTED_METRICS_VERSION) {
+      precomputedMetrics = data.fonts || {};
+    } else {
+      console.warn('[metrics:warn] ignoring font-metrics.json: format', data.format, 'version', data.version);
+    }
+  } catch (error) {
+    console.warn('[metrics:warn] cannot read font-metrics.json', error.message);
+  }
+  return precomputedMetrics;
+}
+
 function parseFeaturesFromQuery(featuresStr) {
   if (!featuresStr) return null;
   const features = [];
@@ -542,13 +571,19 @@ const server = http.createServer(async (req, res) => {
 
   // ── /api/metrics?font=auto ───────────────────────────────────────────────
   // Возвращает реальные bbox всех кхмерских символов для данного шрифта.
+  // Берётся из public/font-metrics.json, если хэш шрифта совпал, иначе строится.
   // Результат кэшируется на время работы сервера (пересчитывается при смене шрифта).
   if (parsed.pathname === '/api/metrics' && req.method === 'GET') {
     try {
       const fontId = typeof parsed.query.font === 'string' ? parsed.query.font : 'auto';
-      const { hbFont, otFont, fontEntry } = await getShaperForFont(fontId);
+      const { hbFont, otFont, fontEntry, fontHash } = await getShaperForFont(fontId);
       const cacheKey = fontEntry.id;
+      const precomputed = loadPrecomputedMetrics()[fontHash];
 
+      if (!metricsCache.has(cacheKey) && precomputed) {
+        console.log('[metrics] Using precomputed metrics for font:', fontEntry.id, fontHash);
+        metricsCache.set(cacheKey, precomputed.metrics);
+      }
       if (!metricsCache.has(cacheKey)) {
         console.log('[metrics] Building metrics for font:', fontEntry.id);
         const metrics = await buildFontMetrics(hbFont, otFont);
@@ -0,0 +1,200 @@
+"""
+Единый реестр алфавита: таблица `alphabet`, alphabet_master.csv и озвучка букв.
+
+Раньше данные жили в трёх расходящихся списках (seed_alphabet.FULL_ALPHABET,
+gen_alphabet.DATA, update_diacritics_rules.DIACRITIC_RULES). Теперь всё здесь:
+  * freq — место в частотном списке (frequency_rank);
+  * spoken — как озвучивать знак, у которого нет собственного звука;
+  * mute — у знака нет аудио в приложении (audio_url = null), плеер молчит.
+
+Один id может встречаться дважды (ំ, ះ — и огласовка, и диакритика): для
+таблицы берётся последняя запись, а озвучка генерируется для обеих.
+Синхронизация с БД, CSV и аудио: sync_alphabet.py.
+"""
+
+# Колонки таблицы alphabet (и alphabet_master.csv) в порядке CSV
+COLUMNS = ["id", "name_en", "type", "series", "shape_group", "subscript_form",
+           "sound_series_1", "sound_series_2", "audio_url", "frequency_rank", "description"]
+
+# Колонки, которыми владеет реестр. shape_group/subscript_form заполняются в БД вручную,
+# реестр их пишет только если они заданы в записи
+MANAGED_COLUMNS = ["name_en", "type", "series", "sound_series_1", "sound_series_2",
+                   "audio_url", "frequency_rank", "description"]
+
+ALPHABET = [
+    # --- 1. СОГЛАСНЫЕ ---
+    {"id": "ក", "name_en": "ka", "type": "consonant", "series": 1, "freq": 5,
+     "desc": "Velar. Sound: K (hard). Series: A"},
+    {"id": "ខ", "name_en": "kha", "type": "consonant", "series": 1, "freq": 34,
+     "desc": "Velar. Sound: Kh (aspirated). Series: A"},
+    {"id": "គ", "name_en": "ko", "type": "consonant", "series": 2, "freq": 28,
+     "desc": "Velar. Sound: K (soft). Series: O"},
+    {"id": "ឃ", "name_en": "kho", "type": "consonant", "series": 2, "freq": 57,
+     "desc": "Velar. Sound: Kh (soft). Series: O"},
+    {"id": "ង", "name_en": "ngo", "type": "consonant", "series": 2, "freq": 8, "desc": "Velar. Sound: Ng. Series: O"},
+    {"id": "ច", "name_en": "cha", "type": "consonant", "series": 1, "freq": 19,
+     "desc": "Palatal. Sound: Ch. Series: A"},
+    {"id": "ឆ", "name_en": "chha", "type": "consonant", "series": 1, "freq": 47,
+     "desc": "Palatal. Sound: Chh. Series: A"},
+    {"id": "ជ", "name_en": "cho", "type": "consonant", "series": 2, "freq": 22,
+     "desc": "Palatal. Sound: Ch (soft). Series: O"},
+    {"id": "ឈ", "name_en": "chho", "type": "consonant", "series": 2, "freq": 56,
+     "desc": "Palatal. Sound: Chh (soft). Series: O"},
+    {"id": "ញ", "name_en": "nyo", "type": "consonant", "series": 2, "freq": 35,
+     "desc": "Palatal. Sound: Ny. Series: O"},
+    {"id": "ដ", "name_en": "da", "type": "consonant", "series": 1, "freq": 18, "desc": "Dental. Sound: D. Series: A"},
+    {"id": "ឋ", "name_en": "tha_retro", "type": "consonant", "series": 1, "freq": 52,
+     "desc": "Dental. Sound: Th. Series: A"},
+    {"id": "ឌ", "name_en": "do", "type": "consonant", "series": 2, "freq": 59, "desc": "Dental. Sound: D. Series: O"},
+    {"id": "ឍ", "name_en": "tho_retro", "type": "consonant", "series": 2, "freq": 65,
+     "desc": "Dental. Sound: Th. Series: O"},
+    {"id": "ណ", "name_en": "na", "type": "consonant", "series": 1, "freq": 36, "desc": "Dental. Sound: N. Series: A"},
+    {"id": "ត", "name_en": "ta", "type": "consonant", "series": 1, "freq": 10, "desc": "Dental. Sound: T. Series: A"},
+    {"id": "ថ", "name_en": "tha", "type": "consonant", "series": 1, "freq": 33, "desc": "Dental. Sound: Th. Series: A"},
+    {"id": "ទ", "name_en": "to", "type": "consonant", "series": 2, "freq": 16, "desc": "Dental. Sound: T. Series: O"},
+    {"id": "ធ", "name_en": "tho", "type": "consonant", "series": 2, "freq": 39, "desc": "Dental. Sound: Th. Series: O"},
+    {"id": "ន", "name_en": "no", "type": "consonant", "series": 2, "freq": 3, "desc": "Dental. Sound: N. Series: O"},
+    {"id": "ប", "name_en": "ba", "type": "consonant", "series": 1, "freq": 6, "desc": "Labial. Sound: B. Series: A"},
+    {"id": "ផ", "name_en": "pha", "type": "consonant", "series": 1, "freq": 42, "desc": "Labial. Sound: Ph. Series: A"},
+    {"id": "ព", "name_en": "po", "type": "consonant", "series": 2, "freq": 17, "desc": "Labial. Sound: P. Series: O"},
+    {"id": "ភ", "name_en": "pho", "type": "consonant", "series": 2, "freq": 40, "desc": "Labial. Sound: Ph. Series: O"},
+    {"id": "ម", "name_en": "mo", "type": "consonant", "series": 2, "freq": 7, "desc": "Labial. Sound: M. Series: O"},
+    {"id": "យ", "name_en": "yo", "type": "consonant", "series": 2, "freq": 12, "desc": "Sound: Y. Series: O"},
+    {"id": "រ", "name_en": "ro", "type": "consonant", "series": 2, "freq": 4, "desc": "Sound: R. Series: O"},
+    {"id": "ល", "name_en": "lo", "type": "consonant", "series": 2, "freq": 11, "desc": "Sound: L. Series: O"},
+    {"id": "វ", "name_en": "vo", "type": "consonant", "series": 2, "freq": 27, "desc": "Sound: V/W. Series: O"},
+    {"id": "ស", "name_en": "sa", "type": "consonant", "series": 1, "freq": 9, "desc": "Sound: S. Series: A"},
+    {"id": "ហ", "name_en": "ha", "type": "consonant", "series": 1, "freq": 38, "desc": "Sound: H. Series: A"},
+    {"id": "ឡ", "name_en": "la", "type": "consonant", "series": 1, "freq": 46, "desc": "Sound: L. Series: A"},
+    {"id": "អ", "name_en": "qa", "type": "consonant", "series": 1, "freq": 29, "desc": "Glottal Stop. Series: A"},
+
+    # --- 2. ЗАВИСИМЫЕ ГЛАСНЫЕ ---
+    {"id": "ា", "name_en": "aa", "type": "vowel_dependent", "freq": 1, "desc": "Long 'aa' (A) or 'ie' (O)"},
+    {"id": "ិ", "name_en": "i", "type": "vowel_dependent", "freq": 14, "desc": "Short 'i' (A) or 'i' (O)"},
+    {"id": "ី", "name_en": "ei", "type": "vowel_dependent", "freq": 23, "desc": "Long 'ei' (A) or 'ii' (O)"},
+    {"id": "ឹ", "name_en": "oe", "type": "vowel_dependent", "freq": 41, "desc": "Short 'oe' (A) or 'ue' (O)"},
+    {"id": "ឺ", "name_en": "oeu", "type": "vowel_dependent", "freq": 51, "desc": "Long 'oeu' (A) or 'ueu' (O)"},
+    {"id": "ុ", "name_en": "u", "type": "vowel_dependent", "freq": 15, "desc": "Short 'u' (A) or 'u' (O)"},
+    {"id": "ូ", "name_en": "oo", "type": "vowel_dependent", "freq": 31, "desc": "Long 'oo' (A) or 'uu' (O)"},
+    {"id": "ួ", "name_en": "ua", "type": "vowel_dependent", "freq": 32, "desc": "Diphthong 'ua'"},
+    {"id": "ើ", "name_en": "aeu", "type": "vowel_dependent", "freq": 24, "desc": "Long 'aeu' (A) or 'oeu' (O)"},
+    {"id": "ឿ", "name_en": "oea", "type": "vowel_dependent", "freq": 58, "desc": "Diphthong 'oea'"},
+    {"id": "ៀ", "name_en": "ie", "type": "vowel_dependent", "freq": 45, "desc": "Diphthong 'ie'"},
+    {"id": "េ", "name_en": "e", "type": "vowel_dependent", "freq": 21, "desc": "Short 'ei' (A) or 'ee' (O)"},
+    {"id": "ែ", "name_en": "ae", "type": "vowel_dependent", "freq": 25, "desc": "Long 'ae' (A) or 'ae' (O)"},
+    {"id": "ៃ", "name_en": "ai", "type": "vowel_dependent", "freq": 44, "desc": "Diphthong 'ai' (A) or 'ey' (O)"},
+    {"id": "ោ", "name_en": "ao", "type": "vowel_dependent", "freq": 26, "desc": "Diphthong 'ao' (A) or 'ou' (O)"},
+    {"id": "ៅ", "name_en": "au", "type": "vowel_dependent", "freq": 37, "desc": "Diphthong 'au' (A) or 'ov' (O)"},
+    {"id": "ុំ", "name_en": "om", "type": "vowel_dependent", "desc": "Sound 'om' (A) or 'um' (O)"},
+    {"id": "ំ", "name_en": "am", "type": "vowel_dependent", "desc": "Sound 'am' (A) or 'um' (O)"},
+    {"id": "ាំ", "name_en": "aam", "type": "vowel_dependent", "desc": "Sound 'aam' (A) or 'oam' (O)"},
+    {"id": "ះ", "name_en": "ah", "type": "vowel_dependent", "desc": "Aspirator 'Ah'"},
+    {"id": "ុះ", "name_en": "oh", "type": "vowel_dependent", "desc": "Short 'oh'"},
+    {"id": "េះ", "name_en": "eh", "type": "vowel_dependent", "desc": "Short 'eh'"},
+    {"id": "ោះ", "name_en": "oh_short", "type": "vowel_dependent", "desc": "Short 'aoh'"},
+
+    # --- 3. НЕЗАВИСИМЫЕ ГЛАСНЫЕ ---
+    {"id": "ឥ", "name_en": "e_indep", "type": "vowel_independent", "freq": 64, "desc": "Independent: E"},
+    {"id": "ឦ", "name_en": "ei_indep", "type": "vowel_independent", "freq": 72, "desc": "Independent: EI"},
+    {"id": "ឧ", "name_en": "u_indep", "type": "vowel_independent", "freq": 61, "desc": "Independent: U"},
+    {"id": "ឪ", "name_en": "au_indep", "type": "vowel_independent", "freq": 68, "desc": "Independent: AU/OV"},
+    {"id": "ឫ", "name_en": "ry", "type": "vowel_independent", "freq": 70, "desc": "Independent: RY"},
+    {"id": "ឬ", "name_en": "ryy", "type": "vowel_independent", "freq": 67, "desc": "Independent: RYY"},
+    {"id": "ឭ", "name_en": "ly", "type": "vowel_independent", "freq": 69, "desc": "Independent: LY"},
+    {"id": "ឮ", "name_en": "lyy", "type": "vowel_independent", "freq": 71, "desc": "Independent: LYY"},
+    {"id": "ឯ", "name_en": "ae_indep", "type": "vowel_independent", "freq": 60, "desc": "Independent: AE"},
+    {"id": "ឱ", "name_en": "ao_indep", "type": "vowel_independent", "freq": 66, "desc": "Independent: AO"},
+    {"id": "ឳ", "name_en": "au_ra_indep", "type": "vowel_independent", "freq": 77, "desc": "Independent: AU (Rare)"},
+    {"id": "ឲ", "name_en": "aoy", "type": "vowel_independent", "freq": 48, "desc": "Independent: AOY"},
+
+    # --- 4. ДИАКРИТИКИ ---
+    {"id": "់", "name_en": "bantoc", "type": "diacritic", "spoken": "បន្តក់", "freq": 13, "mute": True,
+     "desc": "Shortener. Makes the vowel sound short and clipped."},
+    {"id": "៌", "name_en": "robabat", "type": "diacritic", "spoken": "របាទ", "freq": 63,
+     "desc": "Robabat. Used in Sanskrit."},
+    {"id": "៍", "name_en": "tantakheat", "type": "diacritic", "spoken": "ទណ្ឌឃាត", "freq": 54, "mute": True,
+     "desc": "Mute Button. The letter under this sign is NOT pronounced. Often used in loanwords."},
+    {"id": "៎", "name_en": "kakabat", "type": "diacritic", "spoken": "កាកបាទ", "freq": 78,
+     "desc": "Kakabat. Exclamation."},
+    {"id": "៏", "name_en": "asda", "type": "diacritic", "spoken": "អស្តា", "freq": 53, "desc": "Asda. Number 8/Tone."},
+    {"id": "័", "name_en": "samyok_sann", "type": "diacritic", "spoken": "សំយោគសញ្ញា", "freq": 49, "mute": True,
+     "desc": "Vowel Changer. Usually acts like a short 'a' sound in Sanskrit/Pali words."},
+    {"id": "ំ", "name_en": "nikahit", "type": "diacritic", "spoken": "និគ្គហិត", "freq": 20, "mute": True,
+     "desc": "Nasalizer. Adds an 'm' sound to the end of the syllable (Am/Om)."},
+    {"id": "ះ", "name_en": "reahmuk", "type": "diacritic", "spoken": "រះមុខ", "freq": 30, "mute": True,
+     "desc": "Aspirator. Adds a breathy 'h' sound at the end (Ah/Oh)."},
+    {"id": "ៈ", "name_en": "yuukaleapintu", "type": "diacritic", "spoken": "យុគលពិន្ទុ", "freq": 55,
+     "desc": "Yuukaleapintu. Glottal stop."},
+    {"id": "៉", "name_en": "musakatoan", "type": "diacritic", "spoken": "មូសិកទន្ត", "freq": 43, "mute": True,
+     "desc": "Series Shifter. Converts a 'Deep' (O-Series) consonant into a 'Light' (A-Series) sound."},
+    {"id": "៊", "name_en": "treisap", "type": "diacritic", "spoken": "ត្រីសព្ទ", "freq": 50, "mute": True,
+     "desc": "Series Shifter. Converts a 'Light' (A-Series) consonant into a 'Deep' (O-Series) sound."},
+    {"id": "្", "name_en": "coeng", "type": "diacritic", "spoken": "ជើង", "freq": 2, "mute": True,
+     "desc": "Subscript Maker. Kills the vowel of the consonant and prepares the NEXT consonant to be written underneath."},
+
+    # --- 5. ЦИФРЫ ---
+    {"id": "០", "name_en": "zero", "type": "number", "spoken": "សូន្យ", "freq": 73, "desc": "Number 0"},
+    {"id": "១", "name_en": "one", "type": "number", "spoken": "មួយ", "freq": 75, "desc": "Number 1"},
+    {"id": "២", "name_en": "two", "type": "number", "spoken": "ពីរ", "freq": 74, "desc": "Number 2"},
+    {"id": "៣", "name_en": "three", "type": "number", "spoken": "បី", "freq": 79, "desc": "Number 3"},
+    {"id": "៤", "name_en": "four", "type": "number", "spoken": "បួន", "desc": "Number 4"},
+    {"id": "៥", "name_en": "five", "type": "number", "spoken": "ប្រាំ", "freq": 76, "desc": "Number 5"},
+    {"id": "៦", "name_en": "six", "type": "number", "spoken": "ប្រាំមួយ", "desc": "Number 6"},
+    {"id": "៧", "name_en": "seven", "type": "number", "spoken": "ប្រាំពីរ", "desc": "Number 7"},
+    {"id": "៨", "name_en": "eight", "type": "number", "spoken": "ប្រាំបី", "desc": "Number 8"},
+    {"id": "៩", "name_en": "nine", "type": "number", "spoken": "ប្រាំបួន", "desc": "Number 9"},
+    {"id": "១០", "name_en": "ten", "type": "number", "spoken": "ដប់", "desc": "Number 10"},
+
+    # --- 6. СИМВОЛЫ ---
+    {"id": "។", "name_en": "khan", "type": "symbol", "spoken": "ខណ្ឌ", "mute": True,
+     "desc": "Full Stop. Used to mark the end of a sentence."},
+    {"id": "ៗ", "name_en": "lek_to", "type": "symbol", "spoken": "លេខទោ", "freq": 62, "mute": True,
+     "desc": "Duplicator. Repeats the previous word or phrase (for emphasis or plural)."},
+    {"id": "៕", "name_en": "bariyour", "type": "symbol", "spoken": "បរិយោសាន", "desc": "End of chapter."},
+
+]
+
+
+def audio_jobs(entry) -> list:
+    """(текст, имя файла, колонка) для каждой озвучки записи."""
+    name, char = entry["name_en"], entry["id"]
+    if entry["type"] == "vowel_dependent":
+        return [("ស្រះ" + char, f"vowel_name_{name}.mp3", "audio_url"),
+                ("អ" + char, f"vowel_sun_{name}.mp3", "sound_series_1"),
+                ("អ៊" + char, f"vowel_moon_{name}.mp3", "sound_series_2")]
+    if "spoken" in entry:
+        prefix = "number" if entry["type"] == "number" else "sign"
+        return [(entry["spoken"], f"{prefix}_{name}.mp3", "audio_url")]
+    if entry["type"] == "consonant":
+        return [(char, f"letter_{name}.mp3", "audio_url")]
+    return [(char, f"{entry['type']}_{name}.mp3", "audio_url")]
+
+
+def build(registry=None):
+    """
+    Один проход по реестру: строки таблицы (по одной на id) и список задач озвучки.
+    Возвращает (rows, jobs); jobs — [(текст, имя файла)] без повторов.
+    """
+    rows = {}
+    jobs = {}
+    for entry in registry or ALPHABET:
+        row = {
+            "id": entry["id"],
+            "name_en": entry["name_en"],
+            "type": entry["type"],
+            "series": entry.get("series"),
+            "sound_series_1": None,
+            "sound_series_2": None,
+            "audio_url": None,
+            "frequency_rank": entry.get("freq", 0),
+            "description": entry.get("desc", ""),
+        }
+        for column in ("shape_group", "subscript_form"):
+            if column in entry:
+                row[column] = entry[column]
+        if not entry.get("mute"):
+            for text, filename, column in audio_jobs(entry):
+                row[column] = filename
+                jobs.setdefault(filename, text)
+        rows[entry["id"]] = row
+    return list(rows.values()), list((text, filename) for filename, text in jobs.items())
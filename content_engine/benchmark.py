@@ -0,0 +1,540 @@
+"""
+Офлайн-бенчмарк пайплайна контента: без Supabase и без edge-tts.
+
+Настоящий код (SeedRun/seed_lesson, update_study_materials, lesson_validator,
+alphabet_registry/sync_alphabet) гоняется против подставных сервисов:
+  * FakeSupabase — семантика Supabase поверх SQLite в памяти (storage.SQLiteClient)
+    с задержкой на каждый запрос и случайными 502;
+  * FakeCommunicate — вместо edge_tts.Communicate (через transport.set_tts):
+    задержка, случайные 503, в файл пишутся фиктивные байты.
+
+Данные: настоящие файлы content_json (1×) и синтетические главы 10×/100× —
+копии уроков с новыми id и изменёнными кхмерскими строками, чтобы словарь и
+озвучка тоже росли. Время, запросы к БД и задачи TTS считает run_metrics.
+
+Отдельно меряется время импорта модулей (`python -X importtime`) против
+бюджетов IMPORT_BUDGETS_MS: импорт не должен создавать клиентов сервисов.
+
+Результат пишется в benchmarks/<версия>.json (версия — git describe) и
+сравнивается с предыдущим результатом: регрессии видны между версиями.
+
+Запуск:
+  python benchmark.py                                  # 1× и 10×
+  python benchmark.py --scales 1,10,100 --db-latency 40 --db-errors 0.01
+  python benchmark.py --limits production              # с боевыми лимитами rate_control
+  python benchmark.py --baseline benchmarks/3cb047e.json
+"""
+import argparse
+import asyncio
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+CONTENT_DIR = BASE_DIR / "content_json"
+RESULTS_DIR = BASE_DIR / "benchmarks"
+
+# Шаг id уроков/модулей в синтетических копиях (настоящие id меньше)
+SYNTHETIC_ID_STEP = 1_000_000
+KHMER_PATTERN = re.compile(r"[\u1780-\u17FF]")
+
+# Лимиты rate_control для режима "open": меряем пайплайн, а не потолок лимитера
+OPEN_LIMITS = {
+    "CONTENT_DB_RATE": "1000", "CONTENT_DB_MAX_RATE": "1000",
+    "CONTENT_DB_CONCURRENCY": "16", "CONTENT_DB_MAX_CONCURRENCY": "32",
+    "CONTENT_TTS_RATE": "1000", "CONTENT_TTS_MAX_RATE": "1000",
+    "CONTENT_TTS_CONCURRENCY": "10", "CONTENT_TTS_MAX_CONCURRENCY": "20",
+}
+
+# Бюджеты времени импорта (мс, cumulative из -X importtime). Модули не должны тянуть
+# при импорте клиентов сервисов: клиент и TTS создаются лениво (storage.get_client)
+IMPORT_BUDGETS_MS = {
+    "alphabet_registry": 20, "word_assets": 20, "lesson_validator": 40, "lesson_assets": 40,
+    "storage": 60, "database_engine": 200, "seed_structure": 200, "sync_alphabet": 200,
+    "compile_bundles": 200, "export_copy": 200, "seed_lesson_json_my": 200,
+}
+HEAVY_MODULES = ("supabase", "postgrest", "httpx", "edge_tts", "aiohttp", "dotenv")
+
+# Метрики, по которым сравниваем версии: (путь в результате, больше = лучше)
+COMPARE_KEYS = [("wall_seconds", False), ("lessons_per_sec", True), ("requests_total", False)]
+REGRESSION_THRESHOLD = 0.10
+
+
+class InjectedError(Exception):
+    pass
+
+
+# --- ПОДСТАВНЫЕ СЕРВИСЫ ---
+
+class FaultInjector:
+    """Задержка (мс, с разбросом) и доля ошибок; общий генератор с фиксированным seed."""
+
+    def __init__(self, latency_ms, jitter_ms, error_rate, message, seed):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.message = message
+        self._rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def check(self):
+        self.calls += 1
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.failures += 1
+            raise InjectedError(self.message)
+
+
+class FakeSupabase:
+    """Клиент с интерфейсом supabase-py: SQLite в памяти + задержка и ошибки на запрос."""
+
+    def __init__(self, faults: FaultInjector):
+        from storage import SQLiteClient
+
+        self.faults = faults
+        self.backend = SQLiteClient(":memory:")
+
+    def table(self, name):
+        return _FakeQuery(self, self.backend.table(name))
+
+    from_ = table
+
+    def close(self):
+        self.backend.close()
+
+
+class _FakeQuery:
+    def __init__(self, client, query):
+        self._client = client
+        self._query = query
+
+    def __getattr__(self, name):
+        # path, http_method, headers, json и методы builder-а — как у настоящего запроса
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._query else result
+
+        return call
+
+    def execute(self):
+        faults = self._client.faults
+        time.sleep(faults.delay())
+        faults.check()
+        return self._query.execute()
+
+
+def fake_communicate(faults: FaultInjector):
+    class FakeCommunicate:
+        def __init__(self, text, voice, rate=None, **kwargs):
+            self.text = text
+
+        async def save(self, path):
+            await asyncio.sleep(faults.delay())
+            faults.check()
+            # Размер примерно как у настоящего mp3: ~2 KB на символ
+            Path(path).write_bytes(b"ID3" + b"\0" * (2048 * max(1, len(self.text))))
+
+    return FakeCommunicate
+
+
+# --- ДАННЫЕ ---
+
+def load_lessons(files) -> list:
+    """[(chapter meta, [уроки])] из файлов content_json; битые файлы пропускаем."""
+    from content_stream import ChapterStream
+
+    chapters = []
+    for path in files:
+        try:
+            stream = ChapterStream(path)
+            lessons = list(stream)
+        except Exception as e:
+            print(f"⚠️  Пропускаю {path.name}: {e}")
+            continue
+        chapters.append((dict(stream.meta), lessons))
+    return chapters
+
+
+def _suffix_khmer(value, suffix):
+    """Добавляет кхмерские цифры к кхмерским строкам (до пояснения в скобках)."""
+    if isinstance(value, str):
+        if not suffix or not KHMER_PATTERN.search(value):
+            return value
+        head, sep, tail = value.partition(" (")
+        return head + suffix + sep + tail
+    if isinstance(value, dict):
+        return {k: _suffix_khmer(v, suffix) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_suffix_khmer(v, suffix) for v in value]
+    return value
+
+
+def _offset_id(value, offset):
+    try:
+        return int(value) + offset
+    except (TypeError, ValueError):
+        return value
+
+
+def synthetic_files(chapters, scale, out_dir: Path) -> list:
+    """scale глав на каждую настоящую: первая как есть, остальные — копии с новыми id и словами."""
+    files = []
+    for chapter_idx, (meta, lessons) in enumerate(chapters):
+        for copy_idx in range(scale):
+            suffix = "".join(chr(0x17E0 + int(d)) for d in str(copy_idx)) if copy_idx else ""
+            offset = copy_idx * SYNTHETIC_ID_STEP
+            copied = []
+            for lesson in lessons:
+                lesson = _suffix_khmer(copy.deepcopy(lesson), suffix)
+                for key in ("lesson_id", "module_id"):
+                    if lesson.get(key) is not None:
+                        lesson[key] = _offset_id(lesson[key], offset)
+                copied.append(lesson)
+            payload = {**meta, "lessons": copied}
+            for key in ("chapter_id", "id"):
+                if payload.get(key) is not None:
+                    payload[key] = _offset_id(payload[key], offset)
+            path = out_dir / f"x{scale}_{chapter_idx:03d}_{copy_idx:03d}.json"
+            path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            files.append(path)
+    return files
+
+
+# --- СЦЕНАРИИ ---
+
+@contextlib.contextmanager
+def quiet(verbose):
+    """Пайплайн много печатает; вывод в терминал искажает время."""
+    if verbose:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _reset_run():
+    from rate_control import DB_LIMITER, TTS_LIMITER
+    from run_metrics import METRICS
+    from transport import HTTP_STATS, TTS_STATS
+
+    DB_LIMITER.reset()
+    TTS_LIMITER.reset()
+    METRICS.reset()
+    HTTP_STATS.reset()
+    TTS_STATS.reset()
+
+
+def _summarize(report, wall, lessons=None) -> dict:
+    requests = {
+        key: {"count": v["count"], "avg_ms": round(1000 * v["seconds"] / v["count"], 2) if v["count"] else 0.0,
+              "retries": v["retries"], "errors": v["errors"]}
+        for key, v in report["requests"].items()
+    }
+    result = {
+        "wall_seconds": round(wall, 4),
+        "requests_total": report["requests_total"],
+        "retries_total": report["retries_total"],
+        "requests_per_sec": round(report["requests_total"] / wall, 2) if wall else 0.0,
+        "requests": requests,
+        "phases": {k: round(v["seconds"], 4) for k, v in report["phases"].items()},
+        "tts": report["tts"],
+        "bytes_written": report["bytes_written"],
+    }
+    if lessons is not None:
+        result["lessons"] = lessons
+        result["lessons_per_sec"] = round(lessons / wall, 2) if wall else 0.0
+        result["requests_per_lesson"] = round(report["requests_total"] / lessons, 2) if lessons else 0.0
+    return result
+
+
+async def _seed_files(files, concurrency, journal_path):
+    from seed_journal import SeedJournal
+    from seed_lesson_json_my import SeedRun, feed_lessons
+    from transport import close_tts
+
+    args = argparse.Namespace(module_id=None, update_summary=True, only_lesson_id=None, lesson_id=None,
+                              title=None, desc=None, order_index=None)
+    journal = SeedJournal(journal_path)
+    run = SeedRun(args, journal, concurrency)
+    try:
+        await feed_lessons(run, files, True)
+        await run.finish()
+    finally:
+        journal.close()
+        await close_tts()
+    return run.processed_count
+
+
+def bench_seed(files, config, work_dir: Path, verbose=False) -> dict:
+    """Загрузка всех уроков в пустую БД, затем повторный прогон без изменений."""
+    import database_engine
+    from run_metrics import METRICS
+    from storage import set_client
+
+    db = FakeSupabase(FaultInjector(config.db_latency, config.db_jitter, config.db_errors,
+                                    "502 Bad Gateway (injected)", config.seed))
+    set_client(db)
+    database_engine.AUDIO_DIR = work_dir / "sounds"
+    database_engine.AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    for name in ("seed", "reseed"):
+        _reset_run()
+        started = time.perf_counter()
+        with quiet(verbose):
+            lessons = asyncio.run(_seed_files(files, config.concurrency, work_dir / f"{name}.jsonl"))
+        wall = time.perf_counter() - started
+        results[name] = _summarize(METRICS.report(), wall, lessons)
+    db.close()
+    return results
+
+
+def bench_validator(chapters, repeat=20) -> dict:
+    from lesson_validator import validate_lessons
+
+    lessons = {}
+    for meta, chapter_lessons in chapters:
+        for lesson in chapter_lessons:
+            if lesson.get("lesson_id") is not None:
+                lessons[int(lesson["lesson_id"])] = lesson
+    started = time.perf_counter()
+    for _ in range(repeat):
+        errors, warnings = validate_lessons(lessons, "benchmark")
+    wall = (time.perf_counter() - started) / repeat
+    return {"wall_seconds": round(wall, 6), "lessons": len(lessons),
+            "lessons_per_sec": round(len(lessons) / wall, 1) if wall else 0.0,
+            "errors": len(errors), "warnings": len(warnings)}
+
+
+def bench_alphabet(work_dir: Path, verbose=False, repeat=50) -> dict:
+    """alphabet_registry.build и офлайн-прогон sync_alphabet с озвучкой (как gen_alphabet.py)."""
+    import sync_alphabet
+    from alphabet_registry import build
+    from run_metrics import METRICS
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        rows, jobs = build()
+    build_seconds = (time.perf_counter() - started) / repeat
+
+    sync_alphabet.OUTPUT_DIR = work_dir / "alphabet_sounds"
+    sync_alphabet.OUTPUT_CSV = work_dir / "alphabet_master.csv"
+    _reset_run()
+    started = time.perf_counter()
+    with quiet(verbose):
+        asyncio.run(sync_alphabet.sync_alphabet(offline=True, audio=True))
+    wall = time.perf_counter() - started
+    generated = len(list(sync_alphabet.OUTPUT_DIR.glob("*.mp3")))
+    return {
+        "build_seconds": round(build_seconds, 6), "rows": len(rows), "audio_jobs": len(jobs),
+        "wall_seconds": round(wall, 4), "audio_generated": generated,
+        "jobs_per_sec": round(len(jobs) / wall, 2) if wall else 0.0,
+        "limiters": METRICS.report()["limiters"],
+    }
+
+
+def _import_time_us(module, env) -> tuple:
+    """(cumulative мкс по -X importtime, тяжёлые модули, загруженные при импорте)."""
+    code = (f"import {module}, sys; "
+            f"print(','.join(n for n in {HEAVY_MODULES!r} if n in sys.modules))")
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BASE_DIR, env=env,
+                         capture_output=True, text=True, timeout=60)
+    if out.returncode:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"exit {out.returncode}")
+    cumulative = None
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module and parts[2].startswith(f" {module}"):
+            cumulative = int(parts[1])
+    return cumulative, [n for n in out.stdout.strip().split(",") if n]
+
+
+def bench_imports(repeat=5) -> dict:
+    """Время импорта модулей в чистом процессе (лучшее из repeat) против бюджета."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(BASE_DIR), os.getenv("PYTHONPATH")]))}
+    results = {}
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        try:
+            runs = [_import_time_us(module, env) for _ in range(repeat)]
+        except (RuntimeError, subprocess.SubprocessError) as e:
+            results[module] = {"error": str(e)}
+            continue
+        best = min(us for us, _ in runs if us is not None) / 1_000_000
+        heavy = sorted({name for _, names in runs for name in names})
+        results[module] = {"wall_seconds": round(best, 6), "budget_ms": budget, "heavy_modules": heavy,
+                           "over_budget": best * 1000 > budget or bool(heavy)}
+    return results
+
+
+# --- РЕЗУЛЬТАТЫ ---
+
+def current_version() -> str:
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=BASE_DIR,
+                             capture_output=True, text=True, timeout=30)
+        return out.stdout.strip() or "local"
+    except (OSError, subprocess.SubprocessError):
+        return "local"
+
+
+def previous_result(current: Path):
+    candidates = [p for p in RESULTS_DIR.glob("*.json") if p != current]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda p: json.loads(p.read_text(encoding="utf-8")).get("created_at", ""))
+
+
+def _flatten(result) -> dict:
+    """{"seed x10.seed": {...метрики}} — только сценарии с метриками для сравнения."""
+    flat = {}
+    for name, scenario in result["scenarios"].items():
+        parts = scenario.items() if isinstance(scenario, dict) and "wall_seconds" not in scenario \
+            else [("", scenario)]
+        for sub, metrics in parts:
+            if isinstance(metrics, dict) and "wall_seconds" in metrics:
+                flat[f"{name}.{sub}" if sub else name] = metrics
+    return flat
+
+
+def compare(result, baseline) -> list:
+    """Строки сравнения; регрессии (хуже порога) помечены ⚠️."""
+    old = _flatten(baseline)
+    lines = []
+    for name, metrics in _flatten(result).items():
+        before = old.get(name)
+        if not before:
+            continue
+        for key, higher_is_better in COMPARE_KEYS:
+            if key not in metrics or not before.get(key):
+                continue
+            change = (metrics[key] - before[key]) / before[key]
+            worse = -change if higher_is_better else change
+            mark = "⚠️ " if worse > REGRESSION_THRESHOLD else "   "
+            lines.append(f"{mark}{name} {key}: {before[key]} → {metrics[key]} ({change:+.0%})")
+    return lines
+
+
+def print_result(result):
+    for name, scenario in _flatten(result).items():
+        line = f"   {name}: {scenario['wall_seconds']:.3f}s"
+        if "lessons_per_sec" in scenario:
+            line += f", {scenario['lessons_per_sec']} уроков/s"
+        if "requests_total" in scenario:
+            line += f", запросов {scenario['requests_total']} ({scenario.get('requests_per_lesson', '-')}/урок)"
+        if "retries_total" in scenario:
+            line += f", повторов {scenario['retries_total']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк пайплайна контента (фейковые Supabase и TTS).")
+    parser.add_argument("--content-dir", default=str(CONTENT_DIR), help="Папка с JSON уроками")
+    parser.add_argument("--content-glob", default="*.json", help="Маска файлов (по умолчанию: *.json)")
+    parser.add_argument("--scales", default="1,10", help="Масштабы данных через запятую (например, 1,10,100)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Уроков одновременно (как в сидере)")
+    parser.add_argument("--db-latency", type=float, default=20.0, help="Задержка запроса к БД, мс")
+    parser.add_argument("--db-jitter", type=float, default=5.0, help="Разброс задержки БД, мс")
+    parser.add_argument("--db-errors", type=float, default=0.0, help="Доля запросов с ошибкой 502")
+    parser.add_argument("--tts-latency", type=float, default=150.0, help="Задержка генерации аудио, мс")
+    parser.add_argument("--tts-jitter", type=float, default=50.0, help="Разброс задержки TTS, мс")
+    parser.add_argument("--tts-errors", type=float, default=0.0, help="Доля задач TTS с ошибкой 503")
+    parser.add_argument("--limits", choices=("open", "production"), default="open",
+                        help="open — лимитеры не ограничивают; production — лимиты как в обычном запуске")
+    parser.add_argument("--seed", type=int, default=1, help="Seed генератора задержек и ошибок")
+    parser.add_argument("--label", help="Имя результата (по умолчанию: git describe)")
+    parser.add_argument("--baseline", help="Файл результата для сравнения (по умолчанию: предыдущий)")
+    parser.add_argument("--no-save", action="store_true", help="Не сохранять результат")
+    parser.add_argument("--verbose", action="store_true", help="Не глушить вывод пайплайна")
+    args = parser.parse_args()
+
+    # До импорта пайплайна: лимиты читаются при импорте rate_control
+    if args.limits == "open":
+        for name, value in OPEN_LIMITS.items():
+            os.environ.setdefault(name, value)
+    from transport import set_tts
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    files = sorted(p for p in Path(args.content_dir).glob(args.content_glob) if p.is_file())
+    chapters = load_lessons(files)
+    print(f"🏁 Бенчмарк: {len(chapters)} файл(ов), масштабы {scales}, "
+          f"БД {args.db_latency}±{args.db_jitter} мс / ошибки {args.db_errors:.0%}, "
+          f"TTS {args.tts_latency}±{args.tts_jitter} мс / ошибки {args.tts_errors:.0%}, лимиты: {args.limits}")
+
+    set_tts(fake_communicate(FaultInjector(args.tts_latency, args.tts_jitter, args.tts_errors,
+                                           "503 Service Unavailable (injected)", args.seed)))
+    scenarios = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="content_bench_") as tmp:
+            tmp = Path(tmp)
+            for scale in scales:
+                scale_dir = tmp / f"x{scale}"
+                scale_dir.mkdir()
+                scale_files = synthetic_files(chapters, scale, scale_dir)
+                scale_chapters = load_lessons(scale_files)
+                lessons = sum(len(l) for _, l in scale_chapters)
+                print(f"⏱️  x{scale}: {lessons} уроков...")
+                scenarios[f"seed_x{scale}"] = bench_seed(scale_files, args, scale_dir, args.verbose)
+                scenarios[f"validator_x{scale}"] = bench_validator(scale_chapters)
+            print("⏱️  алфавит...")
+            scenarios["alphabet"] = bench_alphabet(tmp, args.verbose)
+            print("⏱️  время импорта...")
+            scenarios["imports"] = bench_imports()
+    finally:
+        set_tts(None)
+
+    result = {
+        "version": args.label or current_version(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("label", "baseline", "no_save", "verbose")},
+        "scenarios": scenarios,
+    }
+
+    print("\n" + "=" * 60)
+    print_result(result)
+    for module, entry in scenarios["imports"].items():
+        if entry.get("error"):
+            print(f"⚠️  import {module}: {entry['error']}")
+        elif entry["over_budget"]:
+            heavy = f", тянет {', '.join(entry['heavy_modules'])}" if entry["heavy_modules"] else ""
+            print(f"⚠️  import {module}: {entry['wall_seconds'] * 1000:.0f} мс "
+                  f"при бюджете {entry['budget_ms']} мс{heavy}")
+
+    out_path = RESULTS_DIR / f"{result['version']}.json"
+    baseline_path = Path(args.baseline) if args.baseline else previous_result(out_path)
+    if baseline_path is not None and baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if baseline.get("config") != result["config"]:
+            print(f"ℹ️  Настройки отличаются от {baseline_path.name} — сравнение приблизительное")
+        print(f"\n📊 Сравнение с {baseline.get('version', baseline_path.stem)}:")
+        for line in compare(result, baseline) or ["   нет общих сценариев"]:
+            print(line)
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 Результат: {out_path}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
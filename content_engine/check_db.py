@@ -1,26 +1,15 @@
-import os
 import json
-from supabase import create_client
-from dotenv import load_dotenv
-from pathlib import Path
 
-# Подключаемся
-load_dotenv()
-url = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
-key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
-
-if not url or not key:
-    print("❌ Нет ключей в .env")
-    exit()
-
-supabase = create_client(url, key)
+from rate_control import execute_with_retry
+from storage import shared_client as supabase
+from word_assets import WORD_ASSET_FIELDS, resolve_item_data
 
 
 def check_lesson_103():
     print("🔍 Проверяем данные для Урока 103 (Финальный квиз)...\n")
 
     # 1. Запрашиваем элементы урока из базы
-    response = supabase.table("lesson_items").select("*").eq("lesson_id", 103).execute()
+    response = execute_with_retry(supabase.table("lesson_items").select("*").eq("lesson_id", 103))
     items = response.data
 
     if not items:
@@ -42,6 +31,11 @@ def check_lesson_103():
 
     # 2. Анализируем структуру данных
     data = quiz_item['data']
+    if data.get('option_words'):
+        # Новый формат: варианты ссылаются на word_assets
+        keys = sorted(set(data['option_words'].values()))
+        words_res = execute_with_retry(supabase.table("word_assets").select("khmer", *WORD_ASSET_FIELDS).in_("khmer", keys))
+        data = resolve_item_data("quiz", data, {r["khmer"]: r for r in words_res.data})
     question = data.get('question', 'No question')
     options = data.get('options', [])
     metadata = data.get('options_metadata', {})
@@ -70,7 +64,7 @@ def check_lesson_103():
     # 4. Проверяем словарь для одного слова
     first_opt_clean = options[0].split(' (')[0].strip()
     print(f"\n📚 Проверка словаря для слова '{first_opt_clean}':")
-    dict_res = supabase.table("dictionary").select("*").eq("khmer", first_opt_clean).execute()
+    dict_res = execute_with_retry(supabase.table("dictionary").select("*").eq("khmer", first_opt_clean))
     if dict_res.data:
         print(f"   В словаре найдено: {dict_res.data[0].get('pronunciation', 'Нет транскрипции')}")
     else:
@@ -0,0 +1,216 @@
+"""
+Компилятор статических бандлов уроков для CDN (Netlify).
+
+Берёт content_json (или снапшот lesson_documents из БД) и пишет в
+khmer-mastery/public/content/:
+  lessons/<lesson_id>.<hash>.json   — документ урока (как в lesson_documents)
+  modules/<module_id>.<hash>.json   — все уроки модуля одним файлом
+  index.json                        — манифест: какой файл у какого урока/модуля
+
+Сжатых копий (.gz/.br) не пишем: Netlify их не отдаёт — он сам сжимает
+ответ на лету, а лишние файлы только раздувают репозиторий. Имя файла содержит хэш содержимого, поэтому бандлы можно кэшировать навсегда
+(immutable), а короткоживущим остаётся только index.json.
+
+Запуск:
+  python compile_bundles.py                    # все файлы из content_json
+  python compile_bundles.py --content-glob 'R*.json'
+  python compile_bundles.py --from-db          # снапшот lesson_documents
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from content_stream import ChapterStream
+from dictionary_mirror import MIRROR_PATH, DictionaryMirror
+from lesson_assets import LessonAssets
+from lesson_documents import DOCUMENT_SCHEMA, build_lesson_document
+from word_assets import resolve_items
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUT_DIR = BASE_DIR.parent / "khmer-mastery" / "public" / "content"
+MANIFEST_NAME = "index.json"
+
+
+def _encode(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def write_bundle(out_dir: Path, kind: str, name, payload) -> dict:
+    """Пишет бандл с хэшем в имени. Уже существующий файл не трогаем."""
+    raw = _encode(payload)
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    rel = f"{kind}/{name}.{digest}.json"
+    path = out_dir / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if not path.exists():
+        path.write_bytes(raw)
+    return {"file": rel, "bytes": len(raw)}
+
+
+def prune_stale(out_dir: Path, manifest: dict) -> int:
+    """Удаляет бандлы, на которые больше не ссылается манифест (и старые .gz/.br копии)."""
+    keep = {e["file"] for section in ("lessons", "modules") for e in manifest[section].values()}
+    removed = 0
+    for kind in ("lessons", "modules"):
+        for path in (out_dir / kind).glob("*.json*"):
+            rel = f"{kind}/{path.name.split('.json')[0]}.json"
+            if path.suffix != ".json" or rel not in keep:
+                path.unlink()
+                removed += 1
+    return removed
+
+
+def compile_bundles(documents, out_dir: Path) -> dict:
+    """documents: {lesson_id: документ урока}. Возвращает манифест."""
+    manifest = {"schema": DOCUMENT_SCHEMA, "lessons": {}, "modules": {}}
+    by_module = defaultdict(list)
+
+    for lesson_id, document in sorted(documents.items()):
+        entry = write_bundle(out_dir, "lessons", lesson_id, document)
+        module_id = document["lesson"].get("module_id")
+        assets = document.get("assets") or []
+        manifest["lessons"][str(lesson_id)] = {
+            "version": document["version"], "module_id": module_id,
+            "asset_bytes": sum(a.get("bytes") or 0 for a in assets), **entry,
+        }
+        if module_id is not None:
+            by_module[module_id].append(document)
+
+    for module_id, docs in sorted(by_module.items()):
+        docs.sort(key=lambda d: (d["lesson"].get("order_index") or 0, d["lesson"]["id"]))
+        payload = {"schema": DOCUMENT_SCHEMA, "module_id": module_id, "lessons": docs}
+        entry = write_bundle(out_dir, "modules", module_id, payload)
+        manifest["modules"][str(module_id)] = {"lessons": [d["lesson"]["id"] for d in docs], **entry}
+
+    (out_dir / MANIFEST_NAME).write_bytes(_encode(manifest))
+    return manifest
+
+
+# --- ИСТОЧНИК: content_json ---
+
+def _bundle_io_class():
+    from database_engine import SeedIO
+
+    class BundleIO(SeedIO):
+        """Обход item-ов без записи: словарь только читаем, озвучку не генерируем."""
+
+        def __init__(self, offline=False):
+            super().__init__()
+            self.offline = offline
+            # Офлайн транскрипции берём из локального зеркала dictionary, если оно есть
+            self.mirror = DictionaryMirror() if offline and MIRROR_PATH.exists() else None
+            # Слова, которые seed_lesson записал бы в dictionary по ходу прогона
+            self.overlay = {}
+
+        async def lookup(self, khmer):
+            if khmer in self.overlay:
+                return self.overlay[khmer]
+            if not self.offline:
+                entry = await super().lookup(khmer)
+            elif self.mirror is not None:
+                entry = self.mirror.get(khmer)
+            else:
+                entry = {}
+            self.overlay[khmer] = entry
+            return entry
+
+        async def audio(self, text, filename):
+            return
+
+        async def save_word(self, dict_row, entry):
+            self.overlay[dict_row["khmer"]] = {k: dict_row[k] for k in ("english", "pronunciation", "item_type")}
+
+    return BundleIO
+
+
+async def documents_from_content(content_files, offline=False) -> dict:
+    """Собирает документы уроков так же, как их собрал бы seed_lesson."""
+    from database_engine import prepare_lesson_items
+
+    io = _bundle_io_class()(offline=offline)
+    documents = {}
+    for content_path in content_files:
+        try:
+            stream = ChapterStream(content_path)
+            for lesson_idx, lesson_data in enumerate(stream, 1):
+                lesson_id = lesson_data.get("lesson_id")
+                content = lesson_data.get("content")
+                if not lesson_id or not content:
+                    continue
+                chapter_id = stream.meta.get("chapter_id") or stream.meta.get("id")
+                lesson_row = {
+                    "id": int(lesson_id),
+                    "title": lesson_data.get("title") or f"Lesson {lesson_id}",
+                    "description": lesson_data.get("desc") or "",
+                    "module_id": lesson_data.get("module_id") or chapter_id,
+                    "order_index": lesson_data.get("order_index", lesson_idx - 1),
+                }
+                assets = LessonAssets()
+                item_rows = await prepare_lesson_items(int(lesson_id), content, io, assets)
+                # Как и при сидинге, более поздний файл перезаписывает урок
+                documents[int(lesson_id)] = build_lesson_document(
+                    lesson_row, resolve_items(item_rows, io.words), assets.to_list())
+        except Exception as e:
+            print(f"❌ ОШИБКА при чтении {content_path.name}: {e}")
+    return documents
+
+
+# --- ИСТОЧНИК: снапшот БД ---
+
+def documents_from_db(page_size=200) -> dict:
+    from database_engine import db_execute_retry, supabase
+
+    documents = {}
+    start = 0
+    while True:
+        res = db_execute_retry(supabase.table("lesson_documents").select("lesson_id", "document")
+                               .order("lesson_id").range(start, start + page_size - 1))
+        for row in res.data:
+            documents[int(row["lesson_id"])] = row["document"]
+        if len(res.data) < page_size:
+            return documents
+        start += page_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Собирает статические бандлы уроков для CDN.")
+    parser.add_argument("--content-dir", default=str(BASE_DIR / "content_json"), help="Папка с JSON уроками")
+    parser.add_argument("--content-glob", default="*.json", help="Маска файлов (по умолчанию: *.json)")
+    parser.add_argument("--from-db", action="store_true", help="Взять готовые lesson_documents из БД")
+    parser.add_argument("--offline", action="store_true",
+                        help="Не ходить в БД: транскрипции из JSON и локального зеркала dictionary")
+    parser.add_argument("--out", default=str(DEFAULT_OUT_DIR), help="Куда писать бандлы")
+    parser.add_argument("--prune", action="store_true", help="Удалить бандлы, которых нет в новом манифесте")
+    args = parser.parse_args()
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.from_db:
+        print("🗄️  Читаю lesson_documents из БД...")
+        documents = documents_from_db()
+    else:
+        files = sorted(p for p in Path(args.content_dir).glob(args.content_glob) if p.is_file())
+        print(f"📂 Компилирую {len(files)} файл(ов) из {args.content_dir}...")
+        documents = asyncio.run(documents_from_content(files, offline=args.offline))
+
+    if not documents:
+        print("❌ Нет уроков для сборки.")
+        sys.exit(1)
+
+    manifest = compile_bundles(documents, out_dir)
+    total = sum(e["bytes"] for e in manifest["lessons"].values())
+    print(f"✅ Уроков: {len(manifest['lessons'])}, модулей: {len(manifest['modules'])}, "
+          f"{total / 1024:.1f} KB")
+    if args.prune:
+        print(f"🧹 Удалено устаревших файлов: {prune_stale(out_dir, manifest)}")
+    print(f"📦 Манифест: {out_dir / MANIFEST_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Потоковое чтение JSON файлов с уроками.
+
+Глава (`{"chapter_id": ..., "lessons": [...]}`) читается кусками: каждый урок
+из массива `lessons` разбирается и отдаётся сразу, не дожидаясь конца файла.
+В памяти держится только текущий урок, поэтому размер главы не важен.
+Исключение — глава, где `lessons` стоит раньше `chapter_id`/`id`: тогда уроки
+копятся до конца объекта, чтобы каждый получил id главы.
+
+Поддерживаются три формата файла контента:
+  * глава с массивом `lessons`;
+  * одиночный урок (объект без `lessons`);
+  * просто список контента `[{}, {}]`.
+"""
+import json
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+# Поля главы, без которых урок нельзя привязать к модулю
+CHAPTER_ID_KEYS = ("chapter_id", "id")
+
+
+class ChapterStream:
+    """
+    Итератор по урокам JSON файла.
+
+    `kind` становится известен после первого урока: "chapter", "lesson" или "list".
+    `meta` содержит верхнеуровневые поля главы (chapter_id, title, ...),
+    прочитанные к текущему моменту; chapter_id/id, если они есть в файле,
+    известны уже к первому уроку.
+    """
+
+    def __init__(self, content_path: Path, chunk_size: int = CHUNK_SIZE):
+        self.path = Path(content_path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Content file not found: {self.path}")
+        self.chunk_size = chunk_size
+        self.kind = None
+        self.meta = {}
+        self._handle = None
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    # --- чтение буфера ---
+
+    def _fill(self) -> bool:
+        """Дочитывает следующий кусок файла. False — если файл закончился."""
+        if self._eof:
+            return False
+        chunk = self._handle.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Отбрасываем уже разобранную часть, чтобы буфер не рос
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Возвращает следующий непробельный символ (не сдвигая позицию)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buf, self._pos)
+        self._pos += 1
+
+    def _value(self):
+        """Разбирает одно JSON значение целиком, дочитывая файл по мере нужды."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Число в самом конце буфера может быть обрезано — дочитываем
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    # --- разбор структуры ---
+
+    def _iter_lessons_array(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            sep = self._peek()
+            self._pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise json.JSONDecodeError("Expecting ',' in lessons", self._buf, self._pos - 1)
+
+    def _iter_object(self):
+        self._expect("{")
+        pending = []
+        if self._peek() == "}":
+            self._pos += 1
+        else:
+            while True:
+                key = self._value()
+                self._expect(":")
+                if key == "lessons" and self._peek() == "[":
+                    self.kind = "chapter"
+                    if any(k in self.meta for k in CHAPTER_ID_KEYS):
+                        yield from self._iter_lessons_array()
+                    else:
+                        # id главы может идти после уроков — отдаём их, когда объект закроется
+                        pending.extend(self._iter_lessons_array())
+                else:
+                    self.meta[key] = self._value()
+                sep = self._peek()
+                self._pos += 1
+                if sep == "}":
+                    break
+                if sep != ",":
+                    raise json.JSONDecodeError("Expecting ',' in object", self._buf, self._pos - 1)
+
+        yield from pending
+        if self.kind is None:
+            # В файле один урок: его поля и есть meta
+            self.kind = "lesson"
+            lesson, self.meta = self.meta, {}
+            yield lesson
+
+    def __iter__(self):
+        with self.path.open("r", encoding="utf-8") as self._handle:
+            first = self._peek()
+            if first == "{":
+                yield from self._iter_object()
+            elif first == "[":
+                self.kind = "list"
+                yield {"content": self._value()}
+            else:
+                raise json.JSONDecodeError("Expecting JSON object or array", self._buf, self._pos)
+
+            if self._peek():
+                raise json.JSONDecodeError("Extra data", self._buf, self._pos)
+
+
+def iter_lessons(content_path: Path):
+    """Короткая форма: `for lesson in iter_lessons(path)`."""
+    return iter(ChapterStream(content_path))
@@ -1,58 +1,77 @@
-import os
-import sys
 import re
 import asyncio
 import hashlib
+import json
 import time
-from supabase import create_client, Client
-from dotenv import load_dotenv
-import edge_tts
 from pathlib import Path
 
-# --- КОНФИГУРАЦИЯ ---
-env_path = Path('.') / '.env'
-load_dotenv(dotenv_path=env_path)
-
-url = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
-key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-if not key:
-    key = os.getenv("SUPABASE_KEY") or os.getenv("VITE_SUPABASE_ANON_KEY")
+from lesson_assets import LessonAssets
+from lesson_documents import build_lesson_document
+from rate_control import TTS_LIMITER, execute_with_retry
+from run_metrics import METRICS, describe_query, payload_bytes, result_rows
+from seed_journal import content_hash
+from storage import connect, set_client, shared_client
+from tracing import TRACER
+from transport import communicate
+from word_assets import WORD_ASSET_FIELDS, resolve_item_data, resolve_items, word_key
 
+# --- КОНФИГУРАЦИЯ ---
 VOICE = "km-KH-PisethNeural"
 SPEED = "-10%"
 KHMER_PATTERN = re.compile(r"[\u1780-\u17FF]")
 
 AUDIO_DIR = Path(__file__).resolve().parent.parent / "khmer-mastery" / "public" / "sounds"
-AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
 # НЕ генерим такие префиксы (у тебя уже есть готовые ассеты)
 SKIP_AUDIO_PREFIXES = ("letter_",)
 
-if not url or not key:
-    print(f"❌ ОШИБКА: Нет ключей Supabase в {env_path.absolute()}")
-    sys.exit(1)
+# Клиент БД общий для процесса и создаётся при первом запросе (см. storage.get_client):
+# импорт модуля не читает .env, не ходит в сеть и не падает без ключей.
+# CONTENT_STORAGE=sqlite[:path] — локальная БД вместо Supabase.
+supabase = shared_client
 
-supabase: Client = create_client(url, key)
+
+def use_storage(spec):
+    """Переключает движок на другое хранилище ("supabase", "sqlite[:path]"), возвращает клиент."""
+    return set_client(connect(spec))
 
 
 # --- ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ---
 
 def db_execute_retry(query, retries=5, delay=2):
-    """Выполняет запрос с повторными попытками (спасает от 502 error)"""
-    last_error = None
-    for attempt in range(retries):
+    """
+    Выполняет запрос с повторными попытками (спасает от 502 error).
+    Темп запросов общий для всех скриптов: см. rate_control.DB_LIMITER.
+    Каждый запрос учитывается в run_metrics.METRICS (таблица, операция, время, повторы)
+    и, если трасса включена, пишется спаном tracing.TRACER.
+    """
+    table, verb = describe_query(query)
+    with TRACER.span(f"db.{table}.{verb}", table=table, operation=verb) as span:
+        retried = []
+
+        def on_retry(attempt, error):
+            METRICS.retry(table, verb, attempt, error)
+            span.event("retry", attempt=attempt, error=str(error)[:200])
+            retried.append(attempt)
+
+        started = time.perf_counter()
+        ok, result = False, None
         try:
-            return query.execute()
-        except Exception as e:
-            last_error = e
-            err_str = str(e)
-            if "Network" in err_str or "502" in err_str or "500" in err_str or "connection" in err_str.lower():
-                print(f"   ⚠️ DB Network error (попытка {attempt + 1}/{retries}), ждем {delay} сек...")
-                time.sleep(delay)
-            else:
-                raise e
-    print(f"❌ Не удалось выполнить запрос после {retries} попыток.")
-    raise last_error
+            result = execute_with_retry(query, retries, delay, on_retry=on_retry)
+            ok = True
+            return result
+        finally:
+            sent = payload_bytes(query)
+            METRICS.request(table, verb, time.perf_counter() - started, ok, sent)
+            span.set(ok=ok, rows=result_rows(query, result), bytes=sent, retries=len(retried))
+
+
+async def db_execute_async(query, retries=5, delay=2):
+    """
+    db_execute_retry в отдельном потоке: клиент Supabase синхронный,
+    а так несколько уроков могут ждать ответа БД одновременно.
+    """
+    return await asyncio.to_thread(db_execute_retry, query, retries, delay)
 
 
 def ensure_mp3(name: str) -> str:
@@ -83,6 +102,47 @@ def get_safe_audio_name(khmer_text, english_label=None, item_type="word"):
     return f"{safe_label}_{w_hash}.mp3"
 
 
+# Поля, из которых берётся "главный" текст item-а для его стабильного ключа
+ITEM_IDENTITY_FIELDS = {
+    "vocab_card": ("back", "front"),
+    "quiz": ("correct_answer", "question"),
+    "visual_decoder": ("word",),
+}
+DEFAULT_IDENTITY_FIELDS = ("khmer", "word", "char", "text", "title", "question")
+
+
+def get_item_identity(item_type, data):
+    """Главный текст item-а: первый кхмерский из полей типа, иначе первый непустой."""
+    data = data if isinstance(data, dict) else {}
+    if item_type == "comparison_audio":
+        texts = [(p.get(side) or {}).get("text") or ""
+                 for p in data.get("pairs") or [] if isinstance(p, dict) for side in ("left", "right")]
+        return "|".join(texts)
+    candidates = [str(data.get(f) or "").strip()
+                  for f in ITEM_IDENTITY_FIELDS.get(item_type, DEFAULT_IDENTITY_FIELDS)]
+    candidates = [c for c in candidates if c]
+    for c in candidates:
+        if KHMER_PATTERN.search(c):
+            return c
+    return candidates[0] if candidates else ""
+
+
+def assign_item_keys(lesson_id, items):
+    """
+    Детерминированные ключи lesson_items: lesson_id + тип + главный кхмерский текст.
+    Повторы одного и того же текста в уроке различаются порядковым номером.
+    """
+    seen = {}
+    keys = []
+    for item in items:
+        identity = (item.get("type"), get_item_identity(item.get("type"), item.get("data")))
+        occurrence = seen.get(identity, 0)
+        seen[identity] = occurrence + 1
+        digest = hashlib.sha1(f"{identity[0]}|{identity[1]}|{occurrence}".encode()).hexdigest()[:16]
+        keys.append(f"{lesson_id}-{digest}")
+    return keys
+
+
 def get_item_type(khmer_text, english_text):
     clean = khmer_text.split(' (')[0].strip()
     if '?' in clean or clean.count(' ') >= 2:
@@ -92,211 +152,492 @@ def get_item_type(khmer_text, english_text):
     return 'word'
 
 
-async def generate_audio(text, filename):
+async def db_write(query, journal, *key_parts):
+    """
+    Запись в БД через журнал: если такая же запись (по хэшу key_parts)
+    уже отмечена как выполненная — пропускаем её.
+    """
+    if journal is None:
+        return await db_execute_async(query)
+    key = content_hash(*key_parts)
+    if journal.done("db", key):
+        return None
+    result = await db_execute_async(query)
+    journal.record("db", key)
+    return result
+
+
+# Локальное зеркало dictionary (dictionary_mirror.DictionaryMirror): если задано,
+# поиск слов идёт без сети, а новые слова пишутся и в Supabase, и в зеркало
+_dictionary_mirror = None
+
+
+def use_dictionary_mirror(mirror):
+    global _dictionary_mirror
+    _dictionary_mirror = mirror
+
+
+async def lookup_dictionary(khmer, journal=None):
+    """Ищет слово в dictionary. С журналом результат запоминается между запусками."""
+    if _dictionary_mirror is not None:
+        return _dictionary_mirror.get(khmer)
+    if journal is not None and journal.done("lookup", khmer):
+        return journal.get("lookup", khmer) or {}
+    dict_res = await db_execute_async(
+        supabase.table("dictionary").select("pronunciation", "english", "item_type").eq("khmer", khmer))
+    entry = dict_res.data[0] if dict_res.data else {}
+    if journal is not None:
+        journal.record("lookup", khmer, entry)
+    return entry
+
+
+# Аудио, которые сейчас генерируются: одинаковые файлы из параллельных уроков ждут одну задачу
+_audio_in_flight = {}
+
+
+async def generate_audio(text, filename, journal=None):
     """Генерирует аудиофайл с помощью TTS"""
     filename = ensure_mp3(filename)
+    pending = _audio_in_flight.get(filename)
+    if pending is None:
+        pending = asyncio.ensure_future(_generate_audio(text, filename, journal))
+        _audio_in_flight[filename] = pending
+        pending.add_done_callback(lambda _: _audio_in_flight.pop(filename, None))
+    await asyncio.shield(pending)
+
+
+async def _generate_audio(text, filename, journal):
+    with TRACER.span("tts", file=filename, voice=VOICE, rate=SPEED, text_length=len(text)) as span:
+        span.set(outcome=await _synthesize(text, filename, journal, span))
+
+
+def audio_job_key(text, filename) -> str:
+    """Ключ задачи озвучки в журнале: меняется вместе с текстом, голосом и скоростью."""
+    return content_hash(VOICE, SPEED, text, filename)
+
+
+def tts_text(text) -> str:
+    """Текст, который реально уходит в TTS (без пояснений в скобках и '?')."""
+    return text.split(' (')[0].replace('?', '').strip()
+
+
+async def _synthesize(text, filename, journal, span):
+    """Озвучивает text в filename, если файла ещё нет. Возвращает итог для метрик и трассы."""
     filepath = AUDIO_DIR / filename
+    job_key = audio_job_key(text, filename) if journal is not None else None
 
+    # Сначала файл, а не журнал: stat дешевле любой озвучки, а запись в журнале без файла
+    # (mp3 удалили или журнал с другой машины) не должна оставлять урок без аудио
     if filepath.exists():
-        return
+        METRICS.tts_job("skipped", filename)
+        if journal is not None and not journal.done("audio", job_key):
+            journal.record("audio", job_key)
+        return "skipped"
 
-    clean_text = text.split(' (')[0].replace('?', '').strip()
+    clean_text = tts_text(text)
     if not clean_text:
-        return
+        return "empty"
 
     try:
-        await edge_tts.Communicate(clean_text, VOICE, rate=SPEED).save(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        queued = time.perf_counter()
+        async with TTS_LIMITER.async_slot():
+            span.set(queue_ms=round((time.perf_counter() - queued) * 1000, 1))
+            started = time.perf_counter()
+            await communicate(clean_text, VOICE, rate=SPEED).save(filepath)
         print(f"   ✅ Audio created: {filename}")
+        size = filepath.stat().st_size
+        METRICS.tts_job("generated", filename, size, time.perf_counter() - started)
+        span.set(bytes=size)
+        if journal is not None:
+            journal.record("audio", job_key)
+        return "generated"
     except Exception as e:
         print(f"   ⚠️ TTS Error for {filename}: {e}")
+        METRICS.tts_job("failed", filename)
+        span.set(error=str(e)[:200])
         if filepath.exists():
             filepath.unlink()
+        return "failed"
 
 
 # --- ОСНОВНЫЕ ФУНКЦИИ ---
 
-async def seed_lesson(lesson_id, title, desc, content_list, module_id=None, order_index=0):
-    """Загружает урок в БД с генерацией озвучки"""
+async def seed_lesson(lesson_id, title, desc, content_list, module_id=None, order_index=0, journal=None, io=None):
+    """
+    Загружает урок в БД с генерацией озвучки.
+    journal (SeedJournal) — если передан, уже выполненные шаги пропускаются.
+    io (SeedIO) — своя реализация словаря/озвучки (по умолчанию Supabase + edge-tts).
+    """
     print(f"\n🚀 Processing Lesson {lesson_id}: {title}...")
 
-    # 1. UPSERT УРОКА
-    db_execute_retry(supabase.table("lessons").upsert({
-        "id": lesson_id,
-        "title": title,
-        "description": desc,
-        "module_id": module_id,
-        "order_index": order_index
-    }, on_conflict="id"))
-
-    # 2. ЧИСТИМ СТАРЫЕ ДАННЫЕ (включая SRS)
-    existing = db_execute_retry(supabase.table("lesson_items").select("id").eq("lesson_id", lesson_id))
-    ids = [i['id'] for i in existing.data]
-    if ids:
-        for table in ["user_srs", "user_srs_items"]:
-            try:
-                db_execute_retry(supabase.table(table).delete().in_("item_id", ids))
-            except:
-                pass
-        db_execute_retry(supabase.table("lesson_items").delete().eq("lesson_id", lesson_id))
-        print(f"   🗑️  Cleaned {len(ids)} old items")
-
-    # 3. ОБРАБАТЫВАЕМ КОНТЕНТ
+    # Версия урока: при изменении контента записи в lesson_items выполнятся заново
+    version = content_hash(lesson_id, title, desc, module_id, order_index, content_list) if journal else None
+
+    with METRICS.lesson(lesson_id):
+        # 1. UPSERT УРОКА
+        lesson_row = {
+            "id": lesson_id,
+            "title": title,
+            "description": desc,
+            "module_id": module_id,
+            "order_index": order_index
+        }
+        with METRICS.phase("lesson"):
+            # Как word_assets и lesson_items: неизменённую строку урока не переписываем
+            stored = await db_execute_async(supabase.table("lessons").select(*lesson_row).eq("id", lesson_id))
+            if not stored.data or any(stored.data[0].get(k) != v for k, v in lesson_row.items()):
+                await db_write(supabase.table("lessons").upsert(lesson_row, on_conflict="id"),
+                               journal, "lessons", "upsert", lesson_row)
+
+        # 2-3. ОБРАБАТЫВАЕМ КОНТЕНТ (словарь + озвучка + список ассетов для prefetch)
+        io = io or SeedIO(journal)
+        assets = LessonAssets(AUDIO_DIR)
+        with METRICS.phase("items"):
+            item_rows = await prepare_lesson_items(lesson_id, content_list, io, assets)
+
+        # 4. ОБЩАЯ ТАБЛИЦА СЛОВ (аудио + транскрипции вариантов квизов)
+        with METRICS.phase("word_assets"):
+            await sync_word_assets(io.words, journal)
+
+        # 5. СИНХРОНИЗИРУЕМ lesson_items: пишем только изменённые, удаляем только исчезнувшие
+        with METRICS.phase("lesson_items"):
+            item_rows = await sync_lesson_items(lesson_id, item_rows, journal, version)
+
+        # 6. ПРЕДСОБРАННЫЙ ДОКУМЕНТ УРОКА (один запрос на открытие урока в приложении)
+        with METRICS.phase("document"):
+            document = build_lesson_document(lesson_row, resolve_items(item_rows, io.words), assets.to_list())
+            await write_lesson_document(document, journal)
+
+
+class SeedIO:
+    """
+    Внешние операции обхода item-ов: словарь, озвучка, запись слов в dictionary.
+    Эта реализация ходит в Supabase и edge-tts; офлайн-инструменты подменяют её своей.
+    """
+
+    def __init__(self, journal=None):
+        self.journal = journal
+        # Слова для word_assets, на которые сослались квизы: ключ -> {audio, pronunciation}
+        self.words = {}
+
+    async def lookup(self, khmer):
+        return await lookup_dictionary(khmer, self.journal)
+
+    async def audio(self, text, filename):
+        await generate_audio(text, filename, self.journal)
+
+    async def save_word(self, dict_row, entry):
+        # Пишем в словарь только если запись действительно изменилась
+        if all(entry.get(k) == dict_row[k] for k in ("english", "pronunciation", "item_type")):
+            return
+        await db_write(supabase.table("dictionary").upsert(dict_row, on_conflict="khmer"),
+                       self.journal, "dictionary", "upsert", dict_row)
+        if _dictionary_mirror is not None:
+            _dictionary_mirror.upsert([dict_row])
+        if self.journal is not None:
+            # Следующие поиски этого слова должны видеть свежую запись
+            self.journal.record("lookup", dict_row["khmer"],
+                                {k: dict_row[k] for k in ("english", "pronunciation", "item_type")})
+
+    def register_word(self, key, audio, pronunciation):
+        self.words[key] = {"audio": audio, "pronunciation": pronunciation}
+
+
+async def prepare_lesson_items(lesson_id, content_list, io, assets=None):
+    """
+    Обходит item-ы урока: нормализует имена аудио, подтягивает транскрипции,
+    ставит задачи озвучки через io. Возвращает строки для lesson_items.
+    assets (LessonAssets) — если передан, в него же собираются ассеты каждого экрана.
+    """
+    # Стабильные ключи считаем по исходному контенту, до обработки
+    item_keys = assign_item_keys(lesson_id, content_list)
+    item_rows = []
+
     for idx, item in enumerate(content_list):
-        # ═══════════════════════════════════════════════════════════════
-        # УНИВЕРСАЛЬНЫЙ ОБРАБОТЧИК НОВЫХ ТИПОВ
-        # ═══════════════════════════════════════════════════════════════
-        new_types = ['theory', 'rule', 'reading-algorithm', 'intro', 'analysis', 'meet-teams', 'ready', 'title',
-                     'learn_char', 'word_breakdown', 'introduce_group']
-        if item['type'] in new_types:
-            data = item.get('data', {}) or {}
-            # Ищем кхмерский текст в разных полях
-            khmer_text = data.get("khmer") or data.get("text") or data.get("word") or data.get("char") or ""
-            audio_key = (data.get("audio") or "").strip()
-
-            if audio_key and khmer_text:
-                if not audio_key.startswith(SKIP_AUDIO_PREFIXES):
-                    audio_key = ensure_mp3(audio_key)
-                    data["audio"] = audio_key
-
-                if not should_skip_generation(audio_key):
-                    await generate_audio(str(khmer_text), audio_key)
-
-            # === PATCH: examples khmer audio ===
-            examples = data.get("examples", []) or []
-            for ex in examples:
-                if not isinstance(ex, dict):
-                    continue
-                if ex.get("kind") != "khmer":
-                    continue
-
-                txt = (ex.get("text") or "").strip()
-                aud = (ex.get("audio") or "").strip()
-
-                if not txt or not aud:
-                    continue
-
-                if not aud.startswith(SKIP_AUDIO_PREFIXES):
-                    aud = ensure_mp3(aud)
-                    ex["audio"] = aud
-
-                if not should_skip_generation(aud):
-                    await generate_audio(txt, aud)
-            # === /PATCH ===
-
-            item["data"] = data
-
-
-        # ═══════════════════════════════════════════════════════════════
-        # QUIZ
-        # ═══════════════════════════════════════════════════════════════
-        elif item['type'] == 'quiz':
-            options = item['data'].get('options', [])
-            pron_map = item['data'].get('pronunciation_map', {})
-            item['data']['options_metadata'] = {}
-
-            for opt in options:
-                clean_opt = opt.split(' (')[0].replace('?', '').strip()
-                dict_res = db_execute_retry(
-                    supabase.table("dictionary").select("pronunciation", "english").eq("khmer", clean_opt))
-                entry = dict_res.data[0] if dict_res.data else {}
-
-                eng = entry.get("english", "option")
-                pron = pron_map.get(clean_opt, "") or entry.get("pronunciation", "")
-
-                audio_name = get_safe_audio_name(clean_opt, eng, "option")
-                await generate_audio(clean_opt, audio_name)
-
-                item['data']['options_metadata'][opt] = {
-                    "audio": audio_name,
-                    "pronunciation": pron
-                }
-
-        # ═══════════════════════════════════════════════════════════════
-        # VOCAB CARD
-        # ═══════════════════════════════════════════════════════════════
-        elif item['type'] == 'vocab_card':
-            data = item.get('data', {})
-            front = data.get('front', '') or ""
-            back = data.get('back', '') or ""
-            if back:
-                clean_k = back.split(' (')[0].replace('?', '').strip()
-                dict_res = db_execute_retry(
-                    supabase.table("dictionary").select("pronunciation", "english").eq("khmer", clean_k))
-                entry = dict_res.data[0] if dict_res.data else {}
-
-                final_pron = data.get("pronunciation", "") or entry.get("pronunciation", "")
-                english = entry.get("english", front)
-
-                audio_name = get_safe_audio_name(clean_k, front, data.get('item_type', 'word'))
-                await generate_audio(clean_k, audio_name)
-
-                item['data']['audio'] = audio_name
-                item['data']['pronunciation'] = final_pron
-
-                db_execute_retry(supabase.table("dictionary").upsert({
-                    "khmer": clean_k, "english": english, "pronunciation": final_pron,
-                    "item_type": get_item_type(clean_k, english)
-                }, on_conflict="khmer"))
-
-        # ═══════════════════════════════════════════════════════════════
-        # COMPARISON_AUDIO
-        # ═══════════════════════════════════════════════════════════════
-        elif item['type'] == 'comparison_audio':
-            data = item.get('data', {}) or {}
-            pairs = data.get('pairs', []) or []
-            for p in pairs:
-                for side in ["left", "right"]:
-                    node = p.get(side, {})
-                    txt = (node.get("text") or "").strip()
-                    aud = (node.get("audio") or "").strip()
-                    if aud:
-                        if not aud.startswith(SKIP_AUDIO_PREFIXES):
-                            aud = ensure_mp3(aud)
-                            node["audio"] = aud
-                        if txt and not should_skip_generation(aud):
-                            await generate_audio(txt, aud)
-            item["data"] = data
-
-        # 4. ВСТАВЛЯЕМ ITEM В БД
-        db_execute_retry(supabase.table("lesson_items").insert({
-            "lesson_id": lesson_id,
-            "type": item['type'],
-            "order_index": idx,
-            "data": item['data']
-        }))
+        with TRACER.span(f"item.{item['type']}", index=idx, item_key=item_keys[idx]):
+            # ═══════════════════════════════════════════════════════════════
+            # УНИВЕРСАЛЬНЫЙ ОБРАБОТЧИК НОВЫХ ТИПОВ
+            # ═══════════════════════════════════════════════════════════════
+            new_types = ['theory', 'rule', 'reading-algorithm', 'intro', 'analysis', 'meet-teams', 'ready', 'title',
+                         'learn_char', 'word_breakdown', 'introduce_group']
+            if item['type'] in new_types:
+                data = item.get('data', {}) or {}
+                # Ищем кхмерский текст в разных полях
+                khmer_text = data.get("khmer") or data.get("text") or data.get("word") or data.get("char") or ""
+                audio_key = (data.get("audio") or "").strip()
+
+                if audio_key and khmer_text:
+                    if not audio_key.startswith(SKIP_AUDIO_PREFIXES):
+                        audio_key = ensure_mp3(audio_key)
+                        data["audio"] = audio_key
+
+                    if not should_skip_generation(audio_key):
+                        await io.audio(str(khmer_text), audio_key)
+
+                # === PATCH: examples khmer audio ===
+                examples = data.get("examples", []) or []
+                for ex in examples:
+                    if not isinstance(ex, dict):
+                        continue
+                    if ex.get("kind") != "khmer":
+                        continue
+
+                    txt = (ex.get("text") or "").strip()
+                    aud = (ex.get("audio") or "").strip()
+
+                    if not txt or not aud:
+                        continue
+
+                    if not aud.startswith(SKIP_AUDIO_PREFIXES):
+                        aud = ensure_mp3(aud)
+                        ex["audio"] = aud
+
+                    if not should_skip_generation(aud):
+                        await io.audio(txt, aud)
+                # === /PATCH ===
+
+                item["data"] = data
+
+
+            # ═══════════════════════════════════════════════════════════════
+            # QUIZ
+            # ═══════════════════════════════════════════════════════════════
+            elif item['type'] == 'quiz':
+                options = item['data'].get('options', [])
+                # Вместо копии {audio, pronunciation} в каждом квизе — ссылка на общую запись word_assets
+                item['data'].pop('options_metadata', None)
+                item['data']['option_words'] = {}
+
+                for opt in options:
+                    clean_opt = word_key(opt)
+                    entry = await io.lookup(clean_opt)
+
+                    eng = entry.get("english", "option")
+                    audio_name = get_safe_audio_name(clean_opt, eng, "option")
+                    await io.audio(clean_opt, audio_name)
+
+                    # pronunciation_map квиза подставляется поверх общей транскрипции при экспорте
+                    io.register_word(clean_opt, audio_name, entry.get("pronunciation", ""))
+                    item['data']['option_words'][opt] = clean_opt
+
+            # ═══════════════════════════════════════════════════════════════
+            # VOCAB CARD
+            # ═══════════════════════════════════════════════════════════════
+            elif item['type'] == 'vocab_card':
+                data = item.get('data', {})
+                front = data.get('front', '') or ""
+                back = data.get('back', '') or ""
+                if back:
+                    clean_k = back.split(' (')[0].replace('?', '').strip()
+                    entry = await io.lookup(clean_k)
+
+                    final_pron = data.get("pronunciation", "") or entry.get("pronunciation", "")
+                    english = entry.get("english", front)
+
+                    audio_name = get_safe_audio_name(clean_k, front, data.get('item_type', 'word'))
+                    await io.audio(clean_k, audio_name)
+
+                    item['data']['audio'] = audio_name
+                    item['data']['pronunciation'] = final_pron
+
+                    dict_row = {
+                        "khmer": clean_k, "english": english, "pronunciation": final_pron,
+                        "item_type": get_item_type(clean_k, english)
+                    }
+                    await io.save_word(dict_row, entry)
+
+            # ═══════════════════════════════════════════════════════════════
+            # COMPARISON_AUDIO
+            # ═══════════════════════════════════════════════════════════════
+            elif item['type'] == 'comparison_audio':
+                data = item.get('data', {}) or {}
+                pairs = data.get('pairs', []) or []
+                for p in pairs:
+                    for side in ["left", "right"]:
+                        node = p.get(side, {})
+                        txt = (node.get("text") or "").strip()
+                        aud = (node.get("audio") or "").strip()
+                        if aud:
+                            if not aud.startswith(SKIP_AUDIO_PREFIXES):
+                                aud = ensure_mp3(aud)
+                                node["audio"] = aud
+                            if txt and not should_skip_generation(aud):
+                                await io.audio(txt, aud)
+                item["data"] = data
+
+            if assets is not None:
+                assets.add_item(idx, item['type'], resolve_item_data(item['type'], item['data'], io.words))
+
+            item_rows.append({
+                "lesson_id": lesson_id,
+                "item_key": item_keys[idx],
+                "type": item['type'],
+                "order_index": idx,
+                "data": item['data']
+            })
+
+    return item_rows
+
+
+def _legacy_item_keys(lesson_id, existing_rows):
+    """Ключи для строк, записанных до появления item_key (считаются так же, по данным строки)."""
+    ordered = sorted(existing_rows, key=lambda r: r.get("order_index") or 0)
+    return dict(zip((r["id"] for r in ordered), assign_item_keys(lesson_id, ordered)))
+
+
+def _same_json(a, b):
+    return json.dumps(a, sort_keys=True, ensure_ascii=False) == json.dumps(b, sort_keys=True, ensure_ascii=False)
+
+
+def delete_item_progress(item_ids):
+    """Удаляет user_srs/user_srs_items по строкам lesson_items, которые сейчас будут удалены."""
+    for table in ["user_srs", "user_srs_items"]:
+        try:
+            db_execute_retry(supabase.table(table).delete().in_("item_id", item_ids))
+        except:
+            pass
+
+
+async def sync_lesson_items(lesson_id, item_rows, journal=None, version=None):
+    """
+    Приводит lesson_items урока к item_rows по item_key.
+    id существующих строк сохраняются, поэтому user_srs/user_srs_items переживают пересидинг.
+    Возвращает item_rows с проставленными id.
+    """
+    existing = await db_execute_async(
+        supabase.table("lesson_items").select("id", "item_key", "type", "order_index", "data").eq("lesson_id", lesson_id))
+    existing_rows = existing.data or []
+    legacy_keys = _legacy_item_keys(lesson_id, [r for r in existing_rows if not r.get("item_key")])
+    by_key = {}
+    duplicates = []
+    for row in existing_rows:
+        key = row.get("item_key") or legacy_keys[row["id"]]
+        if key in by_key:
+            duplicates.append(row["id"])
+        else:
+            by_key[key] = row
+
+    updates, inserts = [], []
+    ids = {}
+    for row in item_rows:
+        old = by_key.pop(row["item_key"], None)
+        if old is None:
+            inserts.append(row)
+            continue
+        ids[row["item_key"]] = old["id"]
+        if (old.get("item_key") != row["item_key"] or old.get("type") != row["type"]
+              or old.get("order_index") != row["order_index"] or not _same_json(old.get("data"), row["data"])):
+            updates.append({"id": old["id"], **row})
+    removed_ids = [r["id"] for r in by_key.values()] + duplicates
+
+    if updates:
+        await db_write(supabase.table("lesson_items").upsert(updates, on_conflict="id"),
+                       journal, "lesson_items", "update", version, updates)
+    if inserts:
+        res = await db_write(supabase.table("lesson_items").insert(inserts),
+                             journal, "lesson_items", "insert", version, inserts)
+        ids.update({r["item_key"]: r["id"] for r in (res.data if res else [])})
+    if removed_ids:
+        await asyncio.to_thread(delete_item_progress, removed_ids)
+        await db_write(supabase.table("lesson_items").delete().in_("id", removed_ids),
+                       journal, "lesson_items", "delete", version, removed_ids)
+
+    unchanged = len(item_rows) - len(updates) - len(inserts)
+    print(f"   💾 Items: +{len(inserts)} ~{len(updates)} -{len(removed_ids)} (без изменений: {unchanged})")
+
+    if len(ids) < len(item_rows):
+        # Вставка пропущена по журналу — id новых строк берём из БД
+        res = await db_execute_async(supabase.table("lesson_items").select("id", "item_key").eq("lesson_id", lesson_id))
+        ids.update({r["item_key"]: r["id"] for r in res.data})
+    return [{"id": ids.get(row["item_key"]), **row} for row in item_rows]
+
+
+async def sync_word_assets(words, journal=None):
+    """Записывает в word_assets изменившиеся слова — одним upsert на урок."""
+    if not words:
+        return
+    res = await db_execute_async(supabase.table("word_assets").select("khmer", *WORD_ASSET_FIELDS)
+                                 .in_("khmer", sorted(words)))
+    stored = {r["khmer"]: r for r in res.data or []}
+    rows = [{"khmer": key, **word} for key, word in sorted(words.items())
+            if any((stored.get(key) or {}).get(f) != word[f] for f in WORD_ASSET_FIELDS)]
+    if rows:
+        await db_write(supabase.table("word_assets").upsert(rows, on_conflict="khmer"),
+                       journal, "word_assets", "upsert", rows)
+        print(f"   🔤 Word assets: {len(rows)} обновлено")
+
+
+async def write_lesson_document(document, journal=None):
+    """Пишет lesson_documents, если версия документа изменилась."""
+    lesson_id = document["lesson"]["id"]
+    stored = await db_execute_async(supabase.table("lesson_documents").select("version").eq("lesson_id", lesson_id))
+    if stored.data and stored.data[0].get("version") == document["version"]:
+        return
+    row = {"lesson_id": lesson_id, "version": document["version"], "document": document}
+    await db_write(supabase.table("lesson_documents").upsert(row, on_conflict="lesson_id"),
+                   journal, "lesson_documents", "upsert", lesson_id, document["version"])
+    print(f"   📦 Lesson document v{document['version'][:8]} ({len(document['items'])} items)")
 
 
-async def update_study_materials(module_id, lessons_data):
-    """Обновляет саммари и Guidebook (Урок с ID = module_id)"""
-    print(f"\n📚 Updating Summary & Guidebook for Module {module_id}...")
-    summary_text = f"# Chapter Summary\n\n"
+# Меняется при изменении формата сводки/Guidebook — чтобы пересобрать все модули
+STUDY_MATERIALS_SCHEMA = 1
+
+
+def build_study_materials(module_id, lessons_data):
+    """Текст сводки и item-ы Guidebook модуля (без обращений к БД)."""
+    summary_lines = ["# Chapter Summary", ""]
     aggregated_items = []
     seen_words = set()
 
     for lesson_id, info in sorted(lessons_data.items()):
         if "Final Quiz" in info.get('title', ''): continue
-        summary_text += f"## {info.get('title', f'Lesson {lesson_id}')}\n"
+        summary_lines.append(f"## {info.get('title', f'Lesson {lesson_id}')}")
         for item in info.get('content', []):
             if item['type'] == 'theory':
-                summary_text += f"* 💡 **{item['data'].get('title', 'Note')}**: {item['data'].get('text', '')}\n"
+                summary_lines.append(f"* 💡 **{item['data'].get('title', 'Note')}**: {item['data'].get('text', '')}")
                 aggregated_items.append(item)
             if item['type'] == 'vocab_card':
                 khmer, eng = item['data'].get('back', ''), item['data'].get('front', '')
                 if khmer and eng:
-                    summary_text += f"* **{khmer}** — {eng}\n"
+                    summary_lines.append(f"* **{khmer}** — {eng}")
                     if khmer not in seen_words:
                         seen_words.add(khmer)
                         aggregated_items.append(item)
 
-    db_execute_retry(supabase.table("study_materials").upsert({
-        "chapter_id": module_id, "title": f"Summary: Module {module_id}",
-        "content": summary_text, "type": "summary"
-    }, on_conflict="chapter_id"))
-
-    # Очистка и перезаливка Guidebook (Lesson ID = module_id)
-    db_execute_retry(supabase.table("lesson_items").delete().eq("lesson_id", module_id))
-    for idx, item in enumerate(aggregated_items):
-        db_execute_retry(supabase.table("lesson_items").insert({
-            "lesson_id": module_id, "type": item['type'], "order_index": idx, "data": item['data']
-        }))
-    print(f"✅ Guidebook and Summary updated!")
\ No newline at end of file
+    summary_text = "\n".join(summary_lines) + "\n"
+    item_keys = assign_item_keys(module_id, aggregated_items)
+    item_rows = [
+        {"lesson_id": module_id, "item_key": item_keys[idx], "type": item['type'], "order_index": idx,
+         "data": item['data']}
+        for idx, item in enumerate(aggregated_items)
+    ]
+    return summary_text, item_rows
+
+
+async def update_study_materials(module_id, lessons_data):
+    """
+    Обновляет саммари и Guidebook (Урок с ID = module_id).
+    Хэш модуля хранится в study_materials.content_hash: если он не изменился, модуль пропускается.
+    """
+    with METRICS.phase("study_materials"):
+        summary_text, item_rows = build_study_materials(module_id, lessons_data)
+        module_hash = content_hash(STUDY_MATERIALS_SCHEMA, summary_text, item_rows)
+
+        stored = await db_execute_async(
+            supabase.table("study_materials").select("content_hash").eq("chapter_id", module_id))
+        if stored.data and stored.data[0].get("content_hash") == module_hash:
+            print(f"⏭️  Module {module_id}: Summary & Guidebook без изменений")
+            return False
+
+        print(f"\n📚 Updating Summary & Guidebook for Module {module_id}...")
+        # Guidebook: те же правила, что и для уроков — пишем только разницу, id строк сохраняются
+        await sync_lesson_items(module_id, item_rows)
+
+        # Хэш пишем последним: если Guidebook не записался, следующий запуск повторит модуль
+        await db_execute_async(supabase.table("study_materials").upsert({
+            "chapter_id": module_id, "title": f"Summary: Module {module_id}",
+            "content": summary_text, "type": "summary", "content_hash": module_hash
+        }, on_conflict="chapter_id"))
+        print(f"✅ Guidebook and Summary updated!")
+        return True
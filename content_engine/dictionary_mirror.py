@@ -0,0 +1,151 @@
+"""
+Локальное зеркало таблицы dictionary в SQLite.
+
+Первый sync забирает таблицу целиком постранично (keyset по khmer, без OFFSET),
+следующие — только строки с updated_at новее сохранённого watermark.
+Сидер читает слова из зеркала (ноль запросов на lookup) и пишет новые
+одновременно в Supabase и сюда; офлайн-инструменты (compile_bundles --offline)
+берут транскрипции из зеркала вообще без сети.
+
+Удаления delta-sync не видит: для полной сверки есть `--full`.
+
+Запуск:
+  python dictionary_mirror.py          # delta-sync (первый раз — полная загрузка)
+  python dictionary_mirror.py --full   # перекачать таблицу заново
+"""
+import argparse
+import sqlite3
+import threading
+from pathlib import Path
+
+from rate_control import execute_with_retry
+
+MIRROR_PATH = Path(__file__).resolve().parent / ".cache" / "dictionary.sqlite"
+FIELDS = ("english", "pronunciation", "item_type")
+PAGE_SIZE = 1000
+
+
+class DictionaryMirror:
+    def __init__(self, path: Path = None):
+        self.path = Path(path or MIRROR_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Читают из event loop, пишут и из потоков db_execute_async — соединение одно, под замком
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            create table if not exists dictionary (
+                khmer text primary key,
+                english text,
+                pronunciation text,
+                item_type text,
+                updated_at text
+            );
+            create table if not exists meta (key text primary key, value text);
+        """)
+
+    # --- чтение/запись ---
+
+    def get(self, khmer):
+        """Запись слова ({english, pronunciation, item_type}) или {} если его нет."""
+        with self._lock:
+            row = self._conn.execute(
+                "select english, pronunciation, item_type from dictionary where khmer = ?", (khmer,)).fetchone()
+        return dict(zip(FIELDS, row)) if row else {}
+
+    def upsert(self, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "insert into dictionary (khmer, english, pronunciation, item_type, updated_at) "
+                "values (:khmer, :english, :pronunciation, :item_type, :updated_at) "
+                "on conflict (khmer) do update set english = excluded.english, "
+                "pronunciation = excluded.pronunciation, item_type = excluded.item_type, "
+                "updated_at = coalesce(excluded.updated_at, dictionary.updated_at)",
+                [{"updated_at": None, **{f: row.get(f) for f in FIELDS}, **row} for row in rows])
+
+    def rows(self) -> list:
+        """Все слова зеркала (для экспорта)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "select khmer, english, pronunciation, item_type from dictionary order by khmer").fetchall()
+        return [dict(zip(("khmer", *FIELDS), row)) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("select count(*) from dictionary").fetchone()[0]
+
+    @property
+    def watermark(self):
+        with self._lock:
+            row = self._conn.execute("select value from meta where key = 'watermark'").fetchone()
+        return row[0] if row else None
+
+    def _set_watermark(self, value):
+        with self._lock, self._conn:
+            self._conn.execute("insert into meta (key, value) values ('watermark', ?) "
+                               "on conflict (key) do update set value = excluded.value", (value,))
+
+    def close(self):
+        self._conn.close()
+
+    # --- синхронизация с Supabase ---
+
+    def sync(self, supabase, full=False, page_size=PAGE_SIZE) -> int:
+        """Догружает изменения из Supabase. Возвращает число полученных строк."""
+        columns = ("khmer", *FIELDS, "updated_at")
+        watermark = None if full else self.watermark
+        if watermark is None:
+            with self._lock, self._conn:
+                self._conn.execute("delete from dictionary")
+
+        fetched = 0
+        newest = watermark
+        last_khmer, last_ts = None, watermark
+        while True:
+            query = supabase.table("dictionary").select(*columns)
+            if watermark is None:
+                # Полная загрузка: keyset по первичному ключу
+                query = query.order("khmer")
+                if last_khmer is not None:
+                    query = query.gt("khmer", last_khmer)
+            else:
+                # Дельта: keyset по (updated_at, khmer), чтобы не терять строки с одинаковым временем
+                query = query.order("updated_at").order("khmer")
+                if last_khmer is None:
+                    query = query.gt("updated_at", last_ts)
+                else:
+                    query = query.or_(f'updated_at.gt."{last_ts}",'
+                                      f'and(updated_at.eq."{last_ts}",khmer.gt."{last_khmer}")')
+            rows = execute_with_retry(query.limit(page_size)).data or []
+            if rows:
+                self.upsert(rows)
+                fetched += len(rows)
+                last_khmer, last_ts = rows[-1]["khmer"], rows[-1].get("updated_at") or last_ts
+                stamps = [r["updated_at"] for r in rows if r.get("updated_at")]
+                if stamps:
+                    newest = max([newest or "", *stamps])
+            if len(rows) < page_size:
+                break
+
+        if newest:
+            self._set_watermark(newest)
+        return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синхронизирует локальное зеркало dictionary.")
+    parser.add_argument("--full", action="store_true", help="Перекачать таблицу целиком")
+    parser.add_argument("--path", default=str(MIRROR_PATH), help="Файл SQLite зеркала")
+    args = parser.parse_args()
+
+    from storage import get_client
+
+    mirror = DictionaryMirror(args.path)
+    mode = "полная загрузка" if args.full or mirror.watermark is None else f"изменения после {mirror.watermark}"
+    print(f"📖 Зеркало dictionary: {mode}...")
+    fetched = mirror.sync(get_client(), full=args.full)
+    print(f"✅ Получено строк: {fetched}, в зеркале: {mirror.count()} ({mirror.path})")
+    mirror.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Экспорт всего курса одним пакетом для загрузки через PostgreSQL COPY.
+
+Вместо сотен REST-запросов seed_lesson на свежем окружении: курс один раз
+собирается в локальной SQLite (storage.SQLiteClient) теми же функциями, что
+и при обычном сидинге — sync_structure, seed_lesson, update_study_materials,
+реестр алфавита, — а затем каждая таблица выгружается в файл формата COPY.
+
+В папке экспорта:
+  <table>.tsv    — строки таблицы (текстовый формат COPY: TAB, \\N = null)
+  load.sql       — загрузчик: все \\copy в одной транзакции + сдвиг sequence-ов
+  staging.sqlite — промежуточная БД сборки (в загрузке не участвует)
+
+Модули есть не только в FULL_COURSE: главы из JSON (R1/R2, chapter_id 10000)
+получают строку modules и урок-Guidebook с id = chapter_id. Перед записью
+файлов внешние ключи (REFERENCES) проверяются — load.sql не должен упасть
+посреди транзакции.
+
+Загрузка (схема и миграции из sql/ уже применены):
+  cd <папка экспорта>
+  psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f load.sql
+
+Запуск:
+  python export_copy.py                        # все файлы из content_json
+  python export_copy.py --content-glob 'R*.json' --out /tmp/course_copy
+  python export_copy.py --truncate             # load.sql сначала очистит таблицы
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from alphabet_registry import COLUMNS as ALPHABET_COLUMNS, build as build_alphabet
+from content_stream import ChapterStream
+from dictionary_mirror import MIRROR_PATH, DictionaryMirror
+from storage import SQLiteClient, set_client
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUT_DIR = BASE_DIR / ".cache" / "copy_export"
+LOADER_NAME = "load.sql"
+
+# Таблицы в порядке загрузки (сначала те, на которые ссылаются) и выгружаемые колонки.
+# updated_at не выгружаем: его ставят default и триггеры (sql/006)
+EXPORT_TABLES = [
+    ("modules", ["id", "slug", "title", "level_label", "description", "is_paid", "order_index"]),
+    ("lessons", ["id", "slug", "module_id", "title", "description", "order_index"]),
+    ("lesson_items", ["id", "lesson_id", "item_key", "type", "order_index", "data"]),
+    ("dictionary", ["khmer", "english", "pronunciation", "item_type"]),
+    ("word_assets", ["khmer", "audio", "pronunciation"]),
+    ("alphabet", ALPHABET_COLUMNS),
+    ("study_materials", ["id", "chapter_id", "title", "content", "type", "content_hash"]),
+    ("lesson_documents", ["lesson_id", "version", "document"]),
+]
+
+# Таблицы с автоинкрементным id: после COPY с явными id sequence надо сдвинуть
+SERIAL_TABLES = ("modules", "lessons", "lesson_items", "study_materials")
+
+BOOLEAN_COLUMNS = {("modules", "is_paid")}
+
+# Внешние ключи между выгружаемыми таблицами: (таблица, колонка) -> (таблица, колонка)
+REFERENCES = [
+    ("lessons", "module_id", "modules", "id"),
+    ("lesson_items", "lesson_id", "lessons", "id"),
+    ("lesson_documents", "lesson_id", "lessons", "id"),
+]
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_value(value, boolean=False) -> str:
+    """Значение в текстовом формате COPY."""
+    if value is None:
+        return "\\N"
+    if boolean:
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def write_copy_file(path: Path, table, columns, rows) -> int:
+    with path.open("w", encoding="utf-8", newline="\n") as handle:
+        for row in rows:
+            handle.write("\t".join(copy_value(row.get(c), (table, c) in BOOLEAN_COLUMNS) for c in columns) + "\n")
+    return len(rows)
+
+
+def write_loader(out_dir: Path, counts: dict, truncate=False) -> Path:
+    lines = [
+        "-- Загрузка курса из COPY-файлов (см. content_engine/export_copy.py).",
+        "-- Запускать из этой папки: psql \"$DATABASE_URL\" -v ON_ERROR_STOP=1 -f load.sql",
+        "\\set ON_ERROR_STOP on",
+        "set client_encoding = 'UTF8';",
+        "begin;",
+    ]
+    if truncate:
+        tables = ", ".join(table for table, _ in reversed(EXPORT_TABLES))
+        lines.append(f"truncate {tables} cascade;")
+    for table, columns in EXPORT_TABLES:
+        cols = ", ".join(f'"{c}"' for c in columns)
+        lines.append(f"-- {table}: {counts[table]} строк")
+        lines.append(f"\\copy {table} ({cols}) from '{table}.tsv'")
+    for table in SERIAL_TABLES:
+        lines.append(f"select setval(pg_get_serial_sequence('{table}', 'id'), "
+                     f"(select coalesce(max(id), 0) + 1 from {table}), false);")
+    lines.append("commit;")
+    path = out_dir / LOADER_NAME
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+# --- СБОРКА КУРСА В ЛОКАЛЬНОЙ SQLite ---
+
+def _export_io_class():
+    from database_engine import AUDIO_DIR, SeedIO, ensure_mp3
+
+    class ExportIO(SeedIO):
+        """Словарь — локальная SQLite, озвучку не генерируем: только отмечаем недостающие файлы."""
+
+        def __init__(self, missing_audio: set):
+            super().__init__()
+            self.missing_audio = missing_audio
+
+        async def audio(self, text, filename):
+            filename = ensure_mp3(filename)
+            if not (AUDIO_DIR / filename).exists():
+                self.missing_audio.add(filename)
+
+    return ExportIO
+
+
+async def build_staging(content_files, dict_mirror=None):
+    """Заполняет текущее хранилище database_engine тем, что записал бы полный сидинг."""
+    from database_engine import db_execute_retry, seed_lesson, supabase, update_study_materials
+    from seed_lesson_json_my import summary_projection
+    from seed_structure import sync_structure
+
+    if dict_mirror is not None:
+        mirror = DictionaryMirror(dict_mirror)
+        rows = mirror.rows()
+        mirror.close()
+        if rows:
+            db_execute_retry(supabase.table("dictionary").upsert(rows, on_conflict="khmer"))
+        print(f"📖 Словарь из зеркала: {len(rows)} слов")
+
+    sync_structure(apply=True)
+
+    export_io = _export_io_class()
+    missing_audio = set()
+    summaries = defaultdict(dict)
+    chapters = {}
+    for content_path in content_files:
+        print(f"\n⏳ {content_path.name}")
+        try:
+            stream = ChapterStream(content_path)
+            for lesson_idx, lesson_data in enumerate(stream, 1):
+                lesson_id, content = lesson_data.get("lesson_id"), lesson_data.get("content")
+                if not lesson_id or not content:
+                    continue
+                chapter_id = stream.meta.get("chapter_id") or stream.meta.get("id")
+                module_id = lesson_data.get("module_id") or chapter_id
+                if module_id is not None:
+                    summaries[module_id][int(lesson_id)] = summary_projection(lesson_data)
+                    chapters.setdefault(module_id, stream.meta.get("title"))
+                await seed_lesson(int(lesson_id), lesson_data.get("title") or f"Lesson {lesson_id}",
+                                  lesson_data.get("desc") or "", content, module_id=module_id,
+                                  order_index=lesson_data.get("order_index", lesson_idx - 1),
+                                  io=export_io(missing_audio))
+        except Exception as e:
+            print(f"❌ ОШИБКА при чтении {content_path.name}: {e}")
+
+    for module_id, lessons_data in sorted(summaries.items()):
+        await update_study_materials(module_id, lessons_data)
+    add_chapter_rows(chapters)
+
+    alphabet_rows, _ = build_alphabet()
+    db_execute_retry(supabase.table("alphabet").upsert(alphabet_rows, on_conflict="id"))
+    print(f"\n🔤 Алфавит: {len(alphabet_rows)} символов")
+    return sorted(missing_audio)
+
+
+def add_chapter_rows(chapters: dict):
+    """
+    Модули и уроки-Guidebook для глав из JSON, которых нет в FULL_COURSE.
+    chapters: module_id -> название главы (None — "Module <id>").
+    Строки без slug: seed_structure.py --prune их не удаляет.
+    """
+    from database_engine import db_execute_retry, supabase
+
+    ids = sorted(chapters)
+    if not ids:
+        return
+    known_modules = {r["id"] for r in db_execute_retry(
+        supabase.table("modules").select("id").in_("id", ids)).data or []}
+    known_lessons = {r["id"] for r in db_execute_retry(
+        supabase.table("lessons").select("id").in_("id", ids)).data or []}
+    titles = {module_id: chapters[module_id] or f"Module {module_id}" for module_id in ids}
+
+    modules = [{"id": module_id, "title": titles[module_id], "is_paid": False, "order_index": module_id}
+               for module_id in ids if module_id not in known_modules]
+    if modules:
+        db_execute_retry(supabase.table("modules").upsert(modules, on_conflict="id"))
+    # Guidebook модуля пишется в lesson_items с lesson_id = module_id (update_study_materials)
+    guidebooks = [{"id": module_id, "module_id": module_id, "title": titles[module_id],
+                   "description": "", "order_index": 0} for module_id in ids if module_id not in known_lessons]
+    if guidebooks:
+        db_execute_retry(supabase.table("lessons").upsert(guidebooks, on_conflict="id"))
+    if modules or guidebooks:
+        print(f"📦 Главы из JSON: модулей {len(modules)}, уроков-Guidebook {len(guidebooks)}")
+
+
+def check_references(client: SQLiteClient) -> list:
+    """Ссылки, которых нет в целевой таблице: ["lessons.module_id=10000 -> modules.id", ...]."""
+    broken = []
+    for table, column, target, target_column in REFERENCES:
+        values = {r[column] for r in client.table(table).select(column).execute().data if r[column] is not None}
+        known = {r[target_column] for r in client.table(target).select(target_column).execute().data}
+        broken += [f"{table}.{column}={value} -> {target}.{target_column}" for value in sorted(values - known)]
+    return broken
+
+
+def export_tables(client: SQLiteClient, out_dir: Path) -> dict:
+    counts = {}
+    for table, columns in EXPORT_TABLES:
+        order = client.primary_key(table)
+        query = client.table(table).select(*columns)
+        for column in order:
+            query = query.order(column)
+        counts[table] = write_copy_file(out_dir / f"{table}.tsv", table, columns, query.execute().data)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспортирует курс в COPY-файлы и загрузчик load.sql.")
+    parser.add_argument("--content-dir", default=str(BASE_DIR / "content_json"), help="Папка с JSON уроками")
+    parser.add_argument("--content-glob", default="*.json", help="Маска файлов (по умолчанию: *.json)")
+    parser.add_argument("--out", default=str(DEFAULT_OUT_DIR), help="Куда писать экспорт")
+    parser.add_argument("--dict-mirror", nargs="?", const=str(MIRROR_PATH),
+                        help="Добавить в экспорт весь словарь из локального зеркала dictionary")
+    parser.add_argument("--truncate", action="store_true",
+                        help="load.sql сначала очищает таблицы (для пересоздания staging)")
+    args = parser.parse_args()
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    staging = out_dir / "staging.sqlite"
+    for path in (staging, staging.with_name(staging.name + "-wal"), staging.with_name(staging.name + "-shm")):
+        if path.exists():
+            path.unlink()
+
+    # Весь сидинг в этом процессе пишет в staging
+    client = set_client(SQLiteClient(staging))
+
+    files = sorted(p for p in Path(args.content_dir).glob(args.content_glob) if p.is_file())
+    print(f"📂 Собираю курс из {len(files)} файл(ов) в {staging}...")
+    missing_audio = asyncio.run(build_staging(files, args.dict_mirror))
+
+    broken = check_references(client)
+    if broken:
+        client.close()
+        sys.exit(f"❌ Нарушены внешние ключи, load.sql не загрузится ({len(broken)}):\n   " + "\n   ".join(broken))
+
+    counts = export_tables(client, out_dir)
+    loader = write_loader(out_dir, counts, truncate=args.truncate)
+    client.close()
+
+    print("\n" + "=" * 60)
+    for table, count in counts.items():
+        print(f"   {table}: {count}")
+    if missing_audio:
+        print(f"🎙️ Нет аудио: {len(missing_audio)} (сгенерирует обычный сидинг или gen_audio.py)")
+    print(f"✅ Экспорт: {out_dir}")
+    print(f"📦 Загрузка: cd {out_dir} && psql \"$DATABASE_URL\" -v ON_ERROR_STOP=1 -f {LOADER_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Предрасчёт метрик кхмерских шрифтов для /api/metrics (Khmer-glif/server/server.cjs).
+
+Сервер строит metricsCache лениво: на первый /api/metrics для шрифта он шейпит
+все согласные, подписные, гласные и диакритики (buildFontMetrics). На
+serverless-хостинге каждый холодный старт платит за это заново. Этот скрипт
+считает те же таблицы при сборке для всех шрифтов из public/fonts и пишет их
+в Khmer-glif/public/font-metrics.json:
+
+  {"format", "version", "fonts": {hash шрифта: {fontId, file, metrics}}}
+
+  * Ключ — хэш файла шрифта (как в prebake_shaping): сервер берёт готовые
+    метрики, только если хэш совпал, иначе считает сам, как раньше.
+  * Расчёт повторяет buildFontMetrics: cluster level 2, база ក, те же правила
+    для слитных глифов; NaN у пустых глифов — null, как после JSON.stringify.
+  * Повторный запуск пересчитывает только шрифты с новым хэшем.
+
+Запуск:
+  python font_metrics.py                    # все шрифты Khmer-glif/public/fonts
+  python font_metrics.py --force            # пересчитать всё
+  cd Khmer-glif && npm run metrics          # то же из лаборатории
+
+Нужны пакеты uharfbuzz и fonttools (pip install uharfbuzz fonttools).
+"""
+import argparse
+import json
+import math
+from pathlib import Path
+
+from prebake_shaping import FONTS_DIR, REPO_DIR, FontShaper, discover_fonts, font_hash
+
+DEFAULT_OUT = REPO_DIR / "Khmer-glif" / "public" / "font-metrics.json"
+
+# Должны совпадать с PRECOMPUTED_METRICS_* в server.cjs; версия растёт при изменении buildFontMetrics
+METRICS_FORMAT = "khmer-font-metrics"
+METRICS_VERSION = 1
+
+BASE_CONSONANT = 0x1780  # ក — стабильная нейтральная база
+COENG = 0x17D2
+KHMER_CONSONANTS = range(0x1780, 0x17A3)
+KHMER_DEP_VOWELS = range(0x17B6, 0x17C6)
+KHMER_INDEP_VOWELS = range(0x17A3, 0x17B4)
+KHMER_DIACRITICS = [*range(0x17C6, 0x17D2), 0x17D3, 0x17DD]
+
+NAN = float("nan")
+
+
+def _js_min(values):
+    # Math.min/Math.max: NaN среди аргументов даёт NaN
+    return NAN if any(math.isnan(v) for v in values) else min(values)
+
+
+def _js_max(values):
+    return NAN if any(math.isnan(v) for v in values) else max(values)
+
+
+def _shape_string(shaper: FontShaper, text) -> list:
+    """Как shapeString: каждый символ отдельным кластером, у глифа — gid и bbox."""
+    records = []
+    for gid, cluster, *_ in shaper.records(text, cluster_level=2):
+        bounds = shaper.bounds(gid)
+        x1, y1, x2, y2 = bounds if bounds is not None else (NAN,) * 4
+        records.append({"glyphId": gid, "cp": cluster, "bb": {"x1": x1, "y1": y1, "x2": x2, "y2": y2}})
+    return records
+
+
+def _cluster_bb(records) -> dict:
+    return {
+        "x1": _js_min([r["bb"]["x1"] for r in records]),
+        "y1": _js_min([r["bb"]["y1"] for r in records]),
+        "x2": _js_max([r["bb"]["x2"] for r in records]),
+        "y2": _js_max([r["bb"]["y2"] for r in records]),
+    }
+
+
+def _isolated(shaper, code_points) -> dict:
+    table = {}
+    for cp in code_points:
+        records = _shape_string(shaper, chr(cp))
+        if records and records[0]["bb"]["x2"] - records[0]["bb"]["x1"] > 0:
+            table[cp] = {"glyphId": records[0]["glyphId"], "bb": records[0]["bb"]}
+    return table
+
+
+def build_font_metrics(shaper: FontShaper) -> dict:
+    """Порт buildFontMetrics из server.cjs."""
+    base = chr(BASE_CONSONANT)
+
+    # 1. Базовые согласные в изоляции
+    consonants = _isolated(shaper, KHMER_CONSONANTS)
+    base_rec = consonants.get(BASE_CONSONANT)
+    base_glyph_id = base_rec["glyphId"] if base_rec else None
+    base_bb = base_rec["bb"] if base_rec else None
+
+    # 2. Подписные формы: "ក + ្ + X"
+    subscripts = {}
+    for cp in KHMER_CONSONANTS:
+        records = _shape_string(shaper, base + chr(COENG) + chr(cp))
+        if not records:
+            continue
+        cluster_bb = _cluster_bb(records)
+        if len(records) >= 2:
+            # Компонент с наибольшим y1 — самый нижний (reduce как в JS: при NaN берётся правый)
+            sub = records[0]
+            for rec in records[1:]:
+                sub = sub if sub["bb"]["y1"] > rec["bb"]["y1"] else rec
+            subscripts[cp] = {"glyphId": sub["glyphId"], "bb": sub["bb"], "clusterBB": cluster_bb}
+        else:
+            # Слитный глиф: верхняя граница подписной ≈ нижняя граница тела базы
+            base_body_y2 = base_bb["y2"] if base_bb else cluster_bb["y1"] + (cluster_bb["y2"] - cluster_bb["y1"]) * 0.6
+            subscripts[cp] = {
+                "glyphId": records[0]["glyphId"],
+                "bb": {"x1": cluster_bb["x1"], "y1": base_body_y2, "x2": cluster_bb["x2"], "y2": cluster_bb["y2"]},
+                "clusterBB": cluster_bb,
+                "merged": True,
+            }
+
+    # 3. Зависимые гласные: "ក + гласная"
+    vowels = {}
+    for cp in KHMER_DEP_VOWELS:
+        records = _shape_string(shaper, base + chr(cp))
+        if not records:
+            continue
+        cluster_bb = _cluster_bb(records)
+        if len(records) >= 2:
+            parts = [r for r in records if r["glyphId"] != base_glyph_id]
+            primary = parts[0] if parts else records[-1]
+            vowels[cp] = {
+                "glyphId": primary["glyphId"],
+                "bb": primary["bb"],
+                "clusterBB": cluster_bb,
+                "components": [{"glyphId": r["glyphId"], "bb": r["bb"]} for r in parts],
+                "multipart": len(parts) > 1,
+            }
+        else:
+            vowels[cp] = {
+                "glyphId": records[0]["glyphId"],
+                "bb": records[0]["bb"],
+                "clusterBB": cluster_bb,
+                "components": [],
+                "multipart": False,
+                "merged": True,
+                "delta": {
+                    "top": base_bb["y1"] - cluster_bb["y1"],
+                    "bottom": cluster_bb["y2"] - base_bb["y2"],
+                    "left": base_bb["x1"] - cluster_bb["x1"],
+                    "right": cluster_bb["x2"] - base_bb["x2"],
+                } if base_bb else None,
+            }
+
+    # 4. Независимые гласные в изоляции
+    indep_vowels = _isolated(shaper, KHMER_INDEP_VOWELS)
+
+    # 5. Диакритики: "ក + диакритик"
+    diacritics = {}
+    for cp in KHMER_DIACRITICS:
+        records = _shape_string(shaper, base + chr(cp))
+        if not records:
+            continue
+        cluster_bb = _cluster_bb(records)
+        if len(records) >= 2:
+            dia = next((r for r in records if r["glyphId"] != base_glyph_id), records[-1])
+            diacritics[cp] = {"glyphId": dia["glyphId"], "bb": dia["bb"], "clusterBB": cluster_bb}
+        else:
+            diacritics[cp] = {
+                "glyphId": records[0]["glyphId"],
+                "bb": records[0]["bb"],
+                "clusterBB": cluster_bb,
+                "merged": True,
+                "delta": {"top": base_bb["y1"] - cluster_bb["y1"]} if base_bb else None,
+            }
+
+    return _to_json({
+        "unitsPerEm": shaper.units_per_em,
+        "consonants": consonants,
+        "subscripts": subscripts,
+        "vowels": vowels,
+        "indepVowels": indep_vowels,
+        "diacritics": diacritics,
+    })
+
+
+def _to_json(node):
+    """Числа как после JSON.stringify: NaN → null, целые без .0."""
+    if isinstance(node, dict):
+        return {str(k): _to_json(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_to_json(v) for v in node]
+    if isinstance(node, float):
+        if math.isnan(node):
+            return None
+        return int(node) if node.is_integer() else node
+    return node
+
+
+def load_metrics(path: Path) -> dict:
+    """Шрифты из существующего файла метрик, если его формат и версия актуальны."""
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+    if data.get("format") != METRICS_FORMAT or data.get("version") != METRICS_VERSION:
+        return {}
+    return data.get("fonts", {})
+
+
+def collect_metrics(fonts_dir: Path, previous=None) -> dict:
+    """Метрики всех шрифтов папки по хэшу файла; одинаковые файлы — одна запись, из previous — без пересчёта."""
+    previous = previous or {}
+    fonts = {}
+    for entry in discover_fonts(Path(fonts_dir)):
+        try:
+            digest = font_hash(entry["path"])
+            if digest in fonts:
+                print(f"   {entry['id']}: тот же файл, что {fonts[digest]['fontId']}")
+                continue
+            if digest in previous:
+                fonts[digest] = {**previous[digest], "fontId": entry["id"], "file": entry["file"]}
+                print(f"   {entry['id']}: без изменений ({digest})")
+                continue
+            metrics = build_font_metrics(FontShaper(entry))
+        except Exception as e:
+            print(f"⚠️ Пропускаю {entry['file']}: {e}")
+            continue
+        fonts[digest] = {"fontId": entry["id"], "file": entry["file"], "metrics": metrics}
+        print(f"   {entry['id']}: согласных {len(metrics['consonants'])}, подписных {len(metrics['subscripts'])}, "
+              f"гласных {len(metrics['vowels'])}, диакритик {len(metrics['diacritics'])}")
+    return fonts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Предрасчёт /api/metrics для всех шрифтов Khmer-glif.")
+    parser.add_argument("--fonts-dir", default=str(FONTS_DIR), help="Папка со шрифтами")
+    parser.add_argument("--out", default=str(DEFAULT_OUT), help="Куда писать метрики")
+    parser.add_argument("--force", action="store_true", help="Пересчитать даже шрифты с тем же хэшем")
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    fonts = collect_metrics(args.fonts_dir, {} if args.force else load_metrics(out))
+
+    payload = {"format": METRICS_FORMAT, "version": METRICS_VERSION, "fonts": fonts}
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    print(f"✅ {out}: шрифтов {len(fonts)} ({out.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
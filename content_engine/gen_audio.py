@@ -1,6 +1,8 @@
 import asyncio
 import os
-import edge_tts
+
+from rate_control import TTS_LIMITER
+from transport import close_tts, communicate
 
 # Голоса
 VOICE_FEMALE = "km-KH-SreymomNeural"
@@ -54,10 +56,11 @@ async def generate_audio():
         # Выбираем правильный голос
         voice = VOICE_MALE if gender == 'm' else VOICE_FEMALE
 
-        communicate = edge_tts.Communicate(text_km, voice)
-        await communicate.save(output_path)
+        async with TTS_LIMITER.async_slot():
+            await communicate(text_km, voice).save(output_path)
         print(f"✅ {filename}.mp3 -> Озвучено: {'Мужчиной' if gender == 'm' else 'Женщиной'} ({text_km})")
 
+    await close_tts()
     print("\n🎉 Готово! Проверь файлы yes_male и yes_female.")
 
 
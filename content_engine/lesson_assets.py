@@ -0,0 +1,77 @@
+"""
+Манифест ассетов урока для предзагрузки (prefetch).
+
+Собирается в том же проходе по item-ам, что и seed_lesson (prepare_lesson_items):
+все аудио, на которые ссылается урок (data.audio, examples, pairs,
+options_metadata, char_audio_map, word_audio, ...), и шрифты слайдов.
+Каждый файл встречается в списке один раз, с номером первого экрана, где он
+нужен, и размером в байтах — плеер или service worker может заранее скачать
+ассеты первых N экранов параллельно.
+"""
+from pathlib import Path
+
+PUBLIC_DIR = Path(__file__).resolve().parent.parent / "khmer-mastery" / "public"
+SOUNDS_DIR = PUBLIC_DIR / "sounds"
+FONTS_DIR = PUBLIC_DIR / "fonts"
+
+# Шрифты по умолчанию у слайдов (см. LessonSlides/*.jsx, DEFAULT_KHMER_FONT_URL)
+ITEM_FONTS = {
+    "vocab_card": "NotoSansKhmer-VariableFont_wdth,wght.ttf",
+    "word_breakdown": "NotoSansKhmer-VariableFont_wdth,wght.ttf",
+    "analysis": "KhmerOS_siemreap.ttf",
+}
+
+
+def audio_url(name: str) -> str:
+    """Тот же путь, что строит useAudioPlayer: /sounds/<name>.mp3."""
+    name = name.strip()
+    if name.startswith("/") or name.startswith("http"):
+        return name
+    if not name.lower().endswith(".mp3"):
+        name = f"{name}.mp3"
+    return f"/sounds/{name}"
+
+
+def _audio_refs(value, audio_key=False):
+    """Все имена аудио в data: строки под ключами с "audio" в имени, на любой глубине."""
+    if isinstance(value, str):
+        if audio_key and value.strip():
+            yield value
+    elif isinstance(value, dict):
+        for key, child in value.items():
+            yield from _audio_refs(child, audio_key or "audio" in str(key))
+    elif isinstance(value, list):
+        for child in value:
+            yield from _audio_refs(child, audio_key)
+
+
+class LessonAssets:
+    def __init__(self, sounds_dir: Path = SOUNDS_DIR, fonts_dir: Path = FONTS_DIR):
+        self.sounds_dir = Path(sounds_dir)
+        self.fonts_dir = Path(fonts_dir)
+        self._entries = {}
+
+    def add(self, url: str, kind: str, screen: int, path: Path = None):
+        entry = self._entries.get(url)
+        if entry is not None:
+            entry["screen"] = min(entry["screen"], screen)
+            return
+        # Файла может не быть (TTS упал, внешний URL) — тогда размер неизвестен
+        size = path.stat().st_size if path is not None and path.is_file() else None
+        self._entries[url] = {"url": url, "kind": kind, "screen": screen, "bytes": size}
+
+    def add_item(self, screen: int, item_type: str, data):
+        for name in _audio_refs(data):
+            url = audio_url(name)
+            path = self.sounds_dir / url[len("/sounds/"):] if url.startswith("/sounds/") else None
+            self.add(url, "audio", screen, path)
+        font = ITEM_FONTS.get(item_type)
+        if font:
+            self.add(f"/fonts/{font}", "font", screen, self.fonts_dir / font)
+
+    def to_list(self) -> list:
+        """Плоский список по порядку экранов."""
+        return sorted(self._entries.values(), key=lambda e: (e["screen"], e["kind"], e["url"]))
+
+    def total_bytes(self) -> int:
+        return sum(e["bytes"] or 0 for e in self._entries.values())
@@ -0,0 +1,26 @@
+"""
+Предсобранный документ урока (таблица lesson_documents).
+
+Одна строка на урок: сам урок + все его item-ы по порядку, уже с готовыми
+именами аудио и транскрипциями (то, что seed_lesson дописывает в data).
+Клиент читает урок одним запросом по lesson_id и кэширует его по `version`.
+`assets` — плоский список файлов урока для предзагрузки (см. lesson_assets).
+"""
+from seed_journal import content_hash
+
+DOCUMENT_SCHEMA = 1
+
+LESSON_FIELDS = ("id", "title", "description", "module_id", "order_index")
+ITEM_FIELDS = ("id", "item_key", "lesson_id", "type", "order_index", "data")
+
+
+def build_lesson_document(lesson_row: dict, item_rows: list, assets: list = None) -> dict:
+    """Собирает документ урока; version меняется при любом изменении содержимого."""
+    items = sorted(item_rows, key=lambda r: r.get("order_index") or 0)
+    body = {
+        "schema": DOCUMENT_SCHEMA,
+        "lesson": {k: lesson_row.get(k) for k in LESSON_FIELDS},
+        "items": [{k: row.get(k) for k in ITEM_FIELDS} for row in items],
+        "assets": assets or [],
+    }
+    return {"version": content_hash(body), **body}
@@ -0,0 +1,452 @@
+"""
+Предварительный шейпинг кхмерских строк курса (HarfBuzz) в готовое хранилище для фронтенда.
+
+Сейчас каждую строку шейпит Khmer-glif/server/server.cjs на запрос /api/shape
+(harfbuzzjs + opentype.js), а рядом лежат собранные вручную shaped-text*.json.
+Этот скрипт один раз прогоняет все кхмерские строки из content_json через
+uharfbuzz + fontTools со шрифтами Khmer-glif/public/fonts и пишет одно
+версионированное хранилище — урок рисуется без обращения к серверу шейпинга.
+
+  * Шрифты и их id — как в server.cjs (discoverFontCatalog/toFontId/toLabel),
+    шейпинг — как shapeText: NFC, cluster level 0, фичи по умолчанию.
+  * Контуры глифов хранятся один раз на шрифт (glyphs: gid → [d, bb]),
+    у строки — только кластеры: [clusterStart, [[gid, x, y, advance], ...]].
+    expand() восстанавливает из них ровно тот массив, что отдаёт /api/shape.
+  * Кэш по (хэш шрифта, текст) в .cache/shaping/<hash>.json: повторный запуск
+    шейпит только новые строки, а смена файла шрифта меняет хэш и кэш.
+
+Формат хранилища (STORE_FORMAT, STORE_VERSION):
+  {"format", "version", "defaultFontId",
+   "fonts": {fontId: {label, file, hash, fontName, fontVersion, unitsPerEm, glyphs}},
+   "texts": {text: {fontId: [[clusterStart, [[gid, x, y, advance], ...]], ...]}}}
+
+Запуск:
+  python prebake_shaping.py                       # все шрифты, все файлы content_json
+  python prebake_shaping.py --font khmeros-battambang --out /tmp/shaped.json
+  python prebake_shaping.py --text "កាហ្វេ" --no-cache   # одна строка, без кэша
+
+Нужны пакеты uharfbuzz и fonttools (pip install uharfbuzz fonttools).
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+REPO_DIR = BASE_DIR.parent
+FONTS_DIR = REPO_DIR / "Khmer-glif" / "public" / "fonts"
+CONTENT_DIR = BASE_DIR / "content_json"
+CACHE_DIR = BASE_DIR / ".cache" / "shaping"
+DEFAULT_OUT = REPO_DIR / "khmer-mastery" / "src" / "data" / "shaped-store.json"
+
+STORE_FORMAT = "khmer-shaped-store"
+STORE_VERSION = 1
+# Меняется при любом изменении шейпинга или контуров — старый кэш тогда не используется
+SHAPER_VERSION = 1
+PATH_DECIMALS = 2
+
+FONT_EXTENSIONS = {".ttf", ".otf", ".woff", ".woff2"}
+FONT_LABEL_OVERRIDES = {
+    "KhmerOSBattambang": "Khmer OS Battambang",
+    "KhmerOS_siemreap": "Khmer OS Siemreap",
+    "NotoSansKhmer-Regular": "Noto Sans Khmer",
+}
+
+# Как KHMER_SEQ_RE в generate-shaped-from-content.cjs: кхмерский блок и кхмерские символы
+KHMER_SEQ_RE = re.compile(r"[ក-៿᧠-᧿]+")
+
+# Классы символов — как в server.cjs (копия khmerClassifier.js)
+COENG = 0x17D2
+KHMER_DIACRITIC_RANGES = ((0x17C6, 0x17D1), (0x17D3, 0x17D3), (0x17DD, 0x17DD))
+
+
+def is_consonant(char) -> bool:
+    return 0x1780 <= ord(char) <= 0x17A2
+
+
+def is_dependent_vowel(char) -> bool:
+    return 0x17B6 <= ord(char) <= 0x17C5
+
+
+def is_diacritic(char) -> bool:
+    return any(start <= ord(char) <= end for start, end in KHMER_DIACRITIC_RANGES)
+
+
+def _require_shaping():
+    try:
+        import uharfbuzz
+        from fontTools.ttLib import TTFont
+    except ImportError as e:
+        sys.exit(f"❌ Нет пакета {e.name}: pip install uharfbuzz fonttools")
+    return uharfbuzz, TTFont
+
+
+# --- ШРИФТЫ ---
+
+def font_id(file_name) -> str:
+    font = re.sub(r"[^a-z0-9]+", "-", Path(file_name).stem.lower())
+    return font.strip("-")
+
+
+def font_label(file_name) -> str:
+    base = Path(file_name).stem
+    if base in FONT_LABEL_OVERRIDES:
+        return FONT_LABEL_OVERRIDES[base]
+    label = re.sub(r"[_-]+", " ", base)
+    label = re.sub(r"([a-z])([A-Z])", r"\1 \2", label)
+    return re.sub(r"\s+", " ", label).strip()
+
+
+def discover_fonts(fonts_dir: Path) -> list:
+    """Каталог шрифтов с теми же id, что у server.cjs (порядок localeCompare ≈ casefold)."""
+    if not fonts_dir.is_dir():
+        return []
+    names = sorted((p.name for p in fonts_dir.iterdir()
+                    if p.is_file() and p.suffix.lower() in FONT_EXTENSIONS),
+                   key=lambda name: (name.casefold(), name))
+    used, catalog = {}, []
+    for name in names:
+        base = font_id(name) or "font"
+        used[base] = used.get(base, 0) + 1
+        catalog.append({
+            "id": base if used[base] == 1 else f"{base}-{used[base]}",
+            "label": font_label(name),
+            "file": name,
+            "path": fonts_dir / name,
+        })
+    return catalog
+
+
+def font_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+
+
+# --- ТЕКСТЫ ---
+
+def _walk_strings(node):
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, dict):
+        for value in node.values():
+            yield from _walk_strings(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk_strings(value)
+
+
+def collect_texts(paths) -> list:
+    """Все кхмерские последовательности из JSON-файлов (NFC, без повторов)."""
+    texts = set()
+    for root in paths:
+        root = Path(root)
+        files = sorted(root.rglob("*.json")) if root.is_dir() else [root]
+        for path in files:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Пропускаю {path.name}: {e}")
+                continue
+            for value in _walk_strings(data):
+                texts.update(unicodedata.normalize("NFC", m) for m in KHMER_SEQ_RE.findall(value))
+    return sorted(texts)
+
+
+# --- ШЕЙПИНГ ---
+
+def _number(value) -> str:
+    # Как floatToString в opentype.js: целые без дробной части, иначе toFixed(2)
+    if round(value) == value:
+        return str(int(round(value)))
+    return f"{value:.{PATH_DECIMALS}f}"
+
+
+def _pack(*values) -> str:
+    out = []
+    for i, value in enumerate(values):
+        text = _number(value)
+        out.append(" " + text if value >= 0 and i > 0 else text)
+    return "".join(out)
+
+
+def _svg_pen_class():
+    from fontTools.pens.basePen import BasePen
+
+    class SvgPathPen(BasePen):
+        """SVG path в формате Path.toPathData(2) из opentype.js."""
+
+        def __init__(self, glyph_set):
+            super().__init__(glyph_set)
+            self.parts = []
+
+        def _moveTo(self, pt):
+            self.parts.append("M" + _pack(*pt))
+
+        def _lineTo(self, pt):
+            self.parts.append("L" + _pack(*pt))
+
+        def _qCurveToOne(self, pt1, pt2):
+            self.parts.append("Q" + _pack(*pt1, *pt2))
+
+        def _curveToOne(self, pt1, pt2, pt3):
+            self.parts.append("C" + _pack(*pt1, *pt2, *pt3))
+
+        def _closePath(self):
+            self.parts.append("Z")
+
+    return SvgPathPen
+
+
+class FontShaper:
+    """Один шрифт: uharfbuzz для шейпинга, fontTools для контуров глифов."""
+
+    def __init__(self, entry):
+        hb, TTFont = _require_shaping()
+        self._hb = hb
+        self.entry = entry
+        data = Path(entry["path"]).read_bytes()
+        self.hash = hashlib.sha256(data).hexdigest()[:16]
+        self._font = hb.Font(hb.Face(hb.Blob(data)))
+        self._tt = TTFont(entry["path"])
+        self._glyph_set = self._tt.getGlyphSet()
+        self._glyph_order = self._tt.getGlyphOrder()
+        self._pen_class = _svg_pen_class()
+        self.units_per_em = self._tt["head"].unitsPerEm
+        names = self._tt["name"]
+        self.info = {
+            "label": entry["label"],
+            "file": entry["file"],
+            "hash": self.hash,
+            "fontName": names.getDebugName(4) or "Unknown",
+            "fontVersion": names.getDebugName(5) or "Unknown",
+            "unitsPerEm": self.units_per_em,
+        }
+
+    def _glyph(self, gid):
+        name = self._glyph_order[gid] if gid < len(self._glyph_order) else None
+        if name is None or name not in self._glyph_set:
+            return None
+        return self._glyph_set[name]
+
+    def glyph(self, gid) -> list:
+        """[d, bb] глифа в координатах SVG (ось y вниз), bb = None у пустого глифа."""
+        from fontTools.pens.transformPen import TransformPen
+
+        glyph = self._glyph(gid)
+        if glyph is None:
+            return ["", [0, 0, 0, 0]]
+        pen = self._pen_class(self._glyph_set)
+        glyph.draw(TransformPen(pen, (1, 0, 0, -1, 0, 0)))
+        return ["".join(pen.parts), self.bounds(gid)]
+
+    def bounds(self, gid):
+        """bbox глифа [x1, y1, x2, y2] (ось y вниз), None у пустого, нули у отсутствующего — как в server.cjs."""
+        from fontTools.pens.boundsPen import BoundsPen
+        from fontTools.pens.transformPen import TransformPen
+
+        glyph = self._glyph(gid)
+        if glyph is None:
+            return [0, 0, 0, 0]
+        pen = BoundsPen(self._glyph_set)
+        glyph.draw(TransformPen(pen, (1, 0, 0, -1, 0, 0)))
+        return list(pen.bounds) if pen.bounds else None
+
+    def records(self, text, cluster_level=0) -> list:
+        """Вывод HarfBuzz: [(gid, cluster, x_offset, y_offset, x_advance), ...]."""
+        hb = self._hb
+        buf = hb.Buffer()
+        buf.cluster_level = hb.BufferClusterLevel(cluster_level)
+        buf.add_str(text)
+        buf.guess_segment_properties()
+        hb.shape(self._font, buf)
+        return [(info.codepoint, info.cluster, pos.x_offset, pos.y_offset, pos.x_advance)
+                for info, pos in zip(buf.glyph_infos, buf.glyph_positions)]
+
+    def shape(self, text) -> list:
+        """Кластеры строки: [[clusterStart, [[gid, x, y, advance], ...]], ...]."""
+        # cluster level 0 (MONOTONE_GRAPHEMES) — как в shapeText
+        clusters = {}
+        for gid, cluster, dx, dy, advance in self.records(text):
+            clusters.setdefault(cluster, []).append((gid, dx, dy, advance))
+
+        result, global_x = [], 0
+        for start in sorted(clusters):
+            pen_x, components = global_x, []
+            for gid, dx, dy, advance in clusters[start]:
+                components.append([gid, pen_x + dx, -dy, advance])
+                pen_x += advance
+            result.append([start, components])
+            global_x = pen_x
+        return result
+
+
+# --- КЭШ ---
+
+class ShapeCache:
+    """Кэш шейпинга одного шрифта по его хэшу: тексты и контуры глифов."""
+
+    def __init__(self, cache_dir, shaper: FontShaper):
+        self.path = Path(cache_dir) / f"{shaper.hash}.json" if cache_dir else None
+        self.texts, self.glyphs = {}, {}
+        self.dirty = False
+        if self.path is not None and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                data = {}
+            if data.get("shaper") == SHAPER_VERSION:
+                self.texts = data.get("texts", {})
+                self.glyphs = data.get("glyphs", {})
+
+    def save(self, shaper: FontShaper):
+        if self.path is None or not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"shaper": SHAPER_VERSION, "font": shaper.info, "texts": self.texts, "glyphs": self.glyphs}
+        self.path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+
+def prebake_font(shaper: FontShaper, texts, cache_dir=None) -> dict:
+    """Шейпит тексты одним шрифтом (с кэшем); возвращает секцию шрифта и счётчики."""
+    cache = ShapeCache(cache_dir, shaper)
+    shaped, stats = {}, {"shaped": 0, "cached": 0}
+    for text in texts:
+        if text in cache.texts:
+            stats["cached"] += 1
+        else:
+            cache.texts[text] = shaper.shape(text)
+            cache.dirty = True
+            stats["shaped"] += 1
+        shaped[text] = cache.texts[text]
+
+    glyphs = {}
+    for clusters in shaped.values():
+        for _, components in clusters:
+            for gid, *_ in components:
+                key = str(gid)
+                if key not in cache.glyphs:
+                    cache.glyphs[key] = shaper.glyph(gid)
+                    cache.dirty = True
+                glyphs[key] = cache.glyphs[key]
+    cache.save(shaper)
+
+    section = {**shaper.info, "glyphs": dict(sorted(glyphs.items(), key=lambda kv: int(kv[0])))}
+    return {"font": section, "texts": shaped, "stats": stats}
+
+
+def build_store(fonts, texts, cache_dir=None, default_font_id=None):
+    store = {"format": STORE_FORMAT, "version": STORE_VERSION,
+             "defaultFontId": default_font_id or (fonts[0]["id"] if fonts else None),
+             "fonts": {}, "texts": {text: {} for text in texts}}
+    stats = {}
+    for entry in fonts:
+        baked = prebake_font(FontShaper(entry), texts, cache_dir)
+        store["fonts"][entry["id"]] = baked["font"]
+        for text, clusters in baked["texts"].items():
+            store["texts"][text][entry["id"]] = clusters
+        stats[entry["id"]] = baked["stats"]
+    return store, stats
+
+
+# --- ЧТЕНИЕ ---
+
+def expand(store, text, font_id=None) -> list:
+    """Эталонный читатель: массив кластеров в формате ответа /api/shape (или [] если строки нет)."""
+    text = unicodedata.normalize("NFC", text or "")
+    font_id = font_id if font_id and font_id != "auto" else store["defaultFontId"]
+    clusters = store["texts"].get(text, {}).get(font_id)
+    if not clusters:
+        return []
+    font = store["fonts"][font_id]
+    return expand_clusters(text, clusters, font["glyphs"].__getitem__, font_id, font)
+
+
+def expand_clusters(text, clusters, glyph, font_id, font) -> list:
+    """Кластеры [[clusterStart, [[gid, x, y, advance], ...]], ...] → объекты /api/shape; glyph(str(gid)) → [d, bb]."""
+    font_info = {"fontId": font_id, "fontLabel": font["label"], "fontFile": font["file"],
+                 "fontName": font["fontName"], "fontVersion": font["fontVersion"],
+                 "unitsPerEm": font["unitsPerEm"]}
+
+    result, global_x = [], 0
+    for index, (start, components) in enumerate(clusters):
+        end = clusters[index + 1][0] if index + 1 < len(clusters) else len(text)
+        cluster_text = text[start:end]
+        chars = list(cluster_text)
+        code_points = [ord(c) for c in chars]
+        comps = []
+        for i, (gid, x, y, advance) in enumerate(components):
+            d, bb = glyph(str(gid))
+            bb = dict(zip(("x1", "y1", "x2", "y2"), bb if bb is not None else (None,) * 4))
+            comps.append({"hbGlyphId": gid, "d": d, "bb": bb, "x": x, "y": y, "advance": advance, "clusterIndex": i})
+        advance = sum(c["advance"] for c in comps)
+        result.append({
+            "id": index,
+            "cluster": start,
+            "clusterStart": start,
+            "clusterEnd": end,
+            "clusterText": cluster_text,
+            "chars": chars,
+            "codePoints": code_points,
+            "primaryChar": next((c for c in chars if is_consonant(c)), chars[0] if chars else ""),
+            "hasCoeng": COENG in code_points,
+            "hasSubscriptConsonant": any(i > 0 and code_points[i - 1] == COENG and is_consonant(c)
+                                         for i, c in enumerate(chars)),
+            "hasDependentVowel": any(is_dependent_vowel(c) for c in chars),
+            "hasDiacritic": any(is_diacritic(c) for c in chars),
+            "components": comps,
+            "d": comps[0]["d"] if comps else "",
+            "bb": comps[0]["bb"] if comps else {"x1": 0, "y1": 0, "x2": 0, "y2": 0},
+            "advance": advance,
+            "x": (comps[0]["x"] if comps else 0) or global_x,
+            "y": (comps[0]["y"] if comps else 0) or 0,
+            "fontInfo": font_info,
+        })
+        global_x += advance
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Предварительный шейпинг кхмерских строк курса в shaped-store.json.")
+    parser.add_argument("--fonts-dir", default=str(FONTS_DIR), help="Папка со шрифтами (как public/fonts у Khmer-glif)")
+    parser.add_argument("--content", action="append",
+                        help="JSON-файл или папка со строками (можно несколько; по умолчанию content_json)")
+    parser.add_argument("--text", action="append", help="Шейпить эту строку вместо контента (можно несколько)")
+    parser.add_argument("--font", action="append", help="id шрифта (можно несколько; по умолчанию все)")
+    parser.add_argument("--out", default=str(DEFAULT_OUT), help="Куда писать хранилище")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR), help="Папка кэша шейпинга")
+    parser.add_argument("--no-cache", action="store_true", help="Шейпить всё заново, кэш не читать и не писать")
+    args = parser.parse_args()
+
+    catalog = discover_fonts(Path(args.fonts_dir))
+    if not catalog:
+        sys.exit(f"❌ Нет шрифтов в {args.fonts_dir}")
+    fonts = catalog
+    if args.font:
+        by_id = {f["id"]: f for f in catalog}
+        unknown = [f for f in args.font if f not in by_id]
+        if unknown:
+            sys.exit(f"❌ Неизвестные шрифты: {', '.join(unknown)} (есть: {', '.join(by_id)})")
+        fonts = [by_id[f] for f in args.font]
+
+    if args.text:
+        texts = sorted({unicodedata.normalize("NFC", t) for t in args.text if t})
+    else:
+        texts = collect_texts(args.content or [CONTENT_DIR])
+    print(f"🔤 Строк: {len(texts)}, шрифтов: {len(fonts)}")
+
+    store, stats = build_store(fonts, texts, None if args.no_cache else args.cache_dir,
+                               default_font_id=catalog[0]["id"] if catalog[0] in fonts else None)
+    for fid, counts in stats.items():
+        print(f"   {fid}: зашейплено {counts['shaped']}, из кэша {counts['cached']}, "
+              f"глифов {len(store['fonts'][fid]['glyphs'])}")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(store, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    print(f"✅ {out} ({out.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Профилирование любого скрипта content_engine без правки его кода.
+
+Скрипт запускается через runpy как `__main__` (с его собственными аргументами),
+а вокруг включаются:
+  * cProfile — profile.pstats (для pstats/snakeviz) и profile.txt (топ функций);
+  * сэмплер стеков всех потоков — profile.collapsed в формате flamegraph
+    (`flamegraph.pl profile.collapsed > flame.svg` или speedscope);
+    cProfile видит только главный поток, а сэмплер — и потоки asyncio.to_thread;
+  * tracemalloc — пик памяти и топ мест, где выделена память (memory.txt);
+  * summary.json — wall/CPU время, ожидание (wall − CPU), самые «горячие»
+    функции и файлы по сэмплам, и отчёт run_metrics, если скрипт его собирал.
+
+Всё пишется в .cache/profiles/<дата-время>-<скрипт>/, чтобы сравнивать запуски.
+Если скрипт упал, профиль всё равно пишется (в summary.json — error), а
+исключение пробрасывается дальше.
+
+Запуск:
+  python profile_run.py seed_lesson_json_my.py --content content_json/R1.json
+  python profile_run.py gen_alphabet.py
+  python profile_run.py freq.py
+  python profile_run.py seed_structure.py
+  python profile_run.py --no-memory legacy/audit_lessons.py
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+PROFILES_DIR = BASE_DIR / ".cache" / "profiles"
+SAMPLE_INTERVAL = 0.005
+_RUNNER_FILES = {"<frozen runpy>", runpy.__file__}
+
+
+class StackSampler:
+    """Раз в interval снимает стеки всех потоков (кроме своего) и считает одинаковые."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    # Кадры самого раннера и runpy в стеке не нужны: корень — модуль скрипта
+                    if code.co_filename == __file__:
+                        break
+                    if code.co_filename not in _RUNNER_FILES:
+                        stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path: Path):
+        with path.open("w", encoding="utf-8") as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+
+    def hottest(self, top=20):
+        """Самые частые функции на вершине стека (self) и файлы в стеке (inclusive), доля сэмплов."""
+        total = sum(self.stacks.values()) or 1
+        leaf, files = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            leaf[frames[-1]] += count
+            for name in {f.rsplit("(", 1)[-1].split(":")[0] for f in frames[1:]}:
+                files[name] += count
+
+        def shares(counter):
+            return [{"name": name, "share": round(count / total, 4)} for name, count in counter.most_common(top)]
+
+        return {"self": shares(leaf), "files": shares(files)}
+
+
+def _pstats_text(profile, top) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out).strip_dirs()
+    out.write("=== по cumulative ===\n")
+    stats.sort_stats("cumulative").print_stats(top)
+    out.write("\n=== по tottime ===\n")
+    stats.sort_stats("tottime").print_stats(top)
+    return out.getvalue()
+
+
+def _memory_text(snapshot, peak, current, top) -> str:
+    lines = [f"peak: {peak / 1024 / 1024:.2f} MB", f"в конце: {current / 1024 / 1024:.2f} MB", "",
+             f"Топ-{top} мест выделения памяти (живые объекты в конце запуска):"]
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        *(tracemalloc.Filter(False, name) for name in _RUNNER_FILES),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:10.1f} KB  {stat.count:7d} блоков  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+def run_script(script: Path, script_args):
+    """Запускает скрипт как `python script args`; возвращает код выхода."""
+    sys.argv = [str(script), *script_args]
+    # Как при обычном запуске: папка скрипта первой в sys.path (плюс content_engine для legacy/)
+    for path in (BASE_DIR, script.parent):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+    try:
+        runpy.run_path(str(script), run_name="__main__")
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Профилирует скрипт content_engine (cProfile, стеки, память).")
+    parser.add_argument("--out", default=str(PROFILES_DIR), help="Куда складывать профили")
+    parser.add_argument("--top", type=int, default=30, help="Сколько строк в топах")
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL * 1000, help="Шаг сэмплера стеков, мс")
+    parser.add_argument("--no-memory", action="store_true", help="Без tracemalloc (он замедляет запуск)")
+    parser.add_argument("script", help="Скрипт, например seed_lesson_json_my.py")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Аргументы скрипта")
+    args = parser.parse_args()
+
+    script = Path(args.script)
+    if not script.exists():
+        script = BASE_DIR / args.script
+    if not script.exists():
+        parser.error(f"нет такого скрипта: {args.script}")
+    script = script.resolve()
+
+    started_at = datetime.now()
+    run_dir = Path(args.out) / f"{started_at:%Y%m%d-%H%M%S}-{script.stem}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    saved_argv, saved_path = sys.argv[:], sys.path[:]
+
+    sampler = StackSampler(args.interval / 1000.0)
+    profile = cProfile.Profile()
+    if not args.no_memory:
+        tracemalloc.start(10)
+    cpu_started, wall_started = os.times(), time.perf_counter()
+    sampler.start()
+    profile.enable()
+    exit_code, error = None, None
+    try:
+        exit_code = run_script(script, args.args)
+    except BaseException as e:
+        # Упавший скрипт профилируем так же: профиль пишется в finally, исключение летит дальше
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        profile.disable()
+        sampler.stop()
+        wall = time.perf_counter() - wall_started
+        cpu = os.times()
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        write_profile(run_dir, args, script, profile, sampler, {
+            "script": str(script),
+            "args": args.args,
+            "exit_code": exit_code,
+            "error": error,
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "wall_seconds": round(wall, 4),
+            "cpu_user_seconds": round(cpu.user - cpu_started.user, 4),
+            "cpu_system_seconds": round(cpu.system - cpu_started.system, 4),
+        })
+    sys.exit(exit_code)
+
+
+def write_profile(run_dir: Path, args, script: Path, profile, sampler, summary: dict):
+    """Пишет profile.*, memory.txt и summary.json в run_dir и печатает итог в stderr."""
+    summary["waiting_seconds"] = round(max(0.0, summary["wall_seconds"] - summary["cpu_user_seconds"]
+                                           - summary["cpu_system_seconds"]), 4)
+    summary["samples"] = sampler.samples
+    summary["hottest"] = sampler.hottest(args.top)
+
+    if not args.no_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        (run_dir / "memory.txt").write_text(_memory_text(snapshot, peak, current, args.top), encoding="utf-8")
+        summary["memory_peak_mb"] = round(peak / 1024 / 1024, 2)
+
+    # Если скрипт шёл через database_engine, у него есть разбивка по фазам и запросам
+    metrics = sys.modules.get("run_metrics")
+    if metrics is not None and metrics.METRICS.report()["requests_total"]:
+        summary["run_metrics"] = metrics.METRICS.report()
+
+    profile.dump_stats(str(run_dir / "profile.pstats"))
+    (run_dir / "profile.txt").write_text(_pstats_text(profile, args.top), encoding="utf-8")
+    sampler.write_collapsed(run_dir / "profile.collapsed")
+    (run_dir / "summary.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print("\n" + "=" * 60, file=sys.stderr)
+    print(f"⏱️  {script.name}: wall {summary['wall_seconds']}s, CPU {summary['cpu_user_seconds']}s user + "
+          f"{summary['cpu_system_seconds']}s sys, ожидание {summary['waiting_seconds']}s"
+          + (f", пик памяти {summary['memory_peak_mb']} MB" if "memory_peak_mb" in summary else ""),
+          file=sys.stderr)
+    if summary["error"]:
+        print(f"💥 Скрипт упал: {summary['error']}", file=sys.stderr)
+    print(f"📁 Профиль: {run_dir}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
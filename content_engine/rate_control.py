@@ -0,0 +1,256 @@
+"""
+Общий адаптивный ограничитель нагрузки для Supabase и edge-tts.
+
+Каждый AdaptiveLimiter совмещает два механизма:
+  * token bucket — не больше `rate` запросов в секунду;
+  * окно параллельности — не больше `concurrency` запросов одновременно.
+
+Оба параметра подстраиваются по схеме AIMD: пока ответы здоровые, они растут
+(до первой ошибки быстро, как slow start в TCP, потом понемногу — additive
+increase), а на 429 / 5xx / сетевую ошибку падают вдвое (multiplicative
+decrease). Так мы сами находим предел, за которым Supabase начинает
+отдавать 502, а edge-tts — резать скорость.
+
+Работает и из потоков (sync `slot()`), и из asyncio (`async_slot()`),
+поэтому один и тот же лимитер делят db_execute_retry и generate_audio.
+Лимиты можно переопределить через переменные окружения, например
+CONTENT_DB_RATE=20 CONTENT_TTS_CONCURRENCY=3.
+"""
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+# Ошибки, при которых надо притормозить (а не падать сразу)
+_THROTTLE_CODES = re.compile(r"\b(429|500|502|503|504)\b")
+_THROTTLE_WORDS = ("network", "connection", "timeout", "timed out", "rate limit", "too many requests",
+                   "temporarily unavailable")
+
+
+def is_throttle_error(error) -> bool:
+    """True для 429/5xx и сетевых ошибок — их стоит повторить медленнее."""
+    text = str(error).lower()
+    if _THROTTLE_CODES.search(text):
+        return True
+    return any(word in text for word in _THROTTLE_WORDS)
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    try:
+        return float(value) if value else default
+    except ValueError:
+        return default
+
+
+class AdaptiveLimiter:
+    def __init__(self, name, rate, min_rate, max_rate, concurrency, max_concurrency,
+                 increase=1.0, decrease=0.5, cooldown=1.0):
+        self.name = name
+        self.initial_rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.initial_concurrency = float(concurrency)
+        self.max_concurrency = float(max_concurrency)
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Начальный темп и нулевая статистика (между прогонами бенчмарка)."""
+        with self._lock:
+            self.rate = self.initial_rate
+            self.concurrency = self.initial_concurrency
+            self._tokens = 1.0
+            self._refilled_at = time.monotonic()
+            self._last_decrease = 0.0
+            self._slow_start = True
+            self.in_flight = 0
+            self.queue_depth = 0
+            self.max_queue_depth = 0
+            self.successes = 0
+            self.throttled = 0
+            self.errors = 0
+
+    # --- token bucket + окно ---
+
+    def _try_take(self) -> float:
+        """Пытается занять слот. 0 — занят, иначе сколько секунд подождать."""
+        with self._lock:
+            now = time.monotonic()
+            burst = max(1.0, self.rate)
+            self._tokens = min(burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self.in_flight >= int(self.concurrency):
+                return 0.01
+            if self._tokens < 1.0:
+                return (1.0 - self._tokens) / self.rate
+            self._tokens -= 1.0
+            self.in_flight += 1
+            return 0.0
+
+    def _enter_queue(self):
+        with self._lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def _leave_queue(self):
+        with self._lock:
+            self.queue_depth -= 1
+
+    def acquire(self):
+        """Блокирующее ожидание слота (для кода в потоках)."""
+        self._enter_queue()
+        try:
+            while True:
+                wait = self._try_take()
+                if not wait:
+                    return
+                time.sleep(wait)
+        finally:
+            self._leave_queue()
+
+    async def acquire_async(self):
+        """То же для asyncio: ждём через sleep, не блокируя event loop."""
+        self._enter_queue()
+        try:
+            while True:
+                wait = self._try_take()
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            self._leave_queue()
+
+    # --- AIMD ---
+
+    def release(self, outcome="ok"):
+        """outcome: "ok", "throttled" (429/5xx/сеть) или "error" (прочие ошибки)."""
+        with self._lock:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self.successes += 1
+                if self._slow_start:
+                    # До первой ошибки: +1 на каждый успешный ответ (удвоение за "круг")
+                    self.rate = min(self.max_rate, self.rate + self.increase)
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1.0)
+                else:
+                    # +increase к rate примерно за каждую секунду здоровых ответов
+                    self.rate = min(self.max_rate, self.rate + self.increase / max(self.rate, 1.0))
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / max(self.concurrency, 1.0))
+            elif outcome == "throttled":
+                self.throttled += 1
+                now = time.monotonic()
+                # Пачка одновременных ошибок — это одно событие, режем один раз
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self._slow_start = False
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self.concurrency = max(1.0, self.concurrency * self.decrease)
+            else:
+                self.errors += 1
+
+    def backoff(self, attempt, base_delay):
+        """Пауза перед повтором: экспонента от base_delay с джиттером, не больше 30 сек."""
+        return min(30.0, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release("throttled" if is_throttle_error(e) else "error")
+            raise
+        self.release("ok")
+
+    @asynccontextmanager
+    async def async_slot(self):
+        await self.acquire_async()
+        try:
+            yield
+        except BaseException as e:
+            self.release("throttled" if is_throttle_error(e) else "error")
+            raise
+        self.release("ok")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "rate_per_sec": round(self.rate, 2),
+                "concurrency_limit": int(self.concurrency),
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "successes": self.successes,
+                "throttled": self.throttled,
+                "errors": self.errors,
+            }
+
+
+# --- ОБЩИЕ ЛИМИТЕРЫ ДЛЯ ВСЕХ СКРИПТОВ content_engine ---
+
+DB_LIMITER = AdaptiveLimiter(
+    "supabase",
+    rate=_env_float("CONTENT_DB_RATE", 10),
+    min_rate=1,
+    max_rate=_env_float("CONTENT_DB_MAX_RATE", 50),
+    concurrency=_env_float("CONTENT_DB_CONCURRENCY", 4),
+    max_concurrency=_env_float("CONTENT_DB_MAX_CONCURRENCY", 16),
+)
+
+TTS_LIMITER = AdaptiveLimiter(
+    "edge-tts",
+    rate=_env_float("CONTENT_TTS_RATE", 5),
+    min_rate=0.5,
+    max_rate=_env_float("CONTENT_TTS_MAX_RATE", 15),
+    concurrency=_env_float("CONTENT_TTS_CONCURRENCY", 5),
+    max_concurrency=_env_float("CONTENT_TTS_MAX_CONCURRENCY", 10),
+)
+
+
+def execute_with_retry(query, retries=5, delay=2, on_retry=None):
+    """
+    Выполняет запрос к Supabase через DB_LIMITER, повторяя 429/5xx/сетевые ошибки.
+    on_retry(attempt, error) — вызывается перед каждым повтором (для метрик).
+    """
+    last_error = None
+    for attempt in range(retries):
+        try:
+            with DB_LIMITER.slot():
+                return query.execute()
+        except Exception as e:
+            last_error = e
+            if not is_throttle_error(e):
+                raise
+            if attempt == retries - 1:
+                # Попытки кончились — ждать перед ошибкой незачем
+                break
+            if on_retry is not None:
+                on_retry(attempt + 1, e)
+            wait = DB_LIMITER.backoff(attempt, delay)
+            print(f"   ⚠️ DB Network error (попытка {attempt + 1}/{retries}), ждем {wait:.1f} сек...")
+            time.sleep(wait)
+    print(f"❌ Не удалось выполнить запрос после {retries} попыток.")
+    raise last_error
+
+
+def snapshot_all() -> list:
+    return [DB_LIMITER.snapshot(), TTS_LIMITER.snapshot()]
+
+
+def print_summary():
+    """Короткий отчёт для конца запуска: до какого темпа разогнались."""
+    for snap in snapshot_all():
+        if not (snap["successes"] or snap["throttled"] or snap["errors"]):
+            continue
+        print(f"📈 {snap['name']}: {snap['rate_per_sec']} req/s, окно {snap['concurrency_limit']}, "
+              f"очередь max {snap['max_queue_depth']}, ок {snap['successes']}, "
+              f"throttled {snap['throttled']}, ошибок {snap['errors']}")
@@ -0,0 +1,220 @@
+"""
+Метрики запуска сидинга: где уходит время и сколько запросов сделано.
+
+RunMetrics собирает:
+  * время каждого урока и каждой фазы урока (upsert урока, обход item-ов
+    со словарём и озвучкой, word_assets, lesson_items, документ, сводка);
+  * запросы к БД по таблице и операции (select/insert/upsert/update/delete):
+    число, суммарное время, ошибки, повторы и байты отправленных данных;
+  * задачи озвучки: сгенерировано / пропущено (файл уже есть) / ошибки, байты mp3;
+  * снимки лимитеров rate_control и статистику пулов соединений transport
+    (попадания в пул / новые соединения / TLS) на момент отчёта.
+
+Текущий урок и фаза хранятся в contextvars, поэтому запросы из asyncio.to_thread
+и параллельных уроков попадают в свой урок. Фазы разных уроков идут
+одновременно — сумма времени фаз больше общего времени запуска.
+
+Уроки и фазы заодно открывают спаны tracing.TRACER (если трасса включена).
+
+В конце запуска report() отдаёт JSON-отчёт; если задан поток событий
+(open_events), каждое событие сразу пишется строкой JSONL — для дашбордов.
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+import transport
+from rate_control import snapshot_all
+from tracing import TRACER
+
+_current_lesson = ContextVar("current_lesson", default=None)
+_current_phase = ContextVar("current_phase", default=None)
+
+_VERBS = {"GET": "select", "PATCH": "update", "DELETE": "delete"}
+
+
+def current_scope():
+    """(урок, фаза), к которым сейчас относятся запросы."""
+    return _current_lesson.get(), _current_phase.get()
+
+
+def describe_query(query):
+    """(таблица, операция) по query builder-у supabase-py (или storage.SQLiteQuery)."""
+    table = str(getattr(query, "path", "") or "?").strip("/").split("?")[0] or "?"
+    method = str(getattr(query, "http_method", "") or "").upper()
+    if method == "POST":
+        prefer = str((getattr(query, "headers", None) or {}).get("Prefer", ""))
+        return table, "upsert" if "merge-duplicates" in prefer else "insert"
+    return table, _VERBS.get(method, method.lower() or "?")
+
+
+def payload_bytes(query) -> int:
+    payload = getattr(query, "json", None)
+    if not payload:
+        return 0
+    return len(json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def result_rows(query, result) -> int:
+    """Сколько строк затронул запрос: у записи — из payload, у select — из ответа."""
+    payload = getattr(query, "json", None)
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict) and payload:
+        return 1
+    data = getattr(result, "data", None)
+    return len(data) if isinstance(data, list) else 0
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class RunMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = _utc_now()
+            self._started = time.perf_counter()
+            self.requests = defaultdict(lambda: {"count": 0, "seconds": 0.0, "errors": 0, "retries": 0, "bytes": 0})
+            self.phases = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+            self.lessons = {}
+            self.tts = {"generated": 0, "skipped": 0, "failed": 0, "bytes": 0, "seconds": 0.0}
+            self.bytes_written = {"db": 0, "audio": 0}
+
+    # --- поток событий ---
+
+    def open_events(self, path):
+        """Включает запись событий в JSONL (каждая строка сразу на диск)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._events = path.open("a", encoding="utf-8")
+
+    def close(self):
+        if self._events is not None:
+            self._events.close()
+            self._events = None
+
+    def _emit(self, event, **fields):
+        if self._events is None:
+            return
+        record = {"ts": _utc_now(), "event": event, "lesson_id": _current_lesson.get(),
+                  "phase": _current_phase.get(), **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._events is not None:
+                self._events.write(line + "\n")
+                self._events.flush()
+
+    # --- уроки и фазы ---
+
+    def _lesson_entry(self, lesson_id):
+        return self.lessons.setdefault(str(lesson_id), {"seconds": 0.0, "requests": 0, "phases": {}})
+
+    @contextmanager
+    def lesson(self, lesson_id):
+        """Всё, что выполняется внутри (включая потоки), относится к этому уроку."""
+        token = _current_lesson.set(lesson_id)
+        started = time.perf_counter()
+        try:
+            with TRACER.span("lesson", lesson_id=lesson_id):
+                yield
+        finally:
+            seconds = time.perf_counter() - started
+            with self._lock:
+                self._lesson_entry(lesson_id)["seconds"] += seconds
+            self._emit("lesson", seconds=round(seconds, 4))
+            _current_lesson.reset(token)
+
+    @contextmanager
+    def phase(self, name):
+        token = _current_phase.set(name)
+        started = time.perf_counter()
+        try:
+            with TRACER.span(f"phase.{name}"):
+                yield
+        finally:
+            seconds = time.perf_counter() - started
+            lesson_id = _current_lesson.get()
+            with self._lock:
+                total = self.phases[name]
+                total["count"] += 1
+                total["seconds"] += seconds
+                if lesson_id is not None:
+                    phases = self._lesson_entry(lesson_id)["phases"]
+                    phases[name] = phases.get(name, 0.0) + seconds
+            self._emit("phase", seconds=round(seconds, 4))
+            _current_phase.reset(token)
+
+    # --- запросы и озвучка ---
+
+    def request(self, table, verb, seconds, ok=True, sent=0):
+        lesson_id = _current_lesson.get()
+        with self._lock:
+            entry = self.requests[f"{table}.{verb}"]
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["bytes"] += sent
+            if not ok:
+                entry["errors"] += 1
+            self.bytes_written["db"] += sent
+            if lesson_id is not None:
+                self._lesson_entry(lesson_id)["requests"] += 1
+        self._emit("request", table=table, verb=verb, seconds=round(seconds, 4), ok=ok, bytes=sent)
+
+    def retry(self, table, verb, attempt, error):
+        with self._lock:
+            self.requests[f"{table}.{verb}"]["retries"] += 1
+        self._emit("retry", table=table, verb=verb, attempt=attempt, error=str(error)[:200])
+
+    def tts_job(self, outcome, filename, size=0, seconds=0.0):
+        """outcome: "generated", "skipped" или "failed"; seconds — время синтеза."""
+        with self._lock:
+            self.tts[outcome] += 1
+            self.tts["bytes"] += size
+            self.tts["seconds"] += seconds
+            self.bytes_written["audio"] += size
+        self._emit("tts", outcome=outcome, file=filename, bytes=size, seconds=round(seconds, 4))
+
+    # --- отчёт ---
+
+    def report(self) -> dict:
+        with self._lock:
+            requests = {k: {**v, "seconds": round(v["seconds"], 4)} for k, v in sorted(self.requests.items())}
+            return {
+                "started_at": self.started_at,
+                "wall_seconds": round(time.perf_counter() - self._started, 4),
+                "requests_total": sum(v["count"] for v in requests.values()),
+                "retries_total": sum(v["retries"] for v in requests.values()),
+                "requests": requests,
+                "phases": {k: {**v, "seconds": round(v["seconds"], 4)} for k, v in sorted(self.phases.items())},
+                "lessons": {
+                    k: {"seconds": round(v["seconds"], 4), "requests": v["requests"],
+                        "phases": {p: round(s, 4) for p, s in v["phases"].items()}}
+                    for k, v in sorted(self.lessons.items())
+                },
+                "tts": {**self.tts, "seconds": round(self.tts["seconds"], 4)},
+                "bytes_written": dict(self.bytes_written),
+                "limiters": snapshot_all(),
+                "transport": transport.snapshot(),
+            }
+
+    def write_report(self, path) -> dict:
+        report = self.report()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        return report
+
+
+# Общие метрики процесса (как лимитеры в rate_control)
+METRICS = RunMetrics()
@@ -0,0 +1,75 @@
+"""
+Журнал прогресса сидинга (для --resume).
+
+Append-only JSONL файл: одна строка = одна завершённая операция.
+  * "lesson" — урок загружен целиком (ключ: хэш контента урока)
+  * "audio"  — аудио-файл готов (ключ: хэш текста, имени файла и голоса)
+  * "db"     — запись в БД выполнена (ключ: хэш таблицы, операции и данных)
+  * "lookup" — результат поиска по dictionary (ключ: кхмерское слово)
+
+Каждая строка сразу сбрасывается на диск, поэтому после падения, 502 или
+Ctrl-C следующий запуск с --resume пропускает всё, что уже было сделано.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+JOURNAL_DIR = Path(__file__).resolve().parent / ".seed_journal"
+
+
+def content_hash(*parts) -> str:
+    """Стабильный хэш от любых JSON-совместимых данных."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def default_journal_path(content_path: Path) -> Path:
+    return JOURNAL_DIR / f"{Path(content_path).stem}.jsonl"
+
+
+class SeedJournal:
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._entries = {}
+        self.loaded = 0
+
+        if resume:
+            self._load()
+
+        # Без --resume начинаем журнал заново
+        self._handle = self.path.open("a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    # Последняя строка могла оборваться при падении
+                    continue
+                self._entries[(rec["kind"], rec["key"])] = rec.get("value")
+                self.loaded += 1
+
+    def done(self, kind: str, key: str) -> bool:
+        return (kind, key) in self._entries
+
+    def get(self, kind: str, key: str, default=None):
+        return self._entries.get((kind, key), default)
+
+    def record(self, kind: str, key: str, value=None):
+        self._entries[(kind, key)] = value
+        rec = {"kind": kind, "key": key}
+        if value is not None:
+            rec["value"] = value
+        self._handle.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._handle.flush()
+
+    def count(self, kind: str) -> int:
+        return sum(1 for k, _ in self._entries if k == kind)
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
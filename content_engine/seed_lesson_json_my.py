@@ -1,18 +1,45 @@
 import argparse
 import asyncio
-import json
 import sys
+from collections import defaultdict
 from pathlib import Path
 
-from database_engine import seed_lesson, update_study_materials
+from content_stream import ChapterStream
+from database_engine import seed_lesson, update_study_materials, use_dictionary_mirror, use_storage
+from dictionary_mirror import MIRROR_PATH, DictionaryMirror
+from rate_control import print_summary as print_rate_summary
+from run_metrics import METRICS
+from seed_journal import SeedJournal, content_hash, default_journal_path
+from storage import MissingCredentials, get_client
+from tracing import TRACER
+from transport import close_tts, print_summary as print_transport_summary
 
+# Типы, которые читает update_study_materials (остальное для сводки не нужно)
+SUMMARY_ITEM_TYPES = ("theory", "vocab_card")
 
-def load_content(content_path: Path):
-    """Загружает JSON контент из файла."""
-    if not content_path.exists():
-        raise FileNotFoundError(f"Content file not found: {content_path}")
-    with content_path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+
+def summary_projection(lesson_data: dict) -> dict:
+    """Оставляет от урока только поля, нужные для сводки главы."""
+    return {
+        "title": lesson_data.get("title", ""),
+        "content": [item for item in lesson_data.get("content") or []
+                    if item.get("type") in SUMMARY_ITEM_TYPES],
+    }
+
+
+def summary_item_data(content) -> list:
+    """data item-ов сводки после seed_lesson (с именами аудио) — пишется в журнал вместе с уроком."""
+    return [item.get("data") for item in content or [] if item.get("type") in SUMMARY_ITEM_TYPES]
+
+
+def restore_summary_item_data(content, stored) -> bool:
+    """Возвращает item-ам сводки data из журнала: пропущенный урок не проходит через seed_lesson."""
+    items = [item for item in content or [] if item.get("type") in SUMMARY_ITEM_TYPES]
+    if stored is None or len(stored) != len(items):
+        return False
+    for item, data in zip(items, stored):
+        item["data"] = data
+    return True
 
 
 def ask_for_content_file(base_dir: Path) -> Path:
@@ -49,6 +76,158 @@ def ask_for_content_file(base_dir: Path) -> Path:
             print(f"   ❌ Ошибка ввода: {e}")
 
 
+class SeedRun:
+    """
+    Параллельная загрузка уроков из одного или нескольких файлов.
+
+    * не больше `concurrency` уроков грузятся одновременно;
+    * уроки с одинаковым lesson_id (из разных файлов) идут строго по порядку файлов;
+    * order_index берётся из позиции в файле, а не из порядка завершения;
+    * сводка модуля строится один раз, когда все его уроки закончены.
+    """
+
+    def __init__(self, args, journal, concurrency):
+        self.args = args
+        self.journal = journal
+        self.sem = asyncio.Semaphore(concurrency)
+        # Ограничиваем число прочитанных, но ещё не загруженных уроков (память)
+        self.slots = asyncio.Semaphore(concurrency * 2)
+        self.lesson_tails = {}
+        self.module_tasks = defaultdict(list)
+        self.summary_payloads = defaultdict(dict)
+        # Модули, где урок пропущен по журналу без сохранённых item-ов: сводку не трогаем
+        self.stale_modules = set()
+        self.total_count = 0
+        self.processed_count = 0
+
+    async def submit(self, lesson_idx, lesson_data, chapter_id):
+        """Планирует загрузку одного урока (ждёт, если очередь заполнена)."""
+        args = self.args
+        self.total_count += 1
+
+        lesson_id_in_file = lesson_data.get("lesson_id")
+        module_id = args.module_id or lesson_data.get("module_id") or chapter_id
+        if args.update_summary and lesson_id_in_file is not None and module_id is not None:
+            # Ссылки на те же item-ы: seed_lesson допишет в них audio
+            self.summary_payloads[module_id][int(lesson_id_in_file)] = summary_projection(lesson_data)
+
+        if args.only_lesson_id is not None:
+            if int(lesson_id_in_file or 0) != int(args.only_lesson_id):
+                return
+
+        content = lesson_data.get("content")
+        lesson_id = args.lesson_id or lesson_data.get("lesson_id")
+        title = args.title or lesson_data.get("title")
+        desc = args.desc or lesson_data.get("desc")
+        order_index = args.order_index if args.order_index is not None else lesson_data.get("order_index",
+                                                                                            lesson_idx - 1)
+
+        if not content:
+            print(f"⚠️ Урок {lesson_idx}: Нет контента, пропускаю")
+            return
+
+        if not lesson_id:
+            print(f"⚠️ Урок {lesson_idx}: Нет lesson_id, пропускаю")
+            return
+
+        await self.slots.acquire()
+        prev = self.lesson_tails.get(int(lesson_id))
+        task = asyncio.ensure_future(self._seed_one(
+            prev, int(lesson_id), title or f"Lesson {lesson_id}", desc or "", content, module_id, order_index))
+        task.add_done_callback(lambda _: self.slots.release())
+        self.lesson_tails[int(lesson_id)] = task
+        if module_id is not None:
+            self.module_tasks[module_id].append(task)
+
+    async def _seed_one(self, prev, lesson_id, title, desc, content, module_id, order_index):
+        if prev is not None:
+            # Тот же урок из предыдущего файла должен записаться раньше
+            await asyncio.gather(prev, return_exceptions=True)
+
+        # Хэш считаем до seed_lesson: он дописывает в content имена аудио
+        lesson_key = content_hash(lesson_id, title, desc, module_id, order_index, content)
+        if self.journal.done("lesson", lesson_key):
+            print(f"⏭️  Урок {lesson_id} уже загружен (журнал), пропускаю")
+            # В сводку модуля должны попасть обработанные item-ы, а не исходные
+            if not restore_summary_item_data(content, self.journal.get("lesson", lesson_key)) \
+                    and module_id is not None and summary_item_data(content):
+                self.stale_modules.add(module_id)
+            self.processed_count += 1
+            return
+
+        async with self.sem:
+            try:
+                await seed_lesson(
+                    lesson_id,
+                    title,
+                    desc,
+                    content,
+                    module_id=module_id,
+                    order_index=order_index,
+                    journal=self.journal,
+                    io=self.make_io(),
+                )
+                self.journal.record("lesson", lesson_key, summary_item_data(content))
+                self.processed_count += 1
+            except Exception as e:
+                print(f"❌ ОШИБКА при обработке урока {lesson_id}: {e}")
+
+    def make_io(self):
+        """SeedIO для урока; None — обычный (Supabase + edge-tts)."""
+        return None
+
+    async def _finish_module(self, module_id):
+        await asyncio.gather(*self.module_tasks.get(module_id, []), return_exceptions=True)
+        if module_id in self.stale_modules:
+            print(f"\n⚠️ Модуль {module_id}: в журнале нет обработанных item-ов пропущенных уроков, "
+                  f"study_materials не обновляю (запустите без --resume)")
+            return
+        print(f"\n🔄 Обновляю study_materials для модуля {module_id}...")
+        try:
+            await update_study_materials(module_id, self.summary_payloads[module_id])
+        except Exception as e:
+            print(f"⚠️ Не удалось обновить study_materials: {e}")
+
+    async def finish(self):
+        """Дожидается всех уроков; сводки модулей строятся параллельно."""
+        finishers = []
+        if self.args.update_summary:
+            finishers = [self._finish_module(module_id) for module_id in self.summary_payloads]
+        await asyncio.gather(*finishers, *self.lesson_tails.values(), return_exceptions=True)
+
+
+def collect_content_files(args) -> list:
+    """Список файлов для режима папки (--all / --content-glob)."""
+    base_dir = Path(args.content_dir)
+    pattern = args.content_glob or "*.json"
+    return sorted(p for p in base_dir.glob(pattern) if p.is_file())
+
+
+async def feed_lessons(run, content_files, directory_mode) -> list:
+    """Читает файлы потоково и отдаёт уроки в run. Возвращает непрочитанные файлы."""
+    failed_files = []
+    for content_path in content_files:
+        print(f"⏳ Читаю {content_path.name} потоково (урок за уроком)...\n")
+        try:
+            stream = ChapterStream(content_path)
+            for lesson_idx, lesson_data in enumerate(stream, 1):
+                if lesson_idx == 1:
+                    if stream.kind == "chapter":
+                        print(f"📚 Обнаружена глава JSON: {stream.meta.get('title', 'No title')}")
+                    elif stream.kind == "lesson":
+                        print(f"📖 Обнаружен одиночный урок JSON")
+                    else:
+                        print(f"📋 Обнаружен список контента")
+                chapter_id = stream.meta.get("chapter_id") or stream.meta.get("id")
+                await run.submit(lesson_idx, lesson_data, chapter_id)
+        except Exception as e:
+            print(f"❌ ОШИБКА при чтении JSON {content_path.name}: {e}")
+            failed_files.append(content_path)
+            if not directory_mode:
+                sys.exit(1)
+    return failed_files
+
+
 async def async_main():
     print("\n" + "=" * 60)
     print("🚀 KHMER LESSON SEEDER - Загрузчик уроков")
@@ -69,6 +248,21 @@ async def async_main():
         default="content_json",
         help="Папка с JSON файлами (по умолчанию: content_json)",
     )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Загрузить все JSON файлы из --content-dir",
+    )
+    parser.add_argument(
+        "--content-glob",
+        help="Загрузить файлы из --content-dir по маске (например, 'lesson_101*.json')",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Сколько уроков загружать одновременно (по умолчанию: 4)",
+    )
     parser.add_argument("--module-id", type=int, help="ID модуля (главы)")
     parser.add_argument("--order-index", type=int, help="Порядок урока в модуле")
     parser.add_argument(
@@ -81,108 +275,135 @@ async def async_main():
         type=int,
         help="Если JSON содержит несколько уроков, обработать только этот lesson_id",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Продолжить прерванный запуск: пропустить уроки, аудио и записи из журнала",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Путь к журналу прогресса (по умолчанию: .seed_journal/<имя файла>.jsonl)",
+    )
+    parser.add_argument(
+        "--dict-mirror",
+        nargs="?",
+        const=str(MIRROR_PATH),
+        help="Искать слова в локальном зеркале dictionary (перед запуском догружаются изменения)",
+    )
+    parser.add_argument(
+        "--storage",
+        help="Куда писать: supabase или sqlite[:путь] (по умолчанию: CONTENT_STORAGE или supabase)",
+    )
+    parser.add_argument(
+        "--report",
+        help="JSON-отчёт о запуске: время уроков и фаз, запросы, TTS (по умолчанию: рядом с журналом)",
+    )
+    parser.add_argument(
+        "--events",
+        help="Писать события запуска (запросы, повторы, TTS, фазы) в JSONL файл",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Ничего не менять: показать запросы к БД и задачи озвучки, которые выполнит запуск, и оценку времени",
+    )
+    parser.add_argument("--plan-out", help="Куда писать план в JSON (по умолчанию: рядом с журналом)")
+    parser.add_argument("--plan-summary", action="store_true", help="С --plan: только итоги по урокам, без операций")
+    parser.add_argument(
+        "--trace",
+        help="Трасса запуска: *.json — Chrome trace (chrome://tracing, Perfetto), *.jsonl — спан на строку",
+    )
 
     args = parser.parse_args()
-
-    # Pick content file path (explicit or interactive)
-    if args.content:
-        content_path = Path(args.content)
-        print(f"📄 JSON файл: {content_path.resolve()}")
+    directory_mode = args.all or bool(args.content_glob)
+    if directory_mode and (args.content or args.lesson_id or args.title or args.desc
+                           or args.order_index is not None):
+        parser.error("--all/--content-glob нельзя сочетать с --content, --lesson-id, --title, --desc, --order-index")
+    if args.concurrency < 1:
+        parser.error("--concurrency должен быть >= 1")
+
+    # Pick content file path(s): directory mode, explicit or interactive
+    if directory_mode:
+        content_files = collect_content_files(args)
+        if not content_files:
+            print(f"❌ ОШИБКА: Нет JSON файлов в {Path(args.content_dir).resolve()}")
+            sys.exit(1)
+        print(f"📂 Режим папки: {len(content_files)} файл(ов), параллельно до {args.concurrency} уроков")
+        journal_path = Path(args.journal) if args.journal else default_journal_path(Path(args.content_dir).resolve())
+    elif args.content:
+        content_files = [Path(args.content)]
+        print(f"📄 JSON файл: {content_files[0].resolve()}")
+        journal_path = Path(args.journal) if args.journal else default_journal_path(content_files[0])
     else:
         print(f"📂 Интерактивный выбор файла...")
-        content_path = ask_for_content_file(Path(args.content_dir))
-
-    print(f"⏳ Загружаю JSON файл...\n")
-
+        content_files = [ask_for_content_file(Path(args.content_dir))]
+        journal_path = Path(args.journal) if args.journal else default_journal_path(content_files[0])
+
+    if args.plan:
+        from seed_plan import run_plan
+
+        await run_plan(args, content_files, journal_path, directory_mode)
+        return
+
+    if args.storage:
+        use_storage(args.storage)
+        print(f"🗄️  Хранилище: {args.storage}\n")
+    # Клиент создаётся лениво; ошибку ключей показываем до начала работы
+    client = get_client()
+
+    journal = SeedJournal(journal_path, resume=args.resume)
+    report_path = Path(args.report) if args.report else journal_path.with_suffix(".report.json")
+    if args.events:
+        METRICS.open_events(args.events)
+    if args.trace:
+        TRACER.open(args.trace)
+    if args.resume:
+        print(f"♻️  Продолжаю по журналу {journal_path} "
+              f"(уроков: {journal.count('lesson')}, аудио: {journal.count('audio')}, "
+              f"записей в БД: {journal.count('db')})\n")
+
+    if args.dict_mirror:
+        mirror = DictionaryMirror(args.dict_mirror)
+        fetched = await asyncio.to_thread(mirror.sync, client)
+        use_dictionary_mirror(mirror)
+        print(f"📖 Зеркало dictionary: {mirror.count()} слов (обновлено: {fetched})\n")
+
+    run = SeedRun(args, journal, args.concurrency)
+
+    # 1-2. ЧИТАЕМ ФАЙЛЫ ПОТОКОВО И СРАЗУ ОТДАЁМ УРОКИ В ОЧЕРЕДЬ
     try:
-        payload = load_content(content_path)
-    except Exception as e:
-        print(f"❌ ОШИБКА при загрузке JSON: {e}")
-        sys.exit(1)
-
-    lessons_to_process = []
-
-    # 1. Проверяем: это вся глава или один урок?
-    if isinstance(payload, dict) and "lessons" in payload:
-        print(f"📚 Обнаружена глава JSON: {payload.get('title', 'No title')}")
-        lessons_to_process = payload.get("lessons", [])
-        chapter_id = payload.get("chapter_id") or payload.get("id")
-    elif isinstance(payload, dict):
-        # Если в файле один урок
-        print(f"📖 Обнаружен одиночный урок JSON")
-        lessons_to_process = [payload]
-        chapter_id = None
-    else:
-        # Если просто список [{}, {}]
-        print(f"📋 Обнаружен список контента")
-        lessons_to_process = [{"content": payload}]
-        chapter_id = None
-
-    if not lessons_to_process:
-        print("❌ ОШИБКА: В JSON файле нет уроков для обработки.")
-        sys.exit(1)
-
-    print(f"📌 К обработке: {len(lessons_to_process)} урок(ов)\n")
-
-    # 2. ЗАПУСКАЕМ ЦИКЛ ПО ВСЕМ НАЙДЕННЫМ УРОКАМ
-    processed_count = 0
-    for lesson_idx, lesson_data in enumerate(lessons_to_process, 1):
-        lesson_id_in_file = lesson_data.get("lesson_id")
+        failed_files = await feed_lessons(run, content_files, directory_mode)
 
-        if args.only_lesson_id is not None:
-            if int(lesson_id_in_file or 0) != int(args.only_lesson_id):
-                continue
-
-
-        content = lesson_data.get("content")
-        lesson_id = args.lesson_id or lesson_data.get("lesson_id")
-        title = args.title or lesson_data.get("title")
-        desc = args.desc or lesson_data.get("desc")
-
-        # Определяем ID главы (module_id)
-        module_id = args.module_id or lesson_data.get("module_id") or chapter_id
-        order_index = args.order_index if args.order_index is not None else lesson_data.get("order_index",
-                                                                                            lesson_idx - 1)
-
-        if not content:
-            print(f"⚠️ Урок {lesson_idx}: Нет контента, пропускаю")
-            continue
+        if not run.total_count:
+            print("❌ ОШИБКА: В JSON файле нет уроков для обработки.")
+            sys.exit(1)
 
-        if not lesson_id:
-            print(f"⚠️ Урок {lesson_idx}: Нет lesson_id, пропускаю")
-            continue
-
-        # Загружаем текущий урок
-        try:
-            await seed_lesson(
-                int(lesson_id),
-                title or f"Lesson {lesson_id}",
-                desc or "",
-                content,
-                module_id=module_id,
-                order_index=order_index,
-            )
-            processed_count += 1
-        except Exception as e:
-            print(f"❌ ОШИБКА при обработке урока {lesson_id}: {e}")
-            continue
-
-    # 3. Обновляем итоговую книжечку для всей главы
-    if args.update_summary and module_id is not None:
-        print(f"\n🔄 Обновляю study_materials для модуля {module_id}...")
-        # Собираем данные всех уроков для суммаризации
-        summary_payload = {int(l["lesson_id"]): l for l in lessons_to_process if "lesson_id" in l}
-        try:
-            await update_study_materials(module_id, summary_payload)
-        except Exception as e:
-            print(f"⚠️ Не удалось обновить study_materials: {e}")
+        # 3. Дожидаемся уроков и обновляем итоговые книжечки модулей
+        await run.finish()
+    finally:
+        journal.close()
+        await close_tts()
+        report = METRICS.write_report(report_path)
+        METRICS.close()
+        TRACER.close()
 
     # 4. Финальный отчёт
     print("\n" + "=" * 60)
-    if processed_count == len(lessons_to_process):
-        print(f"✅ УСПЕХ! Загружено {processed_count}/{len(lessons_to_process)} уроков")
+    if run.processed_count == run.total_count and not failed_files:
+        print(f"✅ УСПЕХ! Загружено {run.processed_count}/{run.total_count} уроков")
     else:
-        print(f"⚠️ Частичный успех: Загружено {processed_count}/{len(lessons_to_process)} уроков")
+        print(f"⚠️ Частичный успех: Загружено {run.processed_count}/{run.total_count} уроков")
+        for path in failed_files:
+            print(f"   ❌ Не прочитан файл: {path.name}")
+    print_rate_summary()
+    print_transport_summary()
+    phases = ", ".join(f"{name} {p['seconds']:.1f}s" for name, p in report["phases"].items())
+    print(f"📊 Запросов: {report['requests_total']}, повторов: {report['retries_total']}, "
+          f"TTS: {report['tts']['generated']} новых / {report['tts']['failed']} ошибок"
+          + (f"; фазы: {phases}" if phases else ""))
+    print(f"📊 Отчёт: {report_path}")
+    if args.trace:
+        print(f"🧭 Трасса: {args.trace}")
     print("=" * 60 + "\n")
 
 
@@ -192,6 +413,9 @@ def main():
     except KeyboardInterrupt:
         print("\n\n⚠️ Прервано пользователем.")
         sys.exit(0)
+    except MissingCredentials as e:
+        print(f"❌ ОШИБКА: {e}")
+        sys.exit(1)
     except Exception as e:
         print(f"\n❌ КРИТИЧЕСКАЯ ОШИБКА: {e}")
         import traceback
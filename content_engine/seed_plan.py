@@ -0,0 +1,466 @@
+"""
+План сидинга без сети: seed_lesson_json_my.py --plan.
+
+Запуск идёт по тому же пути, что и настоящий (SeedRun → seed_lesson →
+prepare_lesson_items → sync_* → update_study_materials), но:
+  * БД — SQLite в памяти (PlanClient), которая записывает каждый запрос:
+    урок, фаза, таблица, операция, строк, байт. В память сначала копируется
+    базовая БД, и план считается относительно неё: --storage sqlite:путь, иначе
+    снимок Supabase (SNAPSHOT_PATH, `python seed_plan.py --snapshot`), иначе
+    staging.sqlite последнего export_copy.py. Без базы план считается от пустой
+    БД, и полные перезаписи lesson_items не ищутся — ими был бы каждый урок;
+  * озвучка — PlanIO: задачи TTS только записываются (файл уже есть,
+    та же задача уже в плане, новая задача), edge-tts не вызывается;
+  * журнал (--resume) читается, но не пишется; зеркало dictionary
+    (--dict-mirror) копируется в память.
+
+По записанному плану ищутся лишние операции: одно аудио, запрошенное
+несколько раз; один текст, озвучиваемый в разные файлы; одно имя файла для
+разных текстов; повторные поиски и записи одного слова dictionary;
+уроки, которые будут переписаны целиком.
+
+Время оценивается по средним задержкам из отчёта прошлого запуска
+(<журнал>.report.json, см. run_metrics), а без него — по DEFAULT_*_LATENCY.
+План пишется в <журнал>.plan.json (или --plan-out).
+
+Снимок Supabase для плана (читает таблицы сидинга, ничего не пишет):
+  python seed_plan.py --snapshot
+"""
+import argparse
+import contextlib
+import io
+import json
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from dictionary_mirror import DictionaryMirror
+from rate_control import DB_LIMITER, TTS_LIMITER, execute_with_retry
+from run_metrics import current_scope, describe_query, payload_bytes, result_rows
+from seed_journal import JOURNAL_DIR, SeedJournal
+from storage import DEFAULT_SQLITE_PATH, SCHEMA, SQLiteClient, is_sqlite, set_client, storage_spec
+
+# Задержки, если отчёта прошлого запуска нет (секунды на операцию)
+DEFAULT_DB_LATENCY = 0.15
+DEFAULT_TTS_LATENCY = 2.0
+
+STUDY_MATERIALS_SCOPE = "study_materials"
+
+SNAPSHOT_PATH = DEFAULT_SQLITE_PATH.with_name("plan_snapshot.sqlite")
+# Таблицы, которые сидинг читает перед записью
+SNAPSHOT_TABLES = ("modules", "lessons", "lesson_items", "dictionary", "word_assets",
+                   "study_materials", "lesson_documents")
+SNAPSHOT_PAGE_SIZE = 1000
+
+
+class PlanJournal(SeedJournal):
+    """Журнал только для чтения: то, что «выполнил» план, остаётся в памяти."""
+
+    def __init__(self, path: Path, resume=False):
+        self.path = Path(path)
+        self._entries = {}
+        self.loaded = 0
+        if resume:
+            self._load()
+
+    def record(self, kind, key, value=None):
+        self._entries[(kind, key)] = value
+
+    def close(self):
+        pass
+
+
+class Plan:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lessons = {}
+        self.scopes = defaultdict(lambda: {"db": [], "tts": [], "lookups": []})
+        self.audio_jobs = set()
+
+    def _scope(self):
+        lesson_id, _ = current_scope()
+        return lesson_id if lesson_id is not None else STUDY_MATERIALS_SCOPE
+
+    def lesson(self, lesson_id, title, module_id, items):
+        with self._lock:
+            self.lessons[lesson_id] = {"title": title, "module_id": module_id, "items": items}
+
+    def db(self, table, verb, rows, sent):
+        _, phase = current_scope()
+        with self._lock:
+            self.scopes[self._scope()]["db"].append(
+                {"table": table, "op": verb, "rows": rows, "bytes": sent, "phase": phase})
+
+    def tts(self, filename, text, status):
+        with self._lock:
+            self.scopes[self._scope()]["tts"].append({"file": filename, "text": text, "status": status})
+
+    def lookup(self, khmer, source):
+        with self._lock:
+            self.scopes[self._scope()]["lookups"].append({"khmer": khmer, "source": source})
+
+
+class PlanClient(SQLiteClient):
+    """SQLite в памяти, которая записывает каждый запрос в план."""
+
+    def __init__(self, plan: Plan, baseline=None):
+        super().__init__(":memory:")
+        self.plan = plan
+        if baseline is not None:
+            source = sqlite3.connect(str(baseline))
+            source.backup(self._conn)
+            source.close()
+            self._conn.executescript(SCHEMA)
+
+    def _execute(self, query):
+        result = super()._execute(query)
+        table, verb = describe_query(query)
+        self.plan.db(table, verb, result_rows(query, result), payload_bytes(query))
+        return result
+
+
+def _plan_io_class(plan: Plan):
+    import database_engine
+    from database_engine import AUDIO_DIR, SeedIO, audio_job_key, ensure_mp3, tts_text
+
+    class PlanIO(SeedIO):
+        """Как SeedIO, но озвучку только записывает в план."""
+
+        async def lookup(self, khmer):
+            if database_engine._dictionary_mirror is not None:
+                source = "mirror"
+            elif self.journal is not None and self.journal.done("lookup", khmer):
+                source = "journal"
+            else:
+                source = "db"
+            plan.lookup(khmer, source)
+            return await super().lookup(khmer)
+
+        async def audio(self, text, filename):
+            filename = ensure_mp3(filename)
+            key = audio_job_key(text, filename)
+            # Как _synthesize: решает файл на диске, запись журнала без файла озвучку не отменяет
+            if (AUDIO_DIR / filename).exists():
+                status = "exists"
+            elif not tts_text(text):
+                status = "empty"
+            elif key in plan.audio_jobs:
+                # Настоящий запуск озвучит файл один раз, повтор найдёт его на диске
+                status = "planned"
+            else:
+                status = "new"
+                plan.audio_jobs.add(key)
+            plan.tts(filename, tts_text(text), status)
+
+    return PlanIO
+
+
+def _plan_run_class(plan: Plan):
+    from seed_lesson_json_my import SeedRun
+
+    plan_io = _plan_io_class(plan)
+
+    class PlanRun(SeedRun):
+        def make_io(self):
+            return plan_io(self.journal)
+
+        async def _seed_one(self, prev, lesson_id, title, desc, content, module_id, order_index):
+            plan.lesson(lesson_id, title, module_id, len(content))
+            await super()._seed_one(prev, lesson_id, title, desc, content, module_id, order_index)
+
+    return PlanRun
+
+
+@contextlib.contextmanager
+def unthrottled(*limiters):
+    """План не ходит в сеть — лимиты темпа ему не нужны (исходные нужны для оценки времени)."""
+    saved = [(l, l.initial_rate, l.max_rate, l.initial_concurrency, l.max_concurrency) for l in limiters]
+    for limiter in limiters:
+        limiter.initial_rate = limiter.max_rate = 1e6
+        limiter.initial_concurrency = limiter.max_concurrency = 64
+        limiter.reset()
+    try:
+        yield
+    finally:
+        for limiter, rate, max_rate, concurrency, max_concurrency in saved:
+            limiter.initial_rate, limiter.max_rate = rate, max_rate
+            limiter.initial_concurrency, limiter.max_concurrency = concurrency, max_concurrency
+            limiter.reset()
+
+
+# --- ОЦЕНКА ВРЕМЕНИ ---
+
+def load_latencies(report_path: Path) -> dict:
+    """Средние задержки из отчёта run_metrics: {"table.op": s, "*": s, "tts": s, "source": путь}."""
+    candidates = [report_path] + sorted(JOURNAL_DIR.glob("*.report.json"),
+                                        key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in candidates:
+        if not path or not path.exists():
+            continue
+        try:
+            report = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        requests = report.get("requests") or {}
+        count = sum(r["count"] for r in requests.values())
+        if not count:
+            continue
+        latencies = {key: r["seconds"] / r["count"] for key, r in requests.items() if r["count"]}
+        latencies["*"] = sum(r["seconds"] for r in requests.values()) / count
+        tts = report.get("tts") or {}
+        latencies["tts"] = (tts.get("seconds", 0) / tts["generated"]) if tts.get("generated") and tts.get("seconds") \
+            else DEFAULT_TTS_LATENCY
+        latencies["source"] = str(path)
+        return latencies
+    return {"*": DEFAULT_DB_LATENCY, "tts": DEFAULT_TTS_LATENCY, "source": None}
+
+
+def scope_seconds(scope, latencies) -> float:
+    db = sum(latencies.get(f"{op['table']}.{op['op']}", latencies["*"]) for op in scope["db"])
+    tts = latencies["tts"] * sum(1 for job in scope["tts"] if job["status"] == "new")
+    return db + tts
+
+
+def estimate(plan: Plan, latencies, concurrency, db_limits, tts_limits) -> dict:
+    """Грубая оценка: уроки идут по concurrency параллельно, но не быстрее лимитов темпа."""
+    lesson_seconds = [scope_seconds(s, latencies) for key, s in plan.scopes.items() if key != STUDY_MATERIALS_SCOPE]
+    tail = scope_seconds(plan.scopes[STUDY_MATERIALS_SCOPE], latencies) if STUDY_MATERIALS_SCOPE in plan.scopes else 0
+    db_ops = sum(len(s["db"]) for s in plan.scopes.values())
+    tts_jobs = sum(1 for s in plan.scopes.values() for job in s["tts"] if job["status"] == "new")
+    parallel = max(sum(lesson_seconds) / max(1, concurrency), max(lesson_seconds, default=0))
+    floor = max(db_ops / db_limits[0], tts_jobs / tts_limits[0])
+    return {
+        "serial_seconds": round(sum(lesson_seconds) + tail, 2),
+        "estimated_seconds": round(max(parallel, floor) + tail, 2),
+        "rate_floor_seconds": round(floor, 2),
+    }
+
+
+# --- ЛИШНИЕ ОПЕРАЦИИ ---
+
+def findings(plan: Plan, baseline=True) -> dict:
+    by_file = defaultdict(list)
+    texts_by_file = defaultdict(set)
+    files_by_text = defaultdict(set)
+    lookups = Counter()
+    db_lookups = Counter()
+    for scope_key, scope in plan.scopes.items():
+        for job in scope["tts"]:
+            by_file[job["file"]].append(scope_key)
+            texts_by_file[job["file"]].add(job["text"])
+            if job["status"] == "new":
+                files_by_text[job["text"]].add(job["file"])
+        for lookup in scope["lookups"]:
+            lookups[lookup["khmer"]] += 1
+            if lookup["source"] == "db":
+                db_lookups[lookup["khmer"]] += 1
+
+    full_rewrites = []
+    # От пустой БД каждый урок пишется целиком — это не находка
+    for lesson_id, lesson in sorted(plan.lessons.items()) if baseline else ():
+        written = sum(op["rows"] for op in plan.scopes.get(lesson_id, {}).get("db", [])
+                      if op["table"] == "lesson_items" and op["op"] in ("insert", "upsert", "update"))
+        if lesson["items"] and written >= lesson["items"]:
+            full_rewrites.append(lesson_id)
+
+    return {
+        "audio_requested_repeatedly": {f: len(s) for f, s in sorted(by_file.items()) if len(s) > 1},
+        "same_text_in_several_files": {t: sorted(f) for t, f in sorted(files_by_text.items()) if len(f) > 1},
+        "file_with_several_texts": {f: sorted(t) for f, t in sorted(texts_by_file.items()) if len(t) > 1},
+        "dictionary_keys_repeated": {k: n for k, n in sorted(lookups.items()) if n > 1},
+        "dictionary_db_lookups_repeated": {k: n for k, n in sorted(db_lookups.items()) if n > 1},
+        "full_rewrites": full_rewrites,
+    }
+
+
+# --- ВЫВОД ---
+
+def _op_counts(ops) -> str:
+    counts = Counter(f"{op['table']}.{op['op']}" for op in ops)
+    return ", ".join(f"{name}×{n}" for name, n in sorted(counts.items())) or "нет"
+
+
+def print_plan(plan: Plan, result: dict, show_ops=True):
+    latencies = result["latencies"]
+    for key in sorted(plan.scopes, key=lambda k: (k == STUDY_MATERIALS_SCOPE, str(k))):
+        scope = plan.scopes[key]
+        lesson = plan.lessons.get(key)
+        title = f"Урок {key} «{lesson['title']}»" if lesson else "Сводки модулей (study_materials)"
+        new_tts = [job for job in scope["tts"] if job["status"] == "new"]
+        print(f"\n📘 {title}: запросов {len(scope['db'])}, TTS новых {len(new_tts)} из {len(scope['tts'])}, "
+              f"~{scope_seconds(scope, latencies):.1f}s")
+        if not show_ops:
+            continue
+        for op in scope["db"]:
+            print(f"   🗄️  {op['table']}.{op['op']}: строк {op['rows']}, {op['bytes']} B ({op['phase']})")
+        for job in new_tts:
+            print(f"   🎙️ {job['file']}: {job['text']}")
+        skipped = Counter(job["status"] for job in scope["tts"] if job["status"] != "new")
+        if skipped:
+            print("   ⏭️  TTS пропуск: " + ", ".join(f"{k} {n}" for k, n in sorted(skipped.items())))
+
+    for lesson_id in sorted(set(plan.lessons) - set(plan.scopes)):
+        print(f"\n⏭️  Урок {lesson_id} «{plan.lessons[lesson_id]['title']}»: пропуск по журналу")
+
+    found = result["findings"]
+    print("\n" + "=" * 60)
+    totals = result["totals"]
+    print(f"🧮 План: уроков {len(plan.lessons)}, запросов к БД {totals['db_ops']} ({_op_counts(totals['ops'])}), "
+          f"TTS новых {totals['tts_new']}")
+    if found["audio_requested_repeatedly"]:
+        print(f"🔁 Аудио запрашивается повторно: {len(found['audio_requested_repeatedly'])} файл(ов), напр. "
+              + ", ".join(list(found["audio_requested_repeatedly"])[:5]))
+    if found["same_text_in_several_files"]:
+        print(f"🔁 Один текст озвучивается в разные файлы: {len(found['same_text_in_several_files'])}, напр. "
+              + "; ".join(f"{t} → {', '.join(f)}" for t, f in list(found["same_text_in_several_files"].items())[:3]))
+    if found["file_with_several_texts"]:
+        print(f"⚠️  Одно имя файла для разных текстов: "
+              + "; ".join(f"{f}: {' | '.join(t)}" for f, t in list(found["file_with_several_texts"].items())[:5]))
+    if found["dictionary_db_lookups_repeated"]:
+        print(f"🔁 Повторные запросы dictionary к БД: {len(found['dictionary_db_lookups_repeated'])} слов")
+    if found["dictionary_keys_repeated"]:
+        print(f"ℹ️  Слова dictionary, нужные нескольким item-ам: {len(found['dictionary_keys_repeated'])}")
+    if found["full_rewrites"]:
+        print(f"⚠️  lesson_items будут переписаны целиком: {len(found['full_rewrites'])} из {len(plan.lessons)} уроков")
+    if not result["baseline"]:
+        print("ℹ️  План от пустой БД: все строки новые, перезаписи lesson_items не оцениваются "
+              "(снимок: python seed_plan.py --snapshot)")
+    est = result["estimate"]
+    source = latencies["source"] or "значения по умолчанию"
+    print(f"⏱️  Оценка: ~{est['estimated_seconds']:.0f}s (последовательно {est['serial_seconds']:.0f}s, "
+          f"не быстрее лимитов {est['rate_floor_seconds']:.0f}s); задержки: {source}")
+
+
+def plan_baseline(storage=None):
+    """
+    БД, относительно которой считается план: --storage sqlite:путь; для Supabase —
+    снимок (SNAPSHOT_PATH), иначе staging последнего export_copy. None — нет ни одной.
+    """
+    storage = storage or storage_spec()
+    if is_sqlite(storage):
+        path = Path(storage.partition(":")[2] or DEFAULT_SQLITE_PATH)
+        return path if path.exists() else None
+    from export_copy import DEFAULT_OUT_DIR
+
+    for path in (SNAPSHOT_PATH, DEFAULT_OUT_DIR / "staging.sqlite"):
+        if path.exists():
+            return path
+    return None
+
+
+def snapshot(source, path: Path = SNAPSHOT_PATH, page_size=SNAPSHOT_PAGE_SIZE) -> dict:
+    """Копирует SNAPSHOT_TABLES из source (клиент Supabase) в SQLite path; возвращает число строк."""
+    path = Path(path)
+    partial = path.with_name(path.name + ".partial")
+    if partial.exists():
+        partial.unlink()
+    local = SQLiteClient(partial)
+    counts = {}
+    try:
+        for table in SNAPSHOT_TABLES:
+            columns = local.columns(table)
+            counts[table] = 0
+            # Страницы по первичному ключу; лишние колонки Supabase (created_at и т.п.) отбрасываем
+            while True:
+                query = source.table(table).select("*")
+                for column in local.primary_key(table):
+                    query = query.order(column)
+                rows = execute_with_retry(query.range(counts[table], counts[table] + page_size - 1)).data or []
+                if rows:
+                    local.table(table).insert([{c: row[c] for c in columns if c in row} for row in rows]).execute()
+                    counts[table] += len(rows)
+                if len(rows) < page_size:
+                    break
+    finally:
+        local.close()
+    for suffix in ("-wal", "-shm"):
+        leftover = partial.with_name(partial.name + suffix)
+        if leftover.exists():
+            leftover.unlink()
+    partial.replace(path)
+    return counts
+
+
+async def run_plan(args, content_files, journal_path: Path, directory_mode=False) -> dict:
+    """Строит план запуска seed_lesson_json_my без сети; возвращает его (и пишет в JSON)."""
+    from database_engine import use_dictionary_mirror
+    from seed_lesson_json_my import feed_lessons
+
+    plan = Plan()
+    baseline = plan_baseline(args.storage)
+    if baseline is not None:
+        print(f"ℹ️  План относительно {baseline}")
+    set_client(PlanClient(plan, baseline))
+
+    if args.dict_mirror:
+        source = DictionaryMirror(args.dict_mirror)
+        mirror = DictionaryMirror(Path(":memory:"))
+        mirror.upsert(source.rows())
+        source.close()
+        use_dictionary_mirror(mirror)
+
+    journal = PlanJournal(journal_path, resume=args.resume)
+    run = _plan_run_class(plan)(args, journal, args.concurrency)
+    db_limits = (DB_LIMITER.max_rate, DB_LIMITER.max_concurrency)
+    tts_limits = (TTS_LIMITER.max_rate, TTS_LIMITER.max_concurrency)
+
+    output = io.StringIO()
+    with unthrottled(DB_LIMITER, TTS_LIMITER), contextlib.redirect_stdout(output):
+        failed_files = await feed_lessons(run, content_files, directory_mode)
+        await run.finish()
+    # Ход «запуска» не печатаем, только ошибки
+    for line in output.getvalue().splitlines():
+        if line.lstrip().startswith(("❌", "⚠️")):
+            print(line)
+
+    report_path = Path(args.report) if args.report else journal_path.with_suffix(".report.json")
+    latencies = load_latencies(report_path)
+    all_ops = [op for scope in plan.scopes.values() for op in scope["db"]]
+    result = {
+        "content_files": [str(p) for p in content_files],
+        "failed_files": [str(p) for p in failed_files],
+        "journal": str(journal_path) if args.resume else None,
+        "baseline": str(baseline) if baseline else None,
+        "latencies": latencies,
+        "totals": {
+            "lessons": len(plan.lessons),
+            "db_ops": len(all_ops),
+            "ops": all_ops,
+            "tts_new": sum(1 for s in plan.scopes.values() for job in s["tts"] if job["status"] == "new"),
+        },
+        "estimate": estimate(plan, latencies, args.concurrency, db_limits, tts_limits),
+        "findings": findings(plan, baseline is not None),
+        "lessons": {str(k): v for k, v in sorted(plan.lessons.items())},
+        "scopes": {str(k): v for k, v in plan.scopes.items()},
+    }
+    print_plan(plan, result, show_ops=not args.plan_summary)
+
+    out_path = Path(args.plan_out) if args.plan_out else journal_path.with_suffix(".plan.json")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    saved = {**result, "totals": {k: v for k, v in result["totals"].items() if k != "ops"}}
+    out_path.write_text(json.dumps(saved, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"📝 План: {out_path}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Снимок Supabase для seed_lesson_json_my.py --plan.")
+    parser.add_argument("--snapshot", action="store_true", help="Скачать таблицы сидинга в локальную SQLite")
+    parser.add_argument("--path", default=str(SNAPSHOT_PATH), help="Куда писать снимок")
+    args = parser.parse_args()
+    if not args.snapshot:
+        parser.print_help()
+        return
+
+    from storage import get_client
+
+    print(f"📥 Снимок БД для --plan: {args.path}")
+    counts = snapshot(get_client(), Path(args.path))
+    for table, count in counts.items():
+        print(f"   {table}: {count}")
+    print("✅ Готово: seed_lesson_json_my.py --plan будет считать план относительно снимка")
+
+
+if __name__ == "__main__":
+    main()
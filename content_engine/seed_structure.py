@@ -1,25 +1,12 @@
-import asyncio
-import os
-from pathlib import Path # <--- Добавили это
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import argparse
+import re
+from collections import defaultdict
 
-# 1. Ищем .env в родительской папке (KhmerCourse/.env)
-# __file__ - это этот скрипт. parent - папка content_engine. parent.parent - корень.
-env_path = Path(__file__).resolve().parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+from rate_control import execute_with_retry
+from storage import shared_client as supabase
 
-# 2. Получаем ключи
-# Python читает VITE_SUPABASE_URL спокойно, ему префикс не мешает
-SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print(f"❌ Ошибка: Не вижу ключи в файле: {env_path}")
-    exit(1)
-
-# Создаем клиент
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Клиент (Supabase или CONTENT_STORAGE=sqlite) создаётся при первом запросе, ключи — из .env
+# в корне репозитория (см. storage.load_settings)
 
 # --- ПЛАН КУРСА (Roadmap to B1) ---
 FULL_COURSE = [
@@ -80,45 +67,195 @@ FULL_COURSE = [
 ]
 
 
-async def seed_clean():
-    print("🧹 Очистка таблиц модулей и уроков...")
-    try:
-        supabase.table("lesson_items").delete().neq("id", 0).execute()
-        supabase.table("lessons").delete().neq("id", 0).execute()
-        supabase.table("modules").delete().neq("id", 0).execute()
-    except Exception as e:
-        print(f"⚠️ Инфо: Таблицы уже чистые или ошибка доступа: {e}")
-
-    print("🚀 Заливка структуры B1...")
-
-    for mod_idx, mod in enumerate(FULL_COURSE):
-        # 1. Создаем Модуль
-        res_mod = supabase.table("modules").insert({
-            "title": mod["title"],
-            "level_label": mod["level_label"],
-            "description": mod["description"],
-            "is_paid": mod["is_paid"],
-            "order_index": mod_idx
-        }).execute()
-
-        mod_id = res_mod.data[0]['id']
-        print(f"📦 [{mod['level_label']}] {mod['title']}")
-
-        # 2. Создаем Уроки
-        lessons_data = []
+# Поля, которые задаёт FULL_COURSE (всё остальное в строках БД не трогаем)
+MODULE_FIELDS = ("slug", "title", "level_label", "description", "is_paid", "order_index")
+LESSON_FIELDS = ("slug", "module_id", "title", "order_index")
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def desired_modules() -> list:
+    """Модули из FULL_COURSE со стабильными ключами (slug из названия, если не задан явно)."""
+    return [{
+        "slug": mod.get("slug") or slugify(mod["title"]),
+        "title": mod["title"],
+        "level_label": mod["level_label"],
+        "description": mod["description"],
+        "is_paid": mod["is_paid"],
+        "order_index": mod_idx,
+    } for mod_idx, mod in enumerate(FULL_COURSE)]
+
+
+def desired_lessons(module_ids: dict) -> list:
+    """Уроки FULL_COURSE; slug = "<slug модуля>/<slug урока>". module_ids: slug модуля -> id."""
+    rows = []
+    for mod, mod_row in zip(FULL_COURSE, desired_modules()):
         for less_idx, title in enumerate(mod["lessons"]):
-            lessons_data.append({
-                "module_id": mod_id,
+            rows.append({
+                "slug": f"{mod_row['slug']}/{slugify(title)}",
+                "module_id": module_ids.get(mod_row["slug"]),
                 "title": title,
-                "order_index": less_idx
+                "order_index": less_idx,
             })
+    return rows
+
+
+def diff_rows(desired: list, existing: list, fields, legacy_key):
+    """
+    Сравнивает желаемые строки с БД по slug.
+    Строки без slug (залитые старым seed_clean) усыновляются по legacy_key.
+    Возвращает (новые, изменённые, усыновлённые, лишние, slug -> id).
+    """
+    by_slug = {r["slug"]: r for r in existing if r.get("slug")}
+    legacy = {legacy_key(r): r for r in existing if not r.get("slug")}
+    added, changed, adopted = [], [], []
+    ids = {}
+    for row in desired:
+        old = by_slug.pop(row["slug"], None)
+        if old is None:
+            old = legacy.pop(legacy_key(row), None)
+            if old is not None:
+                adopted.append({"id": old["id"], **row})
+        if old is None:
+            added.append(row)
+            continue
+        ids[row["slug"]] = old["id"]
+        if any(old.get(f) != row[f] for f in fields if f != "slug"):
+            changed.append(row)
+    return added, changed, adopted, list(by_slug.values()), ids
+
+
+def print_plan(kind, added, changed, adopted, stale, existing):
+    existing_by_slug = {r.get("slug"): r for r in existing}
+    print(f"\n{kind}: +{len(added)} ~{len(changed)} -{len(stale)}"
+          + (f" (без slug, будут привязаны: {len(adopted)})" if adopted else ""))
+    for row in added:
+        print(f"   + {row['slug']}")
+    for row in changed:
+        old = existing_by_slug.get(row["slug"]) or {}
+        fields = ", ".join(f"{f}: {old.get(f)!r} → {row[f]!r}" for f in row if f != "slug" and old.get(f) != row[f])
+        print(f"   ~ {row['slug']}" + (f" ({fields})" if fields and old else ""))
+    for row in stale:
+        print(f"   - {row['slug']} (id {row['id']})")
+
+
+def prunable_modules(stale_modules, stale_lesson_ids) -> list:
+    """
+    id лишних модулей, которые можно удалить. Модули, на которые ссылаются остающиеся
+    уроки (залитые seed_lesson, без slug), пропускаем: иначе — сироты или ошибка FK
+    посреди удаления.
+    """
+    if not stale_modules:
+        return []
+    refs = execute_with_retry(supabase.table("lessons").select("id", "title", "module_id")
+                              .in_("module_id", [r["id"] for r in stale_modules])).data or []
+    removed = set(stale_lesson_ids)
+    blockers = defaultdict(list)
+    for row in refs:
+        if row["id"] not in removed:
+            blockers[row["module_id"]].append(row)
+    module_ids = []
+    for module in stale_modules:
+        kept = blockers.get(module["id"])
+        if not kept:
+            module_ids.append(module["id"])
+            continue
+        lessons = ", ".join(f"{r['id']} {r['title']!r}" for r in sorted(kept, key=lambda r: r["id"]))
+        print(f"⚠️ Модуль {module['slug']} (id {module['id']}) не удалён: на него ссылаются уроки {lessons}")
+    return module_ids
+
+
+def sync_structure(apply=False, prune=False):
+    """
+    Приводит modules/lessons к FULL_COURSE: сначала показывает план, затем (с apply)
+    пишет только разницу — один upsert модулей и один upsert уроков по slug.
+    Удаляет только с prune и только строки, которые сам же создал (со slug), по списку id;
+    модуль, на который ещё ссылаются оставшиеся уроки, не удаляется.
+    """
+    modules = desired_modules()
+    existing_modules = execute_with_retry(
+        supabase.table("modules").select("id", *MODULE_FIELDS)).data or []
+    mod_added, mod_changed, mod_adopted, mod_stale, module_ids = diff_rows(
+        modules, existing_modules, MODULE_FIELDS, lambda r: r["title"])
+
+    # Уроки новых модулей пока без module_id — он появится после upsert модулей
+    lessons = desired_lessons(module_ids)
+    known_module_ids = [r["id"] for r in existing_modules]
+    existing_lessons = []
+    if known_module_ids:
+        existing_lessons = execute_with_retry(
+            supabase.table("lessons").select("id", *LESSON_FIELDS).in_("module_id", known_module_ids)).data or []
+    # Уроки, залитые seed_lesson (без slug, не из FULL_COURSE), не наши — их не трогаем
+    titles = {(r["module_id"], r["title"]) for r in lessons}
+    existing_lessons = [r for r in existing_lessons if r.get("slug") or (r["module_id"], r["title"]) in titles]
+    less_added, less_changed, less_adopted, less_stale, _ = diff_rows(
+        lessons, existing_lessons, LESSON_FIELDS, lambda r: (r["module_id"], r["title"]))
+
+    print_plan("Модули", mod_added, mod_changed, mod_adopted, mod_stale, existing_modules)
+    print_plan("Уроки", less_added, less_changed, less_adopted, less_stale, existing_lessons)
+
+    if not (mod_added or mod_changed or mod_adopted or less_added or less_changed or less_adopted
+            or (prune and (mod_stale or less_stale))):
+        print("\n✅ Структура уже совпадает с FULL_COURSE.")
+        return
+    if not apply:
+        print("\nℹ️  Это предпросмотр. Запусти с --apply, чтобы записать изменения.")
+        return
+
+    # 0. Разово: проставляем slug строкам от старого seed_clean, чтобы upsert нашёл их по ключу
+    for table, adopted in (("modules", mod_adopted), ("lessons", less_adopted)):
+        if adopted:
+            execute_with_retry(supabase.table(table).upsert(adopted, on_conflict="id"))
+            print(f"🔗 {table}: привязано по названию: {len(adopted)}")
+
+    # 1. Модули
+    mod_rows = mod_added + mod_changed
+    if mod_rows:
+        res = execute_with_retry(supabase.table("modules").upsert(mod_rows, on_conflict="slug"))
+        module_ids.update({r["slug"]: r["id"] for r in res.data or []})
+        print(f"📦 Модули: записано {len(mod_rows)}")
+
+    # 2. Уроки (module_id новых модулей уже известен)
+    if mod_added:
+        lessons = desired_lessons(module_ids)
+        by_slug = {r["slug"]: r for r in lessons}
+        less_added = [by_slug[r["slug"]] for r in less_added]
+        less_changed = [by_slug[r["slug"]] for r in less_changed]
+    less_rows = less_added + less_changed
+    if less_rows:
+        execute_with_retry(supabase.table("lessons").upsert(less_rows, on_conflict="slug"))
+        print(f"📚 Уроки: записано {len(less_rows)}")
+
+    # 3. Лишние строки — только по явному --prune и только по списку id
+    if prune:
+        stale_lesson_ids = [r["id"] for r in less_stale]
+        stale_module_ids = prunable_modules(mod_stale, stale_lesson_ids)
+        if stale_lesson_ids:
+            from database_engine import delete_item_progress
+
+            item_ids = [r["id"] for r in execute_with_retry(
+                supabase.table("lesson_items").select("id").in_("lesson_id", stale_lesson_ids)).data or []]
+            if item_ids:
+                delete_item_progress(item_ids)
+            execute_with_retry(supabase.table("lesson_items").delete().in_("lesson_id", stale_lesson_ids))
+            execute_with_retry(supabase.table("lessons").delete().in_("id", stale_lesson_ids))
+        if stale_module_ids:
+            execute_with_retry(supabase.table("modules").delete().in_("id", stale_module_ids))
+        print(f"🧹 Удалено: модулей {len(stale_module_ids)}, уроков {len(stale_lesson_ids)}")
+
+    print("\n🎉 Готово! Структура курса синхронизирована.")
 
-        if lessons_data:
-            supabase.table("lessons").insert(lessons_data).execute()
-            print(f"   ✅ Добавлено уроков: {len(lessons_data)}")
 
-    print("\n🎉 Готово! База данных заполнена.")
+def main():
+    parser = argparse.ArgumentParser(description="Синхронизирует modules/lessons с FULL_COURSE.")
+    parser.add_argument("--apply", action="store_true", help="Записать изменения (без флага — только предпросмотр)")
+    parser.add_argument("--prune", action="store_true",
+                        help="Удалить модули/уроки со slug, которых больше нет в FULL_COURSE")
+    args = parser.parse_args()
+    sync_structure(apply=args.apply, prune=args.prune)
 
 
 if __name__ == "__main__":
-    asyncio.run(seed_clean())
\ No newline at end of file
+    main()
@@ -0,0 +1,342 @@
+"""
+Бинарный формат предшейпленных строк (shaped-store.bin) и эталонный декодер.
+
+shaped-store.json из prebake_shaping.py удобен для сборки, но на клиенте его
+надо целиком разобрать JSON.parse-ом, а контуры глифов в нём — SVG-строки.
+Здесь то же содержимое раскладывается по типизированным массивам: клиент
+делает по одному new Uint16Array(buffer, offset, count) на секцию и читает
+нужную строку по индексу, ничего не разбирая заранее.
+
+  * Координаты контуров и bbox квантуются: int16 = round(v * quant), где quant —
+    наибольшая степень двойки (до MAX_QUANT), при которой контуры влезают в int16.
+    Для TrueType-шрифтов (целые и .5) квантование без потерь.
+  * Контуры дедуплицируются по строке (d, bb) на весь файл: одинаковые глифы
+    разных шрифтов (KhmerOS_battambang и KhmerOS_siemreap) хранятся один раз.
+    Команды M/L/Q/C/Z — по байту, координаты — отдельным массивом.
+  * Индекс по строкам: запись (строка, шрифт) → диапазон кластеров, кластер →
+    диапазон компонентов, компонент → gid, контур, dx, y, advance. x компонента
+    восстанавливается как перо + dx, как в shapeText.
+
+Раскладка файла (little-endian, секции выровнены на 4 байта):
+  "KSHB" | u32 version | u32 длина заголовка | заголовок JSON (UTF-8) | секции
+Заголовок: format, version, quant, defaultFontId, fonts[], textCount и
+sections: {имя: [typecode, offset, count]} (typecode — как у array: B, H, h, I).
+
+Запуск:
+  python shaped_binary.py                        # shaped-store.json → shaped-store.bin
+  python shaped_binary.py /tmp/shaped.json --out /tmp/shaped.bin
+  python shaped_binary.py --check                # + сверка декодера с JSON по всем строкам
+"""
+import argparse
+import json
+import re
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+
+from prebake_shaping import DEFAULT_OUT, STORE_FORMAT, _pack, expand, expand_clusters
+
+MAGIC = b"KSHB"
+BINARY_FORMAT = "khmer-shaped-binary"
+BINARY_VERSION = 1
+MAX_QUANT = 8
+INT16_MAX = 32767
+# bbox пустого глифа (null в JSON)
+EMPTY_BOUNDS = -32768
+
+COMMANDS = "MLQCZ"
+COMMAND_ARITY = {"M": 2, "L": 2, "Q": 4, "C": 6, "Z": 0}
+_PATH_TOKEN_RE = re.compile(r"[MLQCZ]|-?\d+(?:\.\d+)?")
+
+FONT_FIELDS = ("id", "label", "file", "hash", "fontName", "fontVersion", "unitsPerEm")
+
+# Порядок секций в файле и их типы
+SECTIONS = (
+    ("textOffsets", "I"),       # [T+1] байтовые смещения строк в textBytes
+    ("textBytes", "B"),         # строки UTF-8 подряд, по возрастанию
+    ("entryClusters", "I"),     # [T*F+1] запись t*F+f → диапазон кластеров
+    ("clusterStart", "H"),      # [C] начало кластера в строке
+    ("clusterComponents", "I"), # [C+1] кластер → диапазон компонентов
+    ("compGlyph", "H"),         # [K] gid HarfBuzz
+    ("compPath", "H"),          # [K] индекс контура
+    ("compDx", "h"),            # [K] x - перо
+    ("compY", "h"),             # [K] y (как в /api/shape, ось вниз)
+    ("compAdvance", "h"),       # [K] advance
+    ("pathCommands", "I"),      # [P+1] контур → диапазон commands
+    ("commands", "B"),          # индексы в COMMANDS
+    ("pathCoords", "I"),        # [P+1] контур → диапазон coords
+    ("coords", "h"),            # квантованные координаты
+    ("pathBounds", "h"),        # [P*4] квантованный bbox (x1, y1, x2, y2)
+)
+
+
+def _parse_path(d):
+    commands, coords = [], []
+    for token in _PATH_TOKEN_RE.findall(d):
+        if token in COMMAND_ARITY:
+            commands.append(COMMANDS.index(token))
+        else:
+            coords.append(float(token))
+    return commands, coords
+
+
+def _choose_quant(values) -> int:
+    peak = max((abs(v) for v in values), default=0)
+    quant = MAX_QUANT
+    while quant > 1 and peak * quant > INT16_MAX:
+        quant //= 2
+    if peak * quant > INT16_MAX:
+        raise ValueError(f"координата {peak} не помещается в int16")
+    return quant
+
+
+def _checked(values, typecode, name):
+    try:
+        return array(typecode, values)
+    except OverflowError:
+        raise ValueError(f"{name}: значение вне диапазона типа {typecode}") from None
+
+
+def encode(store) -> bytes:
+    """Хранилище prebake_shaping (dict) → байты shaped-store.bin."""
+    if store.get("format") != STORE_FORMAT:
+        raise ValueError(f"ожидался формат {STORE_FORMAT}, а не {store.get('format')}")
+    font_ids = list(store["fonts"])
+    texts = sorted(store["texts"])
+
+    # Уникальные контуры на весь файл
+    path_index, paths = {}, []
+    glyph_paths = {}
+    for fid in font_ids:
+        for gid, (d, bb) in store["fonts"][fid]["glyphs"].items():
+            key = (d, tuple(bb) if bb is not None else None)
+            if key not in path_index:
+                path_index[key] = len(paths)
+                paths.append(key)
+            glyph_paths[fid, int(gid)] = path_index[key]
+
+    parsed = [_parse_path(d) for d, _ in paths]
+    quant = _choose_quant([v for _, coords in parsed for v in coords]
+                          + [v for _, bb in paths if bb is not None for v in bb])
+
+    columns = {name: [] for name, _ in SECTIONS}
+    text_bytes = bytearray()
+    columns["textOffsets"].append(0)
+    for text in texts:
+        text_bytes += text.encode("utf-8")
+        columns["textOffsets"].append(len(text_bytes))
+    columns["textBytes"] = text_bytes
+
+    columns["entryClusters"].append(0)
+    columns["clusterComponents"].append(0)
+    for text in texts:
+        for fid in font_ids:
+            pen = 0
+            for start, components in store["texts"][text].get(fid) or []:
+                columns["clusterStart"].append(start)
+                for gid, x, y, advance in components:
+                    columns["compGlyph"].append(gid)
+                    columns["compPath"].append(glyph_paths[fid, gid])
+                    columns["compDx"].append(x - pen)
+                    columns["compY"].append(y)
+                    columns["compAdvance"].append(advance)
+                    pen += advance
+                columns["clusterComponents"].append(len(columns["compGlyph"]))
+            columns["entryClusters"].append(len(columns["clusterStart"]))
+
+    columns["pathCommands"].append(0)
+    columns["pathCoords"].append(0)
+    for (commands, coords), (_, bb) in zip(parsed, paths):
+        columns["commands"].extend(commands)
+        columns["pathCommands"].append(len(columns["commands"]))
+        columns["coords"].extend(round(v * quant) for v in coords)
+        columns["pathCoords"].append(len(columns["coords"]))
+        columns["pathBounds"].extend([round(v * quant) for v in bb] if bb is not None else [EMPTY_BOUNDS] * 4)
+
+    header = {
+        "format": BINARY_FORMAT,
+        "version": BINARY_VERSION,
+        "quant": quant,
+        "defaultFontId": store["defaultFontId"],
+        "fonts": [{"id": fid, **{k: store["fonts"][fid][k] for k in FONT_FIELDS[1:]}} for fid in font_ids],
+        "textCount": len(texts),
+        "sections": {},
+    }
+    blobs = []
+    for name, typecode in SECTIONS:
+        values = _checked(columns[name], typecode, name)
+        if sys.byteorder == "big":
+            values.byteswap()
+        blobs.append((name, typecode, len(values), values.tobytes()))
+
+    # Смещения секций зависят от длины заголовка, а заголовок — от смещений:
+    # подбираем, пока длина заголовка не перестанет меняться
+    header_size = 0
+    while True:
+        offset = _align(12 + header_size)
+        for name, typecode, count, blob in blobs:
+            header["sections"][name] = [typecode, offset, count]
+            offset = _align(offset + len(blob))
+        raw_header = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(raw_header) == header_size:
+            break
+        header_size = len(raw_header)
+
+    out = bytearray(MAGIC + struct.pack("<II", BINARY_VERSION, len(raw_header)) + raw_header)
+    for name, _, _, blob in blobs:
+        out += b"\0" * (header["sections"][name][1] - len(out))
+        out += blob
+    return bytes(out)
+
+
+def _align(offset, to=4) -> int:
+    return (offset + to - 1) // to * to
+
+
+class ShapedBinary:
+    """Эталонный декодер: секции — представления над буфером, разбор по запросу."""
+
+    def __init__(self, data):
+        data = memoryview(data)
+        if bytes(data[:4]) != MAGIC:
+            raise ValueError("не shaped-store.bin: нет сигнатуры KSHB")
+        version, header_size = struct.unpack_from("<II", data, 4)
+        if version != BINARY_VERSION:
+            raise ValueError(f"версия {version} не поддерживается (ожидалась {BINARY_VERSION})")
+        self.header = json.loads(bytes(data[12:12 + header_size]).decode("utf-8"))
+        self.quant = self.header["quant"]
+        self.fonts = self.header["fonts"]
+        self._font_index = {font["id"]: i for i, font in enumerate(self.fonts)}
+        for name, (typecode, offset, count) in self.header["sections"].items():
+            size = array(typecode).itemsize
+            view = data[offset:offset + count * size]
+            if sys.byteorder == "big":
+                swapped = array(typecode, view.tobytes())
+                swapped.byteswap()
+                view = memoryview(swapped)
+            elif typecode != "B":
+                view = view.cast(typecode)
+            setattr(self, name, view)
+        self._texts = None
+
+    def text(self, index) -> str:
+        return bytes(self.textBytes[self.textOffsets[index]:self.textOffsets[index + 1]]).decode("utf-8")
+
+    def text_index(self, text):
+        # Словарь строк строится при первом поиске (строк в курсе — сотни)
+        if self._texts is None:
+            self._texts = {self.text(i): i for i in range(self.header["textCount"])}
+        return self._texts.get(text)
+
+    def path(self, index) -> list:
+        """[d, bb] контура в том же виде, что glyphs в shaped-store.json."""
+        quant = self.quant
+        coords = self.coords[self.pathCoords[index]:self.pathCoords[index + 1]]
+        parts, pos = [], 0
+        for code in self.commands[self.pathCommands[index]:self.pathCommands[index + 1]]:
+            command = COMMANDS[code]
+            arity = COMMAND_ARITY[command]
+            parts.append(command + _pack(*(v / quant for v in coords[pos:pos + arity])))
+            pos += arity
+        bounds = self.pathBounds[index * 4:index * 4 + 4]
+        bb = None if bounds[0] == EMPTY_BOUNDS else [v / quant for v in bounds]
+        return ["".join(parts), bb]
+
+    def clusters(self, text_index, font_id):
+        """Кластеры в формате хранилища и словарь gid → контур для строки и шрифта."""
+        entry = text_index * len(self.fonts) + self._font_index[font_id]
+        clusters, glyph_paths, pen = [], {}, 0
+        for c in range(self.entryClusters[entry], self.entryClusters[entry + 1]):
+            components = []
+            for k in range(self.clusterComponents[c], self.clusterComponents[c + 1]):
+                gid, advance = self.compGlyph[k], self.compAdvance[k]
+                components.append([gid, pen + self.compDx[k], self.compY[k], advance])
+                glyph_paths[str(gid)] = self.compPath[k]
+                pen += advance
+            clusters.append([self.clusterStart[c], components])
+        return clusters, glyph_paths
+
+    def expand(self, text, font_id=None) -> list:
+        """То же, что prebake_shaping.expand, но из бинарного файла."""
+        font_id = font_id if font_id and font_id != "auto" else self.header["defaultFontId"]
+        index = self.text_index(text)
+        if index is None or font_id not in self._font_index:
+            return []
+        clusters, glyph_paths = self.clusters(index, font_id)
+        if not clusters:
+            return []
+        font = self.fonts[self._font_index[font_id]]
+        return expand_clusters(text, clusters, lambda gid: self.path(glyph_paths[gid]), font_id, font)
+
+
+# --- СВЕРКА ---
+
+def _close(a, b, tolerance) -> bool:
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_close(a[k], b[k], tolerance) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_close(x, y, tolerance) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+        return abs(a - b) <= tolerance
+    if isinstance(a, str) and isinstance(b, str) and a != b and a[:1] in COMMAND_ARITY:
+        # Контур: те же команды, координаты в пределах шага квантования
+        return _parse_path(a)[0] == _parse_path(b)[0] and _close(_parse_path(a)[1], _parse_path(b)[1], tolerance)
+    return a == b
+
+
+def check(store, decoded: ShapedBinary) -> list:
+    """Сравнивает expand() из JSON и из бинарного файла по всем строкам и шрифтам; список расхождений."""
+    tolerance = 0.5 / decoded.quant + 1e-9
+    mismatches = []
+    for text in store["texts"]:
+        for fid in store["fonts"]:
+            if not _close(expand(store, text, fid), decoded.expand(text, fid), tolerance):
+                mismatches.append((text, fid))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Кодирует shaped-store.json в компактный shaped-store.bin.")
+    parser.add_argument("store", nargs="?", default=str(DEFAULT_OUT), help="Хранилище из prebake_shaping.py")
+    parser.add_argument("--out", help="Куда писать (по умолчанию рядом, с расширением .bin)")
+    parser.add_argument("--check", action="store_true", help="Сверить декодер с JSON по всем строкам")
+    args = parser.parse_args()
+
+    store_path = Path(args.store)
+    if not store_path.exists():
+        sys.exit(f"❌ Нет {store_path}: сначала python prebake_shaping.py")
+    raw_json = store_path.read_bytes()
+    store = json.loads(raw_json)
+    data = encode(store)
+    out = Path(args.out) if args.out else store_path.with_suffix(".bin")
+    out.write_bytes(data)
+
+    started = time.perf_counter()
+    decoded = ShapedBinary(out.read_bytes())
+    open_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    json.loads(raw_json)
+    json_ms = (time.perf_counter() - started) * 1000
+
+    # Для сравнения: те же строки в развёрнутом виде, как в shaped-text*.json и ответах /api/shape
+    expanded = sum(len(json.dumps(expand(store, text, fid), ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                   for text in store["texts"] for fid in store["fonts"])
+    print(f"📦 {out}: {len(data) / 1024:.1f} KB, quant 1/{decoded.quant}, "
+          f"контуров {decoded.header['sections']['pathBounds'][2] // 4}")
+    print(f"   в {len(raw_json) / len(data):.1f}× меньше shaped-store.json ({len(raw_json) / 1024:.1f} KB), "
+          f"в {expanded / len(data):.1f}× меньше развёрнутого JSON ({expanded / 1024:.1f} KB)")
+    print(f"   открытие {open_ms:.2f} мс против JSON.loads {json_ms:.2f} мс")
+
+    if args.check:
+        mismatches = check(store, decoded)
+        for text, fid in mismatches[:10]:
+            print(f"❌ Расхождение: {text} ({fid})")
+        if mismatches:
+            sys.exit(f"❌ Расхождений: {len(mismatches)}")
+        print(f"✅ Декодер совпадает с JSON: {len(store['texts'])} строк × {len(store['fonts'])} шрифтов")
+
+
+if __name__ == "__main__":
+    main()
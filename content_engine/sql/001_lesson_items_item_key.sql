@@ -0,0 +1,8 @@
+-- Стабильные ключи lesson_items (см. database_engine.assign_item_keys).
+-- seed_lesson сопоставляет строки по item_key и обновляет их на месте,
+-- поэтому id (а с ними user_srs / user_srs_items) переживают пересидинг.
+-- Старые строки без ключа получат его при первом пересидинге урока.
+
+alter table lesson_items add column if not exists item_key text;
+
+create unique index if not exists lesson_items_item_key_idx on lesson_items (item_key);
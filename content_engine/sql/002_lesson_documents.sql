@@ -0,0 +1,15 @@
+-- Предсобранный документ урока (см. lesson_documents.build_lesson_document).
+-- seed_lesson пишет сюда урок + все item-ы с готовыми audio/pronunciation,
+-- приложение загружает урок одним запросом и кэширует по version.
+
+create table if not exists lesson_documents (
+    lesson_id bigint primary key references lessons (id) on delete cascade,
+    version text not null,
+    document jsonb not null,
+    updated_at timestamptz not null default now()
+);
+
+alter table lesson_documents enable row level security;
+
+drop policy if exists "lesson_documents are readable" on lesson_documents;
+create policy "lesson_documents are readable" on lesson_documents for select using (true);
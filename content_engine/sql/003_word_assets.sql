@@ -0,0 +1,15 @@
+-- Общая таблица аудио и транскрипций слов (см. content_engine/word_assets.py).
+-- Квизы хранят в data.option_words ссылки на khmer вместо копии
+-- options_metadata; документы уроков и бандлы получают данные уже подставленными.
+
+create table if not exists word_assets (
+    khmer text primary key,
+    audio text,
+    pronunciation text,
+    updated_at timestamptz not null default now()
+);
+
+alter table word_assets enable row level security;
+
+drop policy if exists "word_assets are readable" on word_assets;
+create policy "word_assets are readable" on word_assets for select using (true);
@@ -0,0 +1,4 @@
+-- Хэш содержимого сводки и Guidebook модуля (см. database_engine.update_study_materials).
+-- Если хэш не изменился, модуль при пересидинге пропускается целиком.
+
+alter table study_materials add column if not exists content_hash text;
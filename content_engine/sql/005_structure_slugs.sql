@@ -0,0 +1,9 @@
+-- Стабильные ключи структуры курса (см. seed_structure.sync_structure).
+-- modules/lessons из FULL_COURSE синхронизируются upsert-ом по slug,
+-- уроки, залитые seed_lesson, остаются без slug и скриптом не трогаются.
+
+alter table modules add column if not exists slug text;
+alter table lessons add column if not exists slug text;
+
+create unique index if not exists modules_slug_key on modules (slug);
+create unique index if not exists lessons_slug_key on lessons (slug);
@@ -0,0 +1,18 @@
+-- Watermark для локального зеркала dictionary (см. content_engine/dictionary_mirror.py).
+-- updated_at меняется при каждой вставке/изменении, зеркало догружает только новые строки.
+
+alter table dictionary add column if not exists updated_at timestamptz not null default now();
+
+create or replace function dictionary_touch_updated_at() returns trigger as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists dictionary_touch_updated_at on dictionary;
+create trigger dictionary_touch_updated_at
+    before insert or update on dictionary
+    for each row execute function dictionary_touch_updated_at();
+
+create index if not exists dictionary_updated_at_khmer_idx on dictionary (updated_at, khmer);
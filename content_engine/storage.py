@@ -0,0 +1,499 @@
+"""
+Хранилище для скриптов content_engine: Supabase или локальный SQLite.
+
+Движок говорит с БД только через query builder supabase-py, поэтому интерфейс
+хранилища — это то его подмножество, которое реально используется:
+
+    client.table(name)
+        .select(*columns) / .insert(rows) / .upsert(rows, on_conflict=...)
+        .update(values) / .delete()
+        .eq / .neq / .gt / .gte / .lt / .lte / .in_ / .or_
+        .order(column, desc=False) / .range(start, end) / .limit(n)
+        .execute()  -> объект с .data (список словарей)
+
+SQLiteClient реализует то же самое поверх файла SQLite со схемой курса
+(modules, lessons, lesson_items, dictionary, alphabet, study_materials и
+таблицы, которые добавили миграции из sql/). Так полный сидинг можно гонять
+и профилировать локально, без Supabase.
+
+Выбор хранилища: переменная окружения CONTENT_STORAGE
+  supabase (по умолчанию) | sqlite | sqlite:/путь/к/course.sqlite
+
+Клиент один на процесс и создаётся лениво: .env читается, а supabase-py
+импортируется только при первом запросе к БД (get_client / shared_client).
+Поэтому импорт database_engine и вспомогательных модулей ничего не делает
+с сетью и не падает без ключей — офлайн-инструменты стартуют сразу.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_SQLITE_PATH = BASE_DIR / ".cache" / "course.sqlite"
+# .env в корне репозитория, затем в текущей папке (уже заданные переменные не перезаписываются)
+ENV_PATHS = (BASE_DIR.parent / ".env", Path(".env"))
+
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+SCHEMA = f"""
+create table if not exists modules (
+    id integer primary key autoincrement,
+    slug text unique,
+    title text,
+    level_label text,
+    description text,
+    is_paid boolean,
+    order_index integer
+);
+create table if not exists lessons (
+    id integer primary key autoincrement,
+    slug text unique,
+    module_id integer,
+    title text,
+    description text,
+    order_index integer
+);
+create table if not exists lesson_items (
+    id integer primary key autoincrement,
+    lesson_id integer,
+    item_key text unique,
+    type text,
+    order_index integer,
+    data json
+);
+create index if not exists lesson_items_lesson_id_idx on lesson_items (lesson_id);
+create table if not exists dictionary (
+    khmer text primary key,
+    english text,
+    pronunciation text,
+    item_type text,
+    updated_at text not null default ({_NOW})
+);
+create table if not exists alphabet (
+    id text primary key,
+    name_en text,
+    type text,
+    series integer,
+    shape_group text,
+    subscript_form text,
+    sound_series_1 text,
+    sound_series_2 text,
+    audio_url text,
+    frequency_rank integer,
+    description text
+);
+create table if not exists study_materials (
+    id integer primary key autoincrement,
+    chapter_id integer unique,
+    title text,
+    content text,
+    type text,
+    content_hash text
+);
+create table if not exists lesson_documents (
+    lesson_id integer primary key,
+    version text not null,
+    document json not null,
+    updated_at text not null default ({_NOW})
+);
+create table if not exists word_assets (
+    khmer text primary key,
+    audio text,
+    pronunciation text,
+    updated_at text not null default ({_NOW})
+);
+create table if not exists user_srs (
+    id integer primary key autoincrement,
+    user_id text,
+    item_id integer,
+    next_review text
+);
+create table if not exists user_srs_items (
+    id integer primary key autoincrement,
+    user_id text,
+    item_id integer
+);
+"""
+
+# Колонки jsonb: в SQLite храним текстом, наружу отдаём разобранными
+JSON_COLUMNS = {"lesson_items": {"data"}, "lesson_documents": {"document"}}
+
+# Как триггер updated_at в Postgres (sql/006): любая запись обновляет метку
+TOUCH_COLUMNS = {"dictionary", "lesson_documents", "word_assets"}
+
+
+class StorageError(Exception):
+    pass
+
+
+class MissingCredentials(StorageError):
+    pass
+
+
+class Result:
+    def __init__(self, data):
+        self.data = data
+
+
+# --- разбор фильтров PostgREST для .or_() ---
+
+_OPS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _split_top(expr: str) -> list:
+    """Делит "a,b(c,d),e" по запятым верхнего уровня (с учётом скобок и кавычек)."""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(expr):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_logic(expr: str, joiner: str):
+    clauses, params = [], []
+    for part in _split_top(expr):
+        match = re.fullmatch(r"(and|or)\((.*)\)", part)
+        if match:
+            sql, sub = _parse_logic(match.group(2), match.group(1).upper())
+        else:
+            column, op, value = part.split(".", 2)
+            if op not in _OPS:
+                raise StorageError(f"Unsupported filter: {part}")
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            sql, sub = f"{_quote(column)} {_OPS[op]} ?", [value]
+        clauses.append(sql)
+        params.extend(sub)
+    return "(" + f" {joiner} ".join(clauses) + ")", params
+
+
+class SQLiteQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.path = f"/{table}"
+        self.http_method = "GET"
+        # Как у postgrest-py: тело запроса и заголовки (по ним метрики узнают операцию)
+        self.json = None
+        self.headers = {}
+        self._op = "select"
+        self._columns = ["*"]
+        self._payload = None
+        self._on_conflict = None
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # --- операции ---
+
+    def select(self, *columns, **kwargs):
+        cols = [c.strip() for col in columns for c in col.split(",") if c.strip()]
+        self._op, self._columns, self.http_method = "select", cols or ["*"], "GET"
+        return self
+
+    def insert(self, rows, **kwargs):
+        self._op, self._payload, self.http_method = "insert", rows, "POST"
+        self.json = rows
+        return self
+
+    def upsert(self, rows, on_conflict=None, **kwargs):
+        self._op, self._payload, self.http_method = "upsert", rows, "POST"
+        self.json, self.headers = rows, {"Prefer": "resolution=merge-duplicates"}
+        self._on_conflict = [c.strip() for c in (on_conflict or "").split(",") if c.strip()] or None
+        return self
+
+    def update(self, values, **kwargs):
+        self._op, self._payload, self.http_method = "update", values, "PATCH"
+        self.json = values
+        return self
+
+    def delete(self, **kwargs):
+        self._op, self.http_method = "delete", "DELETE"
+        return self
+
+    # --- фильтры ---
+
+    def _filter(self, column, op, value):
+        self._where.append(f"{_quote(column)} {op} ?")
+        self._params.append(self._value(column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{_quote(column)} in ({', '.join('?' * len(values))})")
+        self._params.extend(self._value(column, v) for v in values)
+        return self
+
+    def or_(self, filters, **kwargs):
+        sql, params = _parse_logic(filters, "OR")
+        self._where.append(sql)
+        self._params.extend(params)
+        return self
+
+    def order(self, column, desc=False, **kwargs):
+        self._order.append(f"{_quote(column)} {'desc' if desc else 'asc'}")
+        return self
+
+    def limit(self, size, **kwargs):
+        self._limit = int(size)
+        return self
+
+    def range(self, start, end, **kwargs):
+        self._offset, self._limit = int(start), int(end) - int(start) + 1
+        return self
+
+    # --- выполнение ---
+
+    def _value(self, column, value):
+        if column in JSON_COLUMNS.get(self.table, ()) and value is not None:
+            return json.dumps(value, ensure_ascii=False)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def _decode(self, row) -> dict:
+        row = dict(row)
+        for column in JSON_COLUMNS.get(self.table, ()):
+            if isinstance(row.get(column), str):
+                row[column] = json.loads(row[column])
+        return row
+
+    def _where_sql(self):
+        return (" where " + " and ".join(self._where)) if self._where else ""
+
+    def _rows(self):
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        if not rows:
+            return [], []
+        # Как PostgREST: набор колонок — объединение ключей, отсутствующие значения = null
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+        return rows, columns
+
+    def execute(self):
+        return self.client._execute(self)
+
+    def _run(self, conn):
+        table = _quote(self.table)
+        if self._op == "select":
+            columns = ", ".join(c if c == "*" else _quote(c) for c in self._columns)
+            sql = f"select {columns} from {table}{self._where_sql()}"
+            if self._order:
+                sql += " order by " + ", ".join(self._order)
+            if self._limit is not None:
+                sql += f" limit {self._limit}"
+                if self._offset:
+                    sql += f" offset {self._offset}"
+            return [self._decode(r) for r in conn.execute(sql, self._params)]
+
+        if self._op == "delete":
+            conn.execute(f"delete from {table}{self._where_sql()}", self._params)
+            return []
+
+        if self._op == "update":
+            values = dict(self._payload)
+            if self.table in TOUCH_COLUMNS and "updated_at" not in values:
+                values["updated_at"] = _utc_now()
+            assignments = ", ".join(f"{_quote(c)} = ?" for c in values)
+            params = [self._value(c, v) for c, v in values.items()] + self._params
+            cur = conn.execute(f"update {table} set {assignments}{self._where_sql()} returning *", params)
+            return [self._decode(r) for r in cur.fetchall()]
+
+        rows, columns = self._rows()
+        if not rows:
+            return []
+        if self.table in TOUCH_COLUMNS and "updated_at" not in columns:
+            columns.append("updated_at")
+            rows = [{**row, "updated_at": _utc_now()} for row in rows]
+        sql = f"insert into {table} ({', '.join(_quote(c) for c in columns)}) values ({', '.join('?' * len(columns))})"
+        if self._op == "upsert":
+            target = self._on_conflict or self.client.primary_key(self.table)
+            updates = [c for c in columns if c not in target]
+            action = "do nothing"
+            if updates:
+                action = "do update set " + ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in updates)
+            sql += f" on conflict ({', '.join(_quote(c) for c in target)}) {action}"
+        sql += " returning *"
+        out = []
+        for row in rows:
+            cur = conn.execute(sql, [self._value(c, row.get(c)) for c in columns])
+            out.extend(self._decode(r) for r in cur.fetchall())
+        return out
+
+
+def _quote(name) -> str:
+    if not re.fullmatch(r"\w+", name):
+        raise StorageError(f"Bad column name: {name}")
+    return f'"{name}"'
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class SQLiteClient:
+    """Локальная реализация хранилища с той же семантикой, что у клиента Supabase."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or DEFAULT_SQLITE_PATH)
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Запросы приходят из потоков db_execute_async — одно соединение под замком
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("pragma journal_mode = wal")
+        self._conn.execute("pragma synchronous = normal")
+        self._conn.executescript(SCHEMA)
+        self._primary_keys = {}
+
+    def table(self, name) -> SQLiteQuery:
+        return SQLiteQuery(self, name)
+
+    # Совместимость с supabase-py: client.from_("table")
+    from_ = table
+
+    def columns(self, table) -> list:
+        return [r["name"] for r in self._conn.execute(f'pragma table_info("{table}")').fetchall()]
+
+    def primary_key(self, table) -> list:
+        if table not in self._primary_keys:
+            info = self._conn.execute(f'pragma table_info("{table}")').fetchall()
+            self._primary_keys[table] = [r["name"] for r in sorted(info, key=lambda r: r["pk"]) if r["pk"]]
+        return self._primary_keys[table]
+
+    def _execute(self, query: SQLiteQuery) -> Result:
+        with self._lock:
+            try:
+                with self._conn:
+                    return Result(query._run(self._conn))
+            except sqlite3.Error as e:
+                raise StorageError(f"{query.table}: {e}") from e
+
+    def close(self):
+        self._conn.close()
+
+
+def is_sqlite(spec) -> bool:
+    return bool(spec) and str(spec).split(":", 1)[0] == "sqlite"
+
+
+# --- НАСТРОЙКИ И ОБЩИЙ КЛИЕНТ (лениво, один раз на процесс) ---
+
+_settings = None
+_client = None
+_client_lock = threading.Lock()
+
+
+def load_settings() -> dict:
+    """Ключи Supabase и CONTENT_STORAGE; .env читается при первом вызове."""
+    global _settings
+    if _settings is None:
+        try:
+            from dotenv import load_dotenv
+        except ImportError:  # без python-dotenv берём только переменные окружения
+            load_dotenv = None
+        if load_dotenv is not None:
+            for path in ENV_PATHS:
+                if path.exists():
+                    load_dotenv(dotenv_path=path)
+        _settings = {
+            "url": os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL"),
+            "key": (os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
+                    or os.getenv("VITE_SUPABASE_ANON_KEY")),
+            "storage": os.getenv("CONTENT_STORAGE") or "supabase",
+        }
+    return _settings
+
+
+def storage_spec() -> str:
+    return load_settings()["storage"]
+
+
+def connect(spec=None, url=None, key=None):
+    """Новый клиент хранилища по spec ("supabase", "sqlite", "sqlite:/path")."""
+    spec = spec or storage_spec()
+    if is_sqlite(spec):
+        _, _, path = spec.partition(":")
+        return SQLiteClient(path or None)
+    if spec != "supabase":
+        raise StorageError(f"Unknown CONTENT_STORAGE: {spec}")
+    settings = load_settings()
+    url, key = url or settings["url"], key or settings["key"]
+    if not url or not key:
+        raise MissingCredentials(
+            f"Нет ключей Supabase (SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY) в {ENV_PATHS[0]} или окружении. "
+            "Для локальной БД: CONTENT_STORAGE=sqlite")
+    from supabase import ClientOptions, create_client
+
+    from transport import http_client
+
+    try:
+        # REST-запросы идут через общий пул соединений transport (keep-alive, HTTP/2)
+        options = ClientOptions(httpx_client=http_client())
+    except TypeError:
+        # supabase-py без httpx_client: у клиента будет свой пул
+        return create_client(url, key)
+    return create_client(url, key, options)
+
+
+def get_client():
+    """Общий клиент процесса: создаётся при первом вызове и дальше переиспользуется."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = connect()
+    return _client
+
+
+def set_client(client):
+    """Подменяет общий клиент (--storage, экспорт, бенчмарк). Возвращает его же."""
+    global _client
+    with _client_lock:
+        _client = client
+    return client
+
+
+class LazyClient:
+    """Ведёт себя как клиент Supabase, но создаёт его только при первом обращении."""
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+
+shared_client = LazyClient()
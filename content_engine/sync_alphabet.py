@@ -0,0 +1,132 @@
+"""
+Синхронизация алфавита из alphabet_registry за один проход:
+  1. строит строки таблицы и список озвучки;
+  2. сравнивает с таблицей `alphabet` и показывает разницу;
+  3. с --apply пишет изменившиеся строки одним upsert;
+  4. пишет alphabet_master.csv;
+  5. с --audio озвучивает недостающие файлы.
+
+Запуск:
+  python sync_alphabet.py                  # предпросмотр + CSV
+  python sync_alphabet.py --apply --audio  # записать в БД и догенерировать звуки
+  python sync_alphabet.py --offline        # без БД: только CSV (и звуки с --audio)
+"""
+import argparse
+import asyncio
+import csv
+from pathlib import Path
+
+from alphabet_registry import COLUMNS, MANAGED_COLUMNS, build
+from rate_control import TTS_LIMITER, execute_with_retry, print_summary
+from storage import get_client
+from transport import close_tts, communicate
+
+BASE_DIR = Path(__file__).resolve().parent
+OUTPUT_CSV = BASE_DIR / "alphabet_master.csv"
+OUTPUT_DIR = BASE_DIR.parent / "khmer-mastery" / "public" / "sounds"
+VOICE = "km-KH-SreymomNeural"
+
+# Колонки, которые реестр задаёт не для всех букв (остальным оставляем значение из БД)
+OPTIONAL_COLUMNS = [c for c in COLUMNS if c != "id" and c not in MANAGED_COLUMNS]
+
+
+def _same(a, b) -> bool:
+    # Пустая строка из CSV-импорта и null в БД — одно и то же
+    return (a if a != "" else None) == (b if b != "" else None)
+
+
+def diff_alphabet(rows, stored):
+    """
+    Сравнивает строки реестра с таблицей. Возвращает (payload для upsert, изменения).
+    Все строки payload имеют одинаковый набор колонок, как требует bulk upsert.
+    """
+    optional = [c for c in OPTIONAL_COLUMNS if any(c in row for row in rows)]
+    payload, changes = [], []
+    for row in rows:
+        old = stored.get(row["id"])
+        full = {c: row.get(c, (old or {}).get(c)) for c in ["id", *MANAGED_COLUMNS, *optional]}
+        if old is None:
+            changes.append((row["id"], "+", []))
+        else:
+            fields = [c for c in full if c != "id" and not _same(old.get(c), full[c])]
+            if not fields:
+                continue
+            changes.append((row["id"], "~", fields))
+        payload.append(full)
+    return payload, changes
+
+
+def write_csv(rows, stored, path: Path = None):
+    with Path(path or OUTPUT_CSV).open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            old = stored.get(row["id"]) or {}
+            values = {c: row.get(c, old.get(c)) for c in COLUMNS}
+            writer.writerow({c: "" if v is None else v for c, v in values.items()})
+
+
+async def save_audio(text, filename):
+    path = OUTPUT_DIR / filename
+    try:
+        async with TTS_LIMITER.async_slot():  # Очередь: темп подстраивается под ответы edge-tts
+            print(f"🎙️ Gen: {filename} (Text: {text})")
+            await communicate(text, VOICE).save(str(path))
+    except Exception as e:
+        print(f"❌ Err: {filename} -> {e}")
+        if path.exists():
+            path.unlink()
+
+
+async def sync_alphabet(apply=False, offline=False, audio=False):
+    rows, jobs = build()
+    print(f"🔤 Реестр: {len(rows)} символов, {len(jobs)} аудио")
+
+    stored = {}
+    if not offline:
+        supabase = get_client()
+        res = execute_with_retry(supabase.table("alphabet").select(*COLUMNS))
+        stored = {r["id"]: r for r in res.data or []}
+        payload, changes = diff_alphabet(rows, stored)
+        extra = sorted(set(stored) - {r["id"] for r in rows})
+
+        print(f"\nalphabet: +{sum(c[1] == '+' for c in changes)} ~{sum(c[1] == '~' for c in changes)}")
+        for char_id, mark, fields in changes:
+            print(f"   {mark} {char_id}" + (f" ({', '.join(fields)})" if fields else ""))
+        if extra:
+            print(f"   ℹ️  В БД есть символы не из реестра (не трогаем): {' '.join(extra)}")
+
+        if payload and apply:
+            execute_with_retry(supabase.table("alphabet").upsert(payload, on_conflict="id"))
+            print(f"✅ Записано строк: {len(payload)}")
+        elif payload:
+            print("ℹ️  Это предпросмотр. Запусти с --apply, чтобы записать изменения.")
+        else:
+            print("✅ Таблица alphabet уже совпадает с реестром.")
+
+    write_csv(rows, stored)
+    print(f"✅ CSV СОЗДАН: {OUTPUT_CSV}")
+
+    missing = [(text, filename) for text, filename in jobs if not (OUTPUT_DIR / filename).exists()]
+    if not missing:
+        print("✅ ВСЕ ЗВУКИ ГОТОВЫ!")
+    elif audio:
+        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        await asyncio.gather(*(save_audio(text, filename) for text, filename in missing))
+        await close_tts()
+        print_summary()
+    else:
+        print(f"🎙️ Нет аудио: {len(missing)} (запусти с --audio): {', '.join(f for _, f in missing)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Синхронизирует алфавит: БД, alphabet_master.csv, озвучка.")
+    parser.add_argument("--apply", action="store_true", help="Записать изменения в таблицу alphabet")
+    parser.add_argument("--offline", action="store_true", help="Не обращаться к БД")
+    parser.add_argument("--audio", action="store_true", help="Сгенерировать недостающие аудио")
+    args = parser.parse_args(argv)
+    asyncio.run(sync_alphabet(apply=args.apply, offline=args.offline, audio=args.audio))
+
+
+if __name__ == "__main__":
+    main()
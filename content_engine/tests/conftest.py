@@ -0,0 +1,25 @@
+"""
+Общие фикстуры тестов content_engine.
+
+Скрипты content_engine импортируют друг друга как модули верхнего уровня
+(запуск из папки content_engine), поэтому папка добавляется в sys.path.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent
+if str(ENGINE_DIR) not in sys.path:
+    sys.path.insert(0, str(ENGINE_DIR))
+
+from storage import SQLiteClient, set_client  # noqa: E402
+
+
+@pytest.fixture
+def sqlite_client(tmp_path):
+    """Локальная SQLite вместо Supabase для всего движка на время теста."""
+    client = set_client(SQLiteClient(tmp_path / "content.sqlite"))
+    yield client
+    set_client(None)
+    client.close()
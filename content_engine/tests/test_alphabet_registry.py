@@ -0,0 +1,49 @@
+"""alphabet_registry.build: одна строка на id, у повторов (ំ, ះ) побеждает последняя запись."""
+from collections import Counter
+
+from alphabet_registry import ALPHABET, COLUMNS, build
+
+
+def test_one_row_per_id():
+    rows, jobs = build()
+
+    duplicates = [char for char, n in Counter(e["id"] for e in ALPHABET).items() if n > 1]
+    assert sorted(duplicates) == sorted(["ំ", "ះ"])
+    assert len(rows) == len(ALPHABET) - len(duplicates) == 92
+    assert len({r["id"] for r in rows}) == len(rows)
+    assert all(set(r) <= set(COLUMNS) for r in rows)
+    # Имена файлов озвучки тоже уникальны: одна задача на файл
+    assert len({filename for _, filename in jobs}) == len(jobs)
+
+
+def test_duplicated_ids_take_diacritic_entry():
+    rows, jobs = build()
+    by_id = {r["id"]: r for r in rows}
+
+    # Как в старой цепочке seed_alphabet + update_diacritics_rules: правило диакритики
+    # перезаписывает огласовку и убирает audio_url
+    assert by_id["ំ"]["type"] == "diacritic"
+    assert by_id["ំ"]["name_en"] == "nikahit"
+    assert by_id["ំ"]["description"] == "Nasalizer. Adds an 'm' sound to the end of the syllable (Am/Om)."
+    assert by_id["ំ"]["audio_url"] is None
+    assert by_id["ះ"]["type"] == "diacritic"
+    assert by_id["ះ"]["name_en"] == "reahmuk"
+    assert by_id["ះ"]["description"] == "Aspirator. Adds a breathy 'h' sound at the end (Ah/Oh)."
+    assert by_id["ះ"]["audio_url"] is None
+
+    # Озвучка огласовок am/ah при этом генерируется
+    filenames = {filename for _, filename in jobs}
+    assert {"vowel_name_am.mp3", "vowel_sun_am.mp3", "vowel_name_ah.mp3"} <= filenames
+
+
+def test_last_entry_wins():
+    registry = [
+        {"id": "x", "name_en": "first", "type": "consonant", "series": 1, "freq": 3, "desc": "one"},
+        {"id": "x", "name_en": "second", "type": "diacritic", "mute": True, "desc": "two"},
+    ]
+    rows, jobs = build(registry)
+
+    assert rows == [{"id": "x", "name_en": "second", "type": "diacritic", "series": None,
+                     "sound_series_1": None, "sound_series_2": None, "audio_url": None,
+                     "frequency_rank": 0, "description": "two"}]
+    assert jobs == [("x", "letter_first.mp3")]
@@ -0,0 +1,30 @@
+"""Потоковое чтение глав: id главы доходит до уроков при любом порядке ключей."""
+import json
+
+from content_stream import ChapterStream
+
+
+def _lessons_with_meta(path):
+    stream = ChapterStream(path)
+    return [(lesson["lesson_id"], stream.meta.get("chapter_id")) for lesson in stream], stream.kind
+
+
+def test_chapter_id_before_lessons(tmp_path):
+    path = tmp_path / "chapter.json"
+    path.write_text(json.dumps({"chapter_id": 5, "lessons": [{"lesson_id": 1}, {"lesson_id": 2}]}))
+    assert _lessons_with_meta(path) == ([(1, 5), (2, 5)], "chapter")
+
+
+def test_chapter_id_after_lessons(tmp_path):
+    path = tmp_path / "chapter.json"
+    path.write_text(json.dumps({"lessons": [{"lesson_id": 1}, {"lesson_id": 2}], "chapter_id": 5}))
+    assert _lessons_with_meta(path) == ([(1, 5), (2, 5)], "chapter")
+
+
+def test_small_chunks_and_single_lesson(tmp_path):
+    path = tmp_path / "lesson.json"
+    path.write_text(json.dumps({"lesson_id": 3, "content": [{"type": "theory", "data": {"text": "x" * 50}}]}))
+    stream = ChapterStream(path, chunk_size=7)
+    lessons = list(stream)
+    assert stream.kind == "lesson"
+    assert lessons[0]["lesson_id"] == 3 and lessons[0]["content"][0]["data"]["text"] == "x" * 50
@@ -0,0 +1,62 @@
+"""Зеркало dictionary: keyset-пагинация по (updated_at, khmer) и полная сверка."""
+from dictionary_mirror import DictionaryMirror
+
+STAMP = "2024-01-01T00:00:00.000000Z"
+LATER = "2024-02-01T00:00:00.000000Z"
+WORDS = ["ក", "ខ", "គ", "ឃ", "ង", "ច", "ឆ"]
+
+
+def _mirror(tmp_path):
+    return DictionaryMirror(tmp_path / "mirror.sqlite")
+
+
+def _seed_source(client):
+    client.table("dictionary").insert([
+        {"khmer": khmer, "english": f"word {i}", "pronunciation": f"p{i}", "item_type": "word", "updated_at": STAMP}
+        for i, khmer in enumerate(WORDS)
+    ]).execute()
+
+
+def test_delta_sync_pages_through_equal_timestamps(sqlite_client, tmp_path):
+    _seed_source(sqlite_client)
+    mirror = _mirror(tmp_path)
+    try:
+        # Все строки с одним updated_at: страницы по 2 режут их посередине
+        assert mirror.sync(sqlite_client, page_size=2) == len(WORDS)
+        assert [r["khmer"] for r in mirror.rows()] == sorted(WORDS)
+        assert mirror.watermark == STAMP
+
+        changed = ["ខ", "គ", "ង", "ឆ"]
+        for khmer in changed:
+            sqlite_client.table("dictionary").update({"english": f"new {khmer}", "updated_at": LATER}) \
+                .eq("khmer", khmer).execute()
+        sqlite_client.table("dictionary").insert(
+            {"khmer": "ជ", "english": "new ជ", "item_type": "word", "updated_at": LATER}).execute()
+
+        assert mirror.sync(sqlite_client, page_size=2) == len(changed) + 1
+        assert mirror.watermark == LATER
+        assert mirror.get("ខ")["english"] == "new ខ"
+        assert mirror.get("ជ") == {"english": "new ជ", "pronunciation": None, "item_type": "word"}
+        assert mirror.get("ក")["english"] == "word 0"
+
+        # Без изменений дельта ничего не получает
+        assert mirror.sync(sqlite_client, page_size=2) == 0
+    finally:
+        mirror.close()
+
+
+def test_full_sync_drops_deleted_rows(sqlite_client, tmp_path):
+    _seed_source(sqlite_client)
+    mirror = _mirror(tmp_path)
+    try:
+        mirror.sync(sqlite_client, page_size=3)
+        sqlite_client.table("dictionary").delete().in_("khmer", ["ក", "ង"]).execute()
+
+        # Дельта удалений не видит
+        mirror.sync(sqlite_client, page_size=3)
+        assert mirror.count() == len(WORDS)
+
+        assert mirror.sync(sqlite_client, full=True, page_size=3) == len(WORDS) - 2
+        assert [r["khmer"] for r in mirror.rows()] == sorted(set(WORDS) - {"ក", "ង"})
+    finally:
+        mirror.close()
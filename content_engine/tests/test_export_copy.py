@@ -0,0 +1,43 @@
+"""Экспорт для COPY: все внешние ключи между выгружаемыми таблицами должны сходиться."""
+import asyncio
+import json
+
+from export_copy import build_staging, check_references
+
+CHAPTER = {
+    "chapter_id": 10000,
+    "title": "Reading bootcamp",
+    "lessons": [
+        {
+            "lesson_id": 10101,
+            "title": "Heroes",
+            "content": [
+                {"type": "theory", "data": {"title": "Script", "text": "Consonants first"}},
+                {"type": "vocab_card", "data": {"front": "Coffee", "back": "កាហ្វេ"}},
+            ],
+        },
+    ],
+}
+
+
+def test_chapter_modules_are_exported(sqlite_client, tmp_path):
+    content_path = tmp_path / "R1.json"
+    content_path.write_text(json.dumps(CHAPTER, ensure_ascii=False), encoding="utf-8")
+    asyncio.run(build_staging([content_path]))
+
+    assert check_references(sqlite_client) == []
+    module = sqlite_client.table("modules").select("id", "slug", "title").eq("id", 10000).execute().data
+    assert module == [{"id": 10000, "slug": None, "title": "Reading bootcamp"}]
+    # Guidebook главы — урок с id = chapter_id
+    assert sqlite_client.table("lesson_items").select("id").eq("lesson_id", 10000).execute().data
+
+
+def test_broken_references_are_reported(sqlite_client):
+    sqlite_client.table("lessons").insert({"id": 501, "module_id": 77, "title": "Orphan", "order_index": 0}).execute()
+    sqlite_client.table("lesson_items").insert(
+        {"lesson_id": 502, "item_key": "502-x", "type": "theory", "order_index": 0, "data": {}}).execute()
+
+    assert check_references(sqlite_client) == [
+        "lessons.module_id=77 -> modules.id",
+        "lesson_items.lesson_id=502 -> lessons.id",
+    ]
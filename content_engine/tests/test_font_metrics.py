@@ -0,0 +1,52 @@
+"""font_metrics: смоук на шрифтах Khmer-glif, одинаковые файлы дают одну запись."""
+import json
+import shutil
+
+import pytest
+
+pytest.importorskip("uharfbuzz")
+pytest.importorskip("fontTools")
+
+import font_metrics
+from font_metrics import DEFAULT_OUT, collect_metrics
+from prebake_shaping import FONTS_DIR, font_hash
+
+# Два имени одного и того же файла (хэши совпадают)
+SAME_FONT = ("KhmerOS_battambang.ttf", "KhmerOS_siemreap.ttf")
+
+
+@pytest.fixture
+def fonts_dir(tmp_path):
+    path = tmp_path / "fonts"
+    path.mkdir()
+    for name in SAME_FONT:
+        shutil.copy(FONTS_DIR / name, path / name)
+    return path
+
+
+def test_same_file_yields_single_entry(fonts_dir, capsys):
+    fonts = collect_metrics(fonts_dir)
+
+    digest = font_hash(FONTS_DIR / SAME_FONT[0])
+    assert digest == font_hash(FONTS_DIR / SAME_FONT[1])
+    assert list(fonts) == [digest]
+    assert fonts[digest]["fontId"] == "khmeros-battambang"
+    assert "khmeros-siemreap: тот же файл, что khmeros-battambang" in capsys.readouterr().out
+
+    metrics = fonts[digest]["metrics"]
+    assert len(metrics["consonants"]) == 35
+    assert metrics["unitsPerEm"] > 0
+    assert {"subscripts", "vowels", "indepVowels", "diacritics"} <= set(metrics)
+    # Совпадает с закоммиченным public/font-metrics.json
+    committed = json.loads(DEFAULT_OUT.read_text(encoding="utf-8"))["fonts"]
+    assert json.loads(json.dumps(metrics)) == committed[digest]["metrics"]
+
+
+def test_previous_metrics_reused(fonts_dir, monkeypatch):
+    previous = collect_metrics(fonts_dir)
+
+    def fail(shaper):
+        raise AssertionError("шрифт с тем же хэшем не пересчитывается")
+
+    monkeypatch.setattr(font_metrics, "build_font_metrics", fail)
+    assert collect_metrics(fonts_dir, previous) == previous
@@ -0,0 +1,90 @@
+"""Стабильные item_key и синхронизация lesson_items: id строк (и прогресс SRS) переживают пересидинг."""
+import asyncio
+
+from database_engine import assign_item_keys, sync_lesson_items
+
+LESSON_ID = 301
+
+
+def _item(item_type, **data):
+    return {"type": item_type, "data": data}
+
+
+def _rows(items):
+    keys = assign_item_keys(LESSON_ID, items)
+    return [{"lesson_id": LESSON_ID, "item_key": keys[i], "type": item["type"], "order_index": i,
+             "data": item["data"]} for i, item in enumerate(items)]
+
+
+def _sync(items):
+    return asyncio.run(sync_lesson_items(LESSON_ID, _rows(items)))
+
+
+def _stored(client):
+    rows = client.table("lesson_items").select("id", "item_key", "type", "order_index", "data") \
+        .eq("lesson_id", LESSON_ID).order("order_index").execute().data
+    return rows
+
+
+COFFEE = _item("vocab_card", front="Coffee", back="កាហ្វេ")
+TEA = _item("vocab_card", front="Tea", back="តែ")
+THEORY = _item("theory", title="Word order", text="Noun first")
+
+
+def test_keys_survive_reordering():
+    keys = dict(zip(("coffee", "tea", "theory"), assign_item_keys(LESSON_ID, [COFFEE, TEA, THEORY])))
+    reordered = assign_item_keys(LESSON_ID, [THEORY, COFFEE, TEA])
+    assert reordered == [keys["theory"], keys["coffee"], keys["tea"]]
+    assert all(key.startswith(f"{LESSON_ID}-") for key in reordered)
+
+
+def test_keys_ignore_non_identity_fields():
+    edited = _item("vocab_card", front="Coffee (hot)", back="កាហ្វេ", audio="coffee.mp3")
+    assert assign_item_keys(LESSON_ID, [edited]) == assign_item_keys(LESSON_ID, [COFFEE])
+
+
+def test_repeated_items_get_keys_by_occurrence():
+    keys = assign_item_keys(LESSON_ID, [COFFEE, TEA, dict(COFFEE)])
+    assert len(set(keys)) == 3
+    # Первое вхождение сохраняет ключ, когда повтор удаляется
+    assert assign_item_keys(LESSON_ID, [COFFEE, TEA])[0] == keys[0]
+
+
+def test_sync_diff_keeps_ids(sqlite_client, capsys):
+    first = _sync([COFFEE, TEA, THEORY])
+    ids = {row["item_key"]: row["id"] for row in first}
+    assert "Items: +3 ~0 -0" in capsys.readouterr().out
+
+    # Без изменений — ни одной записи
+    _sync([COFFEE, TEA, THEORY])
+    assert "Items: +0 ~0 -0" in capsys.readouterr().out
+
+    # Правка (THEORY), вставка (RICE), удаление (TEA), перестановка
+    rice = _item("vocab_card", front="Rice", back="បាយ")
+    edited_theory = _item("theory", title="Word order (basics)", text="Noun first")
+    result = _sync([edited_theory, COFFEE, rice])
+    # ~2: THEORY изменился, COFFEE сдвинулся на другую позицию
+    assert "Items: +1 ~2 -1" in capsys.readouterr().out
+
+    stored = _stored(sqlite_client)
+    assert [row["id"] for row in result] == [row["id"] for row in stored]
+    by_key = {row["item_key"]: row for row in stored}
+    coffee_key, tea_key, theory_key = assign_item_keys(LESSON_ID, [COFFEE, TEA, THEORY])
+    assert by_key[coffee_key]["id"] == ids[coffee_key]
+    assert by_key[theory_key]["id"] == ids[theory_key]
+    assert by_key[theory_key]["data"]["title"] == "Word order (basics)"
+    assert tea_key not in by_key
+    assert len(stored) == 3
+
+
+def test_legacy_rows_are_adopted(sqlite_client, capsys):
+    # Строки, записанные до появления item_key
+    legacy = [{"lesson_id": LESSON_ID, "type": item["type"], "order_index": i, "data": item["data"]}
+              for i, item in enumerate([COFFEE, TEA])]
+    inserted = sqlite_client.table("lesson_items").insert(legacy).execute().data
+    legacy_ids = [row["id"] for row in inserted]
+
+    result = _sync([COFFEE, TEA])
+    assert "Items: +0 ~2 -0" in capsys.readouterr().out
+    assert [row["id"] for row in result] == legacy_ids
+    assert [row["item_key"] for row in _stored(sqlite_client)] == assign_item_keys(LESSON_ID, [COFFEE, TEA])
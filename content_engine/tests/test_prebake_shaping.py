@@ -0,0 +1,61 @@
+"""prebake_shaping: кэш по хэшу шрифта и expand() на реальных шрифтах Khmer-glif."""
+import json
+import shutil
+
+import pytest
+
+pytest.importorskip("uharfbuzz")
+pytest.importorskip("fontTools")
+
+from prebake_shaping import FONTS_DIR, FontShaper, build_store, discover_fonts, expand, font_hash
+
+TEXTS = ["កាហ្វេ", "ស្រះ", "ខ្ញុំ"]
+
+
+@pytest.fixture
+def fonts_dir(tmp_path):
+    path = tmp_path / "fonts"
+    path.mkdir()
+    shutil.copy(FONTS_DIR / "KhmerOS_siemreap.ttf", path / "KhmerOS_siemreap.ttf")
+    return path
+
+
+def test_cached_store_expands_like_fresh_shape(fonts_dir, tmp_path):
+    fonts = discover_fonts(fonts_dir)
+    cache_dir = tmp_path / "cache"
+
+    _, first = build_store(fonts, TEXTS, cache_dir)
+    cached, second = build_store(fonts, TEXTS, cache_dir)
+    fresh, _ = build_store(fonts, TEXTS[:1])
+
+    assert first == {"khmeros-siemreap": {"shaped": 3, "cached": 0}}
+    assert second == {"khmeros-siemreap": {"shaped": 0, "cached": 3}}
+    assert expand(cached, TEXTS[0]) == expand(fresh, TEXTS[0])
+    assert expand(cached, TEXTS[0])
+    # Сверка с шейпингом напрямую, без хранилища
+    assert cached["texts"][TEXTS[0]]["khmeros-siemreap"] == FontShaper(fonts[0]).shape(TEXTS[0])
+
+
+def test_changed_font_hash_ignores_cache(fonts_dir, tmp_path):
+    fonts = discover_fonts(fonts_dir)
+    cache_dir = tmp_path / "cache"
+    build_store(fonts, TEXTS[:1], cache_dir)
+
+    # Подменяем закэшированный шейпинг: пока хэш тот же, он и попадает в хранилище
+    cache_file = cache_dir / f"{font_hash(fonts[0]['path'])}.json"
+    data = json.loads(cache_file.read_text(encoding="utf-8"))
+    data["texts"][TEXTS[0]] = [[0, []]]
+    cache_file.write_text(json.dumps(data), encoding="utf-8")
+    store, stats = build_store(fonts, TEXTS[:1], cache_dir)
+    assert stats["khmeros-siemreap"] == {"shaped": 0, "cached": 1}
+    assert store["texts"][TEXTS[0]]["khmeros-siemreap"] == [[0, []]]
+
+    # Другой файл под тем же именем: id шрифта прежний, хэш новый — кэш не используется
+    shutil.copy(FONTS_DIR / "Suwannaphum.ttf", fonts_dir / "KhmerOS_siemreap.ttf")
+    fonts = discover_fonts(fonts_dir)
+    store, stats = build_store(fonts, TEXTS[:1], cache_dir)
+
+    assert stats["khmeros-siemreap"] == {"shaped": 1, "cached": 0}
+    assert store["fonts"]["khmeros-siemreap"]["hash"] == font_hash(FONTS_DIR / "Suwannaphum.ttf")
+    assert store["texts"][TEXTS[0]]["khmeros-siemreap"] == FontShaper(fonts[0]).shape(TEXTS[0])
+    assert (cache_dir / f"{font_hash(fonts[0]['path'])}.json").exists()
@@ -0,0 +1,56 @@
+"""Повторы запросов: пауза только между попытками."""
+import pytest
+
+import rate_control
+from rate_control import execute_with_retry
+
+
+class FlakyQuery:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("503 Service Unavailable")
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Паузы перед повторами (backoff) вместо настоящего ожидания."""
+    waits = []
+
+    def backoff(attempt, base_delay):
+        waits.append(attempt)
+        return 0
+
+    rate_control.DB_LIMITER.reset()
+    monkeypatch.setattr(rate_control.DB_LIMITER, "backoff", backoff)
+    return waits
+
+
+def test_no_sleep_after_last_attempt(sleeps):
+    query, retried = FlakyQuery(failures=10), []
+    with pytest.raises(RuntimeError):
+        execute_with_retry(query, retries=3, delay=1, on_retry=lambda attempt, e: retried.append(attempt))
+    assert query.calls == 3
+    assert len(sleeps) == 2
+    assert retried == [1, 2]
+
+
+def test_recovers_between_attempts(sleeps):
+    query = FlakyQuery(failures=2)
+    assert execute_with_retry(query, retries=3, delay=1) == "ok"
+    assert len(sleeps) == 2
+
+
+def test_other_errors_are_not_retried(sleeps):
+    class Broken:
+        def execute(self):
+            raise ValueError("bad column")
+
+    with pytest.raises(ValueError):
+        execute_with_retry(Broken(), retries=3)
+    assert sleeps == []
@@ -0,0 +1,95 @@
+"""--plan: план относительно базовой БД (снимка) и поиск полных перезаписей."""
+import asyncio
+import json
+from argparse import Namespace
+
+import pytest
+
+import export_copy
+import seed_plan
+from storage import SQLiteClient, set_client
+from test_seed_resume import CHAPTER, _seed
+
+WRITES = ("insert", "upsert", "update", "delete")
+
+
+@pytest.fixture
+def no_snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(seed_plan, "SNAPSHOT_PATH", tmp_path / "none" / "plan_snapshot.sqlite")
+    monkeypatch.setattr(export_copy, "DEFAULT_OUT_DIR", tmp_path / "none")
+
+
+def _content(tmp_path):
+    path = tmp_path / "chapter.json"
+    path.write_text(json.dumps(CHAPTER, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def _seeded_db(tmp_path, content_path):
+    """Файл SQLite после настоящего сидинга главы."""
+    db = tmp_path / "seeded.sqlite"
+    client = set_client(SQLiteClient(db))
+    try:
+        _seed(content_path, tmp_path / "seed.jsonl", resume=False)
+    finally:
+        set_client(None)
+        client.close()
+    return db
+
+
+def _plan(tmp_path, content_path, storage=None):
+    args = Namespace(module_id=None, update_summary=True, only_lesson_id=None, lesson_id=None, title=None,
+                     desc=None, order_index=None, storage=storage, dict_mirror=None, resume=False,
+                     concurrency=2, report=None, plan_summary=True, plan_out=str(tmp_path / "plan.json"))
+    try:
+        return asyncio.run(seed_plan.run_plan(args, [content_path], tmp_path / "plan.jsonl"))
+    finally:
+        set_client(None)
+
+
+def _writes(result):
+    return [(op["table"], op["op"]) for op in result["totals"]["ops"] if op["op"] in WRITES]
+
+
+def test_plan_against_seeded_baseline_writes_nothing(tmp_path, no_snapshots):
+    content_path = _content(tmp_path)
+    db = _seeded_db(tmp_path, content_path)
+
+    result = _plan(tmp_path, content_path, storage=f"sqlite:{db}")
+    assert result["baseline"] == str(db)
+    assert _writes(result) == []
+    assert result["findings"]["full_rewrites"] == []
+
+
+def test_plan_finds_full_rewrite(tmp_path, no_snapshots):
+    content_path = _content(tmp_path)
+    db = _seeded_db(tmp_path, content_path)
+    # Строки без item_key (как до стабильных ключей): урок будет переписан целиком
+    client = SQLiteClient(db)
+    client.table("lesson_items").update({"item_key": None}).eq("lesson_id", 702).execute()
+    client.close()
+
+    result = _plan(tmp_path, content_path, storage=f"sqlite:{db}")
+    assert result["findings"]["full_rewrites"] == [702]
+
+
+def test_plan_uses_snapshot_and_stays_quiet_without_one(tmp_path, no_snapshots, monkeypatch, capsys):
+    content_path = _content(tmp_path)
+
+    empty = _plan(tmp_path, content_path, storage="supabase")
+    assert empty["baseline"] is None
+    assert _writes(empty) and empty["findings"]["full_rewrites"] == []
+    assert "переписаны целиком" not in capsys.readouterr().out
+
+    # Снимок «Supabase» (здесь — SQLite после сидинга) становится базой по умолчанию
+    source = SQLiteClient(_seeded_db(tmp_path, content_path))
+    snapshot_path = tmp_path / "cache" / "plan_snapshot.sqlite"
+    snapshot_path.parent.mkdir()
+    counts = seed_plan.snapshot(source, snapshot_path, page_size=2)
+    source.close()
+    assert counts["lessons"] == 2 and counts["lesson_items"] == 4 + 4
+    monkeypatch.setattr(seed_plan, "SNAPSHOT_PATH", snapshot_path)
+
+    result = _plan(tmp_path, content_path, storage="supabase")
+    assert result["baseline"] == str(snapshot_path)
+    assert _writes(result) == []
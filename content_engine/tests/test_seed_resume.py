@@ -0,0 +1,166 @@
+"""Повторный запуск с --resume не должен портить сводку модуля (study_materials и Guidebook)."""
+import asyncio
+import json
+from argparse import Namespace
+from pathlib import Path
+
+import database_engine
+from database_engine import SeedIO
+from seed_journal import SeedJournal
+from seed_lesson_json_my import SeedRun, feed_lessons
+from transport import set_tts
+
+CHAPTER_ID = 7
+
+CHAPTER = {
+    "chapter_id": CHAPTER_ID,
+    "title": "Cafe",
+    "lessons": [
+        {
+            "lesson_id": 701,
+            "title": "Drinks",
+            "content": [
+                {"type": "theory", "data": {"title": "Word order", "text": "Noun first"}},
+                {"type": "vocab_card", "data": {"front": "Coffee", "back": "កាហ្វេ", "audio": "coffee"}},
+                {"type": "vocab_card", "data": {"front": "Tea", "back": "តែ", "audio": "tea"}},
+            ],
+        },
+        {
+            "lesson_id": 702,
+            "title": "Food",
+            "content": [
+                {"type": "vocab_card", "data": {"front": "Rice", "back": "បាយ", "audio": "rice"}},
+            ],
+        },
+    ],
+}
+
+
+class OfflineIO(SeedIO):
+    """Словарь — из текущего хранилища, озвучку не генерируем."""
+
+    async def audio(self, text, filename):
+        pass
+
+
+class OfflineRun(SeedRun):
+    def make_io(self):
+        return OfflineIO(self.journal)
+
+
+def _args():
+    return Namespace(module_id=None, update_summary=True, only_lesson_id=None, lesson_id=None,
+                     title=None, desc=None, order_index=None)
+
+
+def _seed(content_path, journal_path, resume):
+    async def run_seed():
+        journal = SeedJournal(journal_path, resume=resume)
+        run = OfflineRun(_args(), journal, 2)
+        try:
+            await feed_lessons(run, [content_path], False)
+            await run.finish()
+        finally:
+            journal.close()
+        return run
+
+    return asyncio.run(run_seed())
+
+
+def _module_state(client):
+    materials = client.table("study_materials").select("content", "content_hash") \
+        .eq("chapter_id", CHAPTER_ID).execute().data
+    guidebook = client.table("lesson_items").select("id", "item_key", "data") \
+        .eq("lesson_id", CHAPTER_ID).order("order_index").execute().data
+    return materials, guidebook
+
+
+def test_resume_keeps_study_materials(sqlite_client, tmp_path):
+    content_path = tmp_path / "chapter.json"
+    content_path.write_text(json.dumps(CHAPTER, ensure_ascii=False), encoding="utf-8")
+    journal_path = tmp_path / "journal.jsonl"
+
+    _seed(content_path, journal_path, resume=False)
+    materials, guidebook = _module_state(sqlite_client)
+    assert materials and len(guidebook) == 4
+    # seed_lesson заменил авторские ключи аудио на сгенерированные имена
+    assert all(row["data"]["audio"] not in ("coffee", "tea", "rice")
+               for row in guidebook if "audio" in row["data"])
+
+    run = _seed(content_path, journal_path, resume=True)
+    assert run.processed_count == 2
+    assert _module_state(sqlite_client) == (materials, guidebook)
+
+
+def test_resume_with_old_journal_leaves_module_alone(sqlite_client, tmp_path):
+    content_path = tmp_path / "chapter.json"
+    content_path.write_text(json.dumps(CHAPTER, ensure_ascii=False), encoding="utf-8")
+    journal_path = tmp_path / "journal.jsonl"
+
+    _seed(content_path, journal_path, resume=False)
+    before = _module_state(sqlite_client)
+
+    # Журнал старого формата: уроки отмечены без обработанных item-ов
+    lines = [json.loads(line) for line in journal_path.read_text(encoding="utf-8").splitlines()]
+    for rec in lines:
+        if rec["kind"] == "lesson":
+            rec.pop("value", None)
+    journal_path.write_text("".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in lines), encoding="utf-8")
+
+    run = _seed(content_path, journal_path, resume=True)
+    assert CHAPTER_ID in run.stale_modules
+    assert _module_state(sqlite_client) == before
+
+
+class FakeCommunicate:
+    """Вместо edge_tts.Communicate: пишет фиктивный mp3 и считает задачи."""
+    saved = []
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+
+    async def save(self, path):
+        FakeCommunicate.saved.append(Path(path).name)
+        Path(path).write_bytes(b"ID3" + self.text.encode("utf-8"))
+
+
+def _seed_with_tts(content_path, journal_path, resume):
+    async def run_seed():
+        journal = SeedJournal(journal_path, resume=resume)
+        run = SeedRun(_args(), journal, 2)
+        try:
+            await feed_lessons(run, [content_path], False)
+            await run.finish()
+        finally:
+            journal.close()
+
+    asyncio.run(run_seed())
+
+
+def test_resume_regenerates_missing_audio(sqlite_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(database_engine, "AUDIO_DIR", tmp_path / "sounds")
+    FakeCommunicate.saved = []
+    set_tts(FakeCommunicate)
+    try:
+        content_path = tmp_path / "chapter.json"
+        content_path.write_text(json.dumps(CHAPTER, ensure_ascii=False), encoding="utf-8")
+        journal_path = tmp_path / "journal.jsonl"
+
+        _seed_with_tts(content_path, journal_path, resume=False)
+        generated = sorted(FakeCommunicate.saved)
+        assert generated
+
+        # Запуск упал после озвучки: в журнале есть аудио, но уроки не отмечены; один mp3 потерян
+        lines = [json.loads(line) for line in journal_path.read_text(encoding="utf-8").splitlines()]
+        assert any(rec["kind"] == "audio" for rec in lines)
+        journal_path.write_text("".join(json.dumps(rec, ensure_ascii=False) + "\n"
+                                        for rec in lines if rec["kind"] != "lesson"), encoding="utf-8")
+        lost = generated[0]
+        (tmp_path / "sounds" / lost).unlink()
+        FakeCommunicate.saved = []
+
+        _seed_with_tts(content_path, journal_path, resume=True)
+        assert FakeCommunicate.saved == [lost]
+        assert (tmp_path / "sounds" / lost).exists()
+    finally:
+        set_tts(None)
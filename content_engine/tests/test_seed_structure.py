@@ -0,0 +1,47 @@
+"""seed_structure --prune: удаляет только своё и не оставляет сирот."""
+from seed_structure import FULL_COURSE, sync_structure
+
+
+def _ids(client, table, **eq):
+    query = client.table(table).select("id")
+    for column, value in eq.items():
+        query = query.eq(column, value)
+    return sorted(r["id"] for r in query.execute().data)
+
+
+def test_prune_keeps_modules_with_content_lessons(sqlite_client, capsys):
+    sync_structure(apply=True)
+    modules = sqlite_client.table("modules").insert([
+        {"slug": "retired", "title": "RETIRED", "is_paid": False, "order_index": 10},
+        {"slug": "gone", "title": "GONE", "is_paid": False, "order_index": 11},
+    ]).execute().data
+    retired, gone = (row["id"] for row in modules)
+    lessons = sqlite_client.table("lessons").insert([
+        {"slug": "retired/old", "module_id": retired, "title": "Old", "order_index": 0},
+        {"slug": "gone/old", "module_id": gone, "title": "Old", "order_index": 0},
+        # Урок из seed_lesson: без slug, его prune не трогает
+        {"id": 901, "module_id": retired, "title": "Content lesson", "order_index": 1},
+    ]).execute().data
+    retired_lesson = lessons[0]["id"]
+    items = sqlite_client.table("lesson_items").insert([
+        {"lesson_id": retired_lesson, "item_key": "a", "type": "theory", "order_index": 0, "data": {}},
+        {"lesson_id": 901, "item_key": "b", "type": "theory", "order_index": 0, "data": {}},
+    ]).execute().data
+    sqlite_client.table("user_srs").insert([
+        {"user_id": "u1", "item_id": items[0]["id"]},
+        {"user_id": "u1", "item_id": items[1]["id"]},
+    ]).execute()
+    capsys.readouterr()
+
+    sync_structure(apply=True, prune=True)
+    out = capsys.readouterr().out
+
+    assert "retired" in out and "901 'Content lesson'" in out
+    assert _ids(sqlite_client, "modules", slug="retired") == [retired]
+    assert _ids(sqlite_client, "modules", slug="gone") == []
+    assert len(_ids(sqlite_client, "modules")) == len(FULL_COURSE) + 1
+    assert _ids(sqlite_client, "lessons", module_id=retired) == [901]
+    assert _ids(sqlite_client, "lessons", module_id=gone) == []
+    assert _ids(sqlite_client, "lesson_items") == [items[1]["id"]]
+    assert [r["item_id"] for r in sqlite_client.table("user_srs").select("item_id").execute().data] \
+        == [items[1]["id"]]
@@ -0,0 +1,89 @@
+"""shaped-store.bin: кодирование и декодирование дают то же, что expand() по JSON."""
+import pytest
+
+from prebake_shaping import STORE_FORMAT, STORE_VERSION, expand
+from shaped_binary import ShapedBinary, check, encode
+
+# Контуры с целыми и .5 координатами — квантование без потерь, сравнение точное
+SQUARE = ["M0 0L100 0L100 100L0 100Z", [0, 0, 100, 100]]
+HOOK = ["M10-20Q30.50-40 60-20C70 0 80 10.50 90 0Z", [10, -40, 90, 10.5]]
+SPACE = ["", None]
+
+LONG_TEXT = "ក" * 300
+
+
+def _font(font_id, glyphs):
+    return {"label": font_id.title(), "file": f"{font_id}.ttf", "hash": f"hash-{font_id}",
+            "fontName": font_id, "fontVersion": "1.0", "unitsPerEm": 1000, "glyphs": glyphs}
+
+
+def _store():
+    return {
+        "format": STORE_FORMAT,
+        "version": STORE_VERSION,
+        "defaultFontId": "alpha",
+        "fonts": {
+            # Один и тот же контур у двух шрифтов хранится один раз
+            "alpha": _font("alpha", {"3": SQUARE, "4": SPACE, "700": HOOK}),
+            "beta": _font("beta", {"5": SQUARE, "9": HOOK}),
+        },
+        "texts": {
+            "កា": {
+                "alpha": [[0, [[3, 0, 0, 600], [700, 610, -5, 0]]]],
+                "beta": [[0, [[5, 0, 0, 550]]], [1, [[9, 560, 0, 300]]]],
+            },
+            "ក ក": {
+                "alpha": [[0, [[3, 0, 0, 600]]], [1, [[4, 600, 0, 250]]], [2, [[3, 850, 0, 600]]]],
+                # Строка без кластеров в одном из шрифтов
+                "beta": [],
+            },
+            # Кластеры дальше 255-го символа
+            LONG_TEXT: {
+                "alpha": [[0, [[3, 0, 0, 600]]], [256, [[700, 600, 0, 400]]], [299, [[3, 1000, 0, 600]]]],
+            },
+        },
+    }
+
+
+@pytest.fixture
+def store():
+    return _store()
+
+
+def test_roundtrip_matches_json(store):
+    decoded = ShapedBinary(encode(store))
+
+    assert decoded.quant > 1
+    assert [decoded.text(i) for i in range(decoded.header["textCount"])] == sorted(store["texts"])
+    for text in store["texts"]:
+        for font_id in store["fonts"]:
+            assert decoded.expand(text, font_id) == expand(store, text, font_id)
+        assert decoded.expand(text) == expand(store, text)
+    assert check(store, decoded) == []
+
+
+def test_cluster_positions_and_empty_runs(store):
+    decoded = ShapedBinary(encode(store))
+
+    long_clusters = decoded.expand(LONG_TEXT, "alpha")
+    assert [c["clusterStart"] for c in long_clusters] == [0, 256, 299]
+    assert long_clusters[1]["clusterEnd"] == 299 and long_clusters[2]["clusterEnd"] == 300
+    assert decoded.expand("ក ក", "beta") == []
+    assert decoded.expand(LONG_TEXT, "beta") == []
+    assert decoded.expand("ខ", "alpha") == []
+    # Пустой глиф (пробел): bbox из null
+    space = decoded.expand("ក ក", "alpha")[1]["components"][0]
+    assert space["d"] == "" and space["bb"] == {"x1": None, "y1": None, "x2": None, "y2": None}
+
+
+def test_shared_paths_are_stored_once(store):
+    decoded = ShapedBinary(encode(store))
+    assert decoded.header["sections"]["pathBounds"][2] == 3 * 4
+    assert [font["id"] for font in decoded.fonts] == ["alpha", "beta"]
+
+
+def test_rejects_foreign_data(store):
+    with pytest.raises(ValueError):
+        encode({**store, "format": "something-else"})
+    with pytest.raises(ValueError):
+        ShapedBinary(b"NOPE" + encode(store)[4:])
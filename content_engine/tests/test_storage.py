@@ -0,0 +1,103 @@
+"""SQLiteClient: то подмножество семантики supabase-py/PostgREST, на которое опирается движок."""
+import pytest
+
+import storage
+from storage import MissingCredentials, SQLiteClient, StorageError, connect
+
+
+def _words(client, *khmer):
+    client.table("dictionary").insert([{"khmer": k, "english": f"en-{k}"} for k in khmer]).execute()
+
+
+def test_upsert_on_primary_key_updates_row(sqlite_client):
+    first = sqlite_client.table("dictionary").upsert({"khmer": "តែ", "english": "tea"}).execute().data
+    second = sqlite_client.table("dictionary").upsert(
+        {"khmer": "តែ", "english": "tea (drink)", "pronunciation": "tae"}).execute().data
+
+    assert [r["english"] for r in first] == ["tea"]
+    assert (second[0]["english"], second[0]["pronunciation"]) == ("tea (drink)", "tae")
+    rows = sqlite_client.table("dictionary").select("khmer", "english").execute().data
+    assert rows == [{"khmer": "តែ", "english": "tea (drink)"}]
+
+
+def test_upsert_on_conflict_column_keeps_id(sqlite_client):
+    inserted = sqlite_client.table("modules").insert({"slug": "survival", "title": "Survival"}).execute().data
+    upserted = sqlite_client.table("modules").upsert(
+        [{"slug": "survival", "title": "SURVIVAL"}, {"slug": "grammar", "title": "GRAMMAR"}],
+        on_conflict="slug").execute().data
+
+    assert upserted[0]["id"] == inserted[0]["id"]
+    assert upserted[1]["id"] != inserted[0]["id"]
+    rows = sqlite_client.table("modules").select("slug", "title").order("id").execute().data
+    assert rows == [{"slug": "survival", "title": "SURVIVAL"}, {"slug": "grammar", "title": "GRAMMAR"}]
+
+
+def test_upsert_without_conflict_target_fails_on_other_unique(sqlite_client):
+    sqlite_client.table("modules").insert({"slug": "survival", "title": "Survival"}).execute()
+    with pytest.raises(StorageError):
+        sqlite_client.table("modules").upsert({"slug": "survival", "title": "Other"}).execute()
+
+
+def test_insert_returns_rows_with_defaults(sqlite_client):
+    rows = sqlite_client.table("lesson_items").insert([
+        {"lesson_id": 1, "item_key": "1-a", "type": "theory", "order_index": 0, "data": {"text": "ក"}},
+        # Набор колонок — объединение ключей: недостающее значение становится null
+        {"lesson_id": 1, "item_key": "1-b", "type": "theory", "order_index": 1},
+    ]).execute().data
+
+    assert [r["item_key"] for r in rows] == ["1-a", "1-b"]
+    assert rows[0]["id"] < rows[1]["id"]
+    assert rows[0]["data"] == {"text": "ក"} and rows[1]["data"] is None
+
+
+def test_filters_order_and_range(sqlite_client):
+    _words(sqlite_client, "ក", "ខ", "គ", "ឃ", "ង")
+    query = lambda: sqlite_client.table("dictionary").select("khmer")  # noqa: E731
+
+    assert query().eq("khmer", "ខ").execute().data == [{"khmer": "ខ"}]
+    assert [r["khmer"] for r in query().in_("khmer", ["ង", "ក", "x"]).order("khmer").execute().data] == ["ក", "ង"]
+    assert query().in_("khmer", []).execute().data == []
+    ordered = [r["khmer"] for r in query().order("khmer", desc=True).execute().data]
+    assert ordered == ["ង", "ឃ", "គ", "ខ", "ក"]
+    # range(start, end) — включительно, как в PostgREST
+    assert [r["khmer"] for r in query().order("khmer").range(1, 3).execute().data] == ["ខ", "គ", "ឃ"]
+    assert [r["khmer"] for r in query().order("khmer").range(4, 9).execute().data] == ["ង"]
+
+
+def test_or_with_quoted_values_and_nested_and(sqlite_client):
+    sqlite_client.table("dictionary").insert([
+        {"khmer": "a", "english": "x, y", "updated_at": "2024-01-01"},
+        {"khmer": "b", "english": "plain", "updated_at": "2024-01-02"},
+        {"khmer": "c", "english": "plain", "updated_at": "2024-01-02"},
+        {"khmer": "d", "english": "plain", "updated_at": "2024-01-03"},
+    ]).execute()
+
+    rows = sqlite_client.table("dictionary").select("khmer") \
+        .or_('english.eq."x, y",and(updated_at.eq.2024-01-02,khmer.gt.b)').order("khmer").execute().data
+    assert [r["khmer"] for r in rows] == ["a", "c"]
+
+    with pytest.raises(StorageError):
+        sqlite_client.table("dictionary").select("khmer").or_("khmer.like.a*").execute()
+
+
+def test_update_and_delete(sqlite_client):
+    _words(sqlite_client, "ក", "ខ")
+    updated = sqlite_client.table("dictionary").update({"english": "ka"}).eq("khmer", "ក").execute().data
+    assert [(r["khmer"], r["english"]) for r in updated] == [("ក", "ka")]
+
+    sqlite_client.table("dictionary").delete().eq("khmer", "ខ").execute()
+    assert [r["khmer"] for r in sqlite_client.table("dictionary").select("khmer").execute().data] == ["ក"]
+
+
+def test_connect_without_credentials(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "_settings", {"url": None, "key": None, "storage": "supabase"})
+    with pytest.raises(MissingCredentials):
+        connect()
+    with pytest.raises(StorageError):
+        connect("postgres")
+
+    client = connect(f"sqlite:{tmp_path / 'course.sqlite'}")
+    try:
+        assert isinstance(client, SQLiteClient)
+    finally:
+        client.close()
@@ -0,0 +1,89 @@
+"""update_study_materials: неизменённый модуль не пишется, изменённый переписывается один."""
+import asyncio
+import copy
+
+import pytest
+
+from database_engine import update_study_materials
+from storage import SQLiteClient, set_client
+
+WRITES = ("insert", "upsert", "update", "delete")
+
+
+class RecordingClient(SQLiteClient):
+    """SQLite, которая запоминает каждую запись: (таблица, операция)."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.writes = []
+
+    def _execute(self, query):
+        if query._op in WRITES:
+            self.writes.append((query.table, query._op))
+        return super()._execute(query)
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = set_client(RecordingClient(tmp_path / "content.sqlite"))
+    yield client
+    set_client(None)
+    client.close()
+
+
+def _lesson(title, *words):
+    return {"title": title, "content": [
+        {"type": "theory", "data": {"title": title, "text": f"About {title}"}},
+        *({"type": "vocab_card", "data": {"front": en, "back": km}} for en, km in words),
+    ]}
+
+
+MODULES = {
+    7: {701: _lesson("Drinks", ("Coffee", "កាហ្វេ"), ("Tea", "តែ")), 702: _lesson("Food", ("Rice", "បាយ"))},
+    8: {801: _lesson("Numbers", ("One", "មួយ"), ("Two", "ពីរ"))},
+}
+
+
+def _update(modules):
+    async def run():
+        return {module_id: await update_study_materials(module_id, copy.deepcopy(lessons))
+                for module_id, lessons in modules.items()}
+
+    return asyncio.run(run())
+
+
+def _module_state(client, module_id):
+    materials = client.table("study_materials").select("id", "content", "content_hash") \
+        .eq("chapter_id", module_id).execute().data
+    guidebook = client.table("lesson_items").select("id", "item_key", "order_index", "data") \
+        .eq("lesson_id", module_id).order("order_index").execute().data
+    return materials, guidebook
+
+
+def test_unchanged_modules_are_not_written(client):
+    assert _update(MODULES) == {7: True, 8: True}
+    first = {module_id: _module_state(client, module_id) for module_id in MODULES}
+    assert len(first[7][1]) == 5 and len(first[8][1]) == 3
+
+    client.writes.clear()
+    assert _update(MODULES) == {7: False, 8: False}
+    assert client.writes == []
+    assert {module_id: _module_state(client, module_id) for module_id in MODULES} == first
+
+
+def test_changed_lesson_rewrites_only_its_module(client):
+    _update(MODULES)
+    before = {module_id: _module_state(client, module_id) for module_id in MODULES}
+
+    changed = copy.deepcopy(MODULES)
+    changed[7][702] = _lesson("Food", ("Rice", "បាយ"), ("Noodles", "មី"))
+    client.writes.clear()
+    assert _update(changed) == {7: True, 8: False}
+
+    # Guidebook: одна новая карточка, остальные строки не тронуты; сводка и хэш обновлены
+    assert sorted(client.writes) == [("lesson_items", "insert"), ("study_materials", "upsert")]
+    materials, guidebook = _module_state(client, 7)
+    assert "មី" in materials[0]["content"] and materials[0]["content_hash"] != before[7][0][0]["content_hash"]
+    assert guidebook[:5] == before[7][1]
+    assert guidebook[5]["data"] == {"front": "Noodles", "back": "មី"}
+    assert _module_state(client, 8) == before[8]
@@ -0,0 +1,92 @@
+"""word_assets: квиз со ссылками option_words разворачивается в прежние options_metadata."""
+import asyncio
+import copy
+
+from database_engine import SeedIO, get_safe_audio_name, prepare_lesson_items
+from word_assets import referenced_keys, resolve_item_data, resolve_items, word_key
+
+DICTIONARY = {
+    "កាហ្វេ": {"english": "coffee", "pronunciation": "kaafee", "item_type": "word"},
+    "តែ": {"english": "tea", "pronunciation": "tae", "item_type": "word"},
+    # Слово есть в словаре, но без транскрипции
+    "ទឹក": {"english": "water", "pronunciation": None, "item_type": "word"},
+    "ស្ករ": {"english": "sugar", "pronunciation": None, "item_type": "word"},
+}
+
+QUIZ = {
+    "type": "quiz",
+    "data": {
+        "question": "Which one is coffee?",
+        "options": ["កាហ្វេ", "តែ (hot)", "ទឹក?", "ស្ករ", "បាយ"],
+        "correct_answer": "កាហ្វេ",
+        # Ключ — очищенное слово: перекрывает транскрипцию словаря
+        "pronunciation_map": {"តែ": "tai", "ទឹក": "tuk"},
+    },
+}
+
+
+class DictIO(SeedIO):
+    async def lookup(self, khmer):
+        return DICTIONARY.get(khmer, {})
+
+    async def audio(self, text, filename):
+        pass
+
+
+def baseline_quiz(data):
+    """Ветка QUIZ из seed_lesson до word_assets: options_metadata прямо в квизе."""
+    data = copy.deepcopy(data)
+    pron_map = data.get("pronunciation_map", {})
+    data["options_metadata"] = {}
+    for opt in data.get("options", []):
+        clean_opt = opt.split(" (")[0].replace("?", "").strip()
+        entry = DICTIONARY.get(clean_opt, {})
+        eng = entry.get("english", "option")
+        data["options_metadata"][opt] = {
+            "audio": get_safe_audio_name(clean_opt, eng, "option"),
+            "pronunciation": pron_map.get(clean_opt, "") or entry.get("pronunciation", ""),
+        }
+    return data
+
+
+def _prepare(content):
+    io = DictIO()
+    rows = asyncio.run(prepare_lesson_items(501, copy.deepcopy(content), io))
+    return rows, io.words
+
+
+def test_resolved_quiz_matches_baseline():
+    rows, words = _prepare([QUIZ])
+    stored = rows[0]["data"]
+
+    assert "options_metadata" not in stored
+    assert stored["option_words"] == {opt: word_key(opt) for opt in QUIZ["data"]["options"]}
+    assert referenced_keys(rows) == {"កាហ្វេ", "តែ", "ទឹក", "ស្ករ", "បាយ"}
+
+    resolved = resolve_item_data("quiz", stored, words)
+    expected = baseline_quiz(QUIZ["data"])
+    assert resolved["options_metadata"] == expected["options_metadata"]
+    assert resolved["options_metadata"]["តែ (hot)"]["pronunciation"] == "tai"
+    assert resolved["options_metadata"]["ទឹក?"]["pronunciation"] == "tuk"
+    assert resolved["options_metadata"]["ស្ករ"]["pronunciation"] is None
+    assert resolved["options_metadata"]["បាយ"]["pronunciation"] == ""
+    # Исходная строка не меняется
+    assert "options_metadata" not in stored
+
+
+def test_missing_word_row():
+    rows, words = _prepare([QUIZ])
+    words.pop("កាហ្វេ")
+    words.pop("តែ")
+
+    metadata = resolve_items(rows, words)[0]["data"]["options_metadata"]
+    assert metadata["កាហ្វេ"] == {"audio": None, "pronunciation": ""}
+    # pronunciation_map квиза работает и без строки слова
+    assert metadata["តែ (hot)"] == {"audio": None, "pronunciation": "tai"}
+
+
+def test_other_items_pass_through():
+    theory = {"title": "Word order", "text": "Noun first"}
+    legacy_quiz = {"options": ["ក"], "options_metadata": {"ក": {"audio": "ka.mp3", "pronunciation": "ka"}}}
+    assert resolve_item_data("theory", theory, {}) is theory
+    assert resolve_item_data("quiz", legacy_quiz, {}) is legacy_quiz
@@ -0,0 +1,168 @@
+"""
+Трассировка сидинга: спаны отдельных вызовов для просмотра в trace viewer.
+
+run_metrics даёт суммы по таблицам и фазам, а трасса — каждый вызов на шкале
+времени: урок → фаза → item → запрос к БД / задача озвучки. По ней видно,
+какой урок главы медленный и что лежит на его критическом пути.
+
+  * Спаны уроков и фаз открывает run_metrics (METRICS.lesson / METRICS.phase),
+    item-ов — prepare_lesson_items, запросов — db_execute_retry
+    (таблица, операция, строк, попыток, байт), озвучки — _generate_audio
+    (длина текста, голос, скорость, итог).
+  * Родитель берётся из contextvars, поэтому запросы из asyncio.to_thread
+    и задачи озвучки попадают под свой item.
+  * У каждого корневого спана (урока) своя дорожка: параллельные уроки
+    в trace viewer не накладываются друг на друга.
+
+Экспорт без внешних сервисов, по расширению файла:
+  *.jsonl — спан на строку сразу по завершении (можно смотреть во время запуска);
+  *.json  — Chrome trace (chrome://tracing, https://ui.perfetto.dev), пишется в close().
+
+Пока трасса не открыта (TRACER.open), span() почти ничего не стоит.
+"""
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+_current_span = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "track", "start_us", "duration_us", "thread", "attrs", "events")
+
+    def __init__(self, name, span_id, parent, track, start_us, attrs):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.track = track
+        self.start_us = start_us
+        self.duration_us = 0
+        self.thread = threading.current_thread().name
+        self.attrs = attrs
+        self.events = []
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def event(self, name, **attrs):
+        """Мгновенное событие внутри спана (например, повтор запроса)."""
+        self.events.append({"name": name, "ts_us": _now_us(), **attrs})
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "span_id": self.span_id, "parent_id": self.parent_id, "track": self.track,
+            "start_us": self.start_us, "duration_us": self.duration_us, "thread": self.thread,
+            "attrs": self.attrs, "events": self.events,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def event(self, name, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_origin = time.perf_counter_ns()
+
+
+def _now_us() -> int:
+    return (time.perf_counter_ns() - _origin) // 1000
+
+
+class JsonlExporter:
+    def __init__(self, path: Path):
+        self._handle = path.open("w", encoding="utf-8")
+
+    def export(self, span):
+        self._handle.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+        self._handle.flush()
+
+    def close(self):
+        self._handle.close()
+
+
+class ChromeTraceExporter:
+    """Trace Event Format: спан → событие "X", событие спана → "i", дорожка → tid."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.events = []
+        self.tracks = {}
+
+    def export(self, span):
+        if span.parent_id is None:
+            label = " ".join(str(v) for v in span.attrs.values())
+            self.tracks.setdefault(span.track, f"{span.name} {label}".strip())
+        args = {**span.attrs, "thread": span.thread}
+        self.events.append({"name": span.name, "cat": span.name.split(".")[0], "ph": "X", "pid": 1,
+                            "tid": span.track, "ts": span.start_us, "dur": span.duration_us, "args": args})
+        for event in span.events:
+            fields = {k: v for k, v in event.items() if k not in ("name", "ts_us")}
+            self.events.append({"name": event["name"], "ph": "i", "s": "t", "pid": 1, "tid": span.track,
+                                "ts": event["ts_us"], "args": fields})
+
+    def close(self):
+        meta = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": track, "args": {"name": name}}
+                for track, name in sorted(self.tracks.items())]
+        trace = {"traceEvents": meta + sorted(self.events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}
+        self.path.write_text(json.dumps(trace, ensure_ascii=False, default=str), encoding="utf-8")
+
+
+class Tracer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._exporter = None
+        self._ids = itertools.count(1)
+        self._tracks = itertools.count(1)
+        self.path = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    def open(self, path):
+        """Включает трассировку: *.jsonl — поток спанов, иначе Chrome trace."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.close()
+        self.path = path
+        self._exporter = JsonlExporter(path) if path.suffix == ".jsonl" else ChromeTraceExporter(path)
+
+    def close(self):
+        with self._lock:
+            exporter, self._exporter = self._exporter, None
+        if exporter is not None:
+            exporter.close()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if self._exporter is None:
+            yield NOOP_SPAN
+            return
+        parent = _current_span.get()
+        track = parent.track if parent is not None else next(self._tracks)
+        span = Span(name, next(self._ids), parent, track, _now_us(), attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=f"{type(e).__name__}: {e}"[:200])
+            raise
+        finally:
+            span.duration_us = _now_us() - span.start_us
+            _current_span.reset(token)
+            with self._lock:
+                if self._exporter is not None:
+                    self._exporter.export(span)
+
+
+# Общий трассировщик процесса (как METRICS в run_metrics)
+TRACER = Tracer()
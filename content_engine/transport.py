@@ -0,0 +1,218 @@
+"""
+Общий сетевой транспорт content_engine: пулы соединений для Supabase и edge-tts.
+
+Раньше каждый запрос к edge-tts открывал своё соединение (DNS + TCP + TLS),
+а клиент Supabase держал свой пул на скрипт. Теперь на процесс один транспорт:
+
+  * http_client() — httpx.Client для Supabase REST (через storage.connect):
+    keep-alive пул, HTTP/2 (мультиплексирование запросов в одном соединении),
+    если установлен пакет h2, иначе HTTP/1.1 с тем же пулом;
+  * tts_connector() — aiohttp-коннектор для edge_tts.Communicate: общий лимит
+    соединений, кэш DNS и один SSL-контекст на все задачи озвучки. edge-tts
+    работает через WebSocket по HTTP/1.1, такое соединение занято одной
+    задачей и в пул не возвращается, поэтому HTTP/2 здесь нет — экономим
+    на DNS и подготовке TLS, а не на рукопожатиях;
+  * set_tts() — подмена edge_tts.Communicate (бенчмарк, тесты): communicate()
+    отдаёт задачи подставной фабрике, edge-tts не импортируется;
+  * snapshot() — статистика пулов для отчёта run_metrics: запросы, попадания
+    в пул (соединение переиспользовано), промахи (новое соединение),
+    TLS-рукопожатия, ответы по HTTP/2.
+
+Размеры пулов задаются переменными окружения:
+  CONTENT_HTTP_POOL=20          — максимум соединений к Supabase
+  CONTENT_HTTP_KEEPALIVE=10     — сколько простаивающих держать открытыми
+  CONTENT_HTTP_KEEPALIVE_EXPIRY=30 — через сколько секунд простоя закрывать
+  CONTENT_HTTP2=0               — выключить HTTP/2
+  CONTENT_HTTP_TIMEOUT=120      — таймаут запроса, с
+  CONTENT_TTS_POOL=10           — максимум одновременных соединений к edge-tts
+
+httpx и aiohttp импортируются только при первом использовании.
+"""
+import asyncio
+import threading
+
+from rate_control import _env_float
+
+HTTP_POOL = int(_env_float("CONTENT_HTTP_POOL", 20))
+HTTP_KEEPALIVE = int(_env_float("CONTENT_HTTP_KEEPALIVE", 10))
+HTTP_KEEPALIVE_EXPIRY = _env_float("CONTENT_HTTP_KEEPALIVE_EXPIRY", 30)
+HTTP2 = bool(_env_float("CONTENT_HTTP2", 1))
+HTTP_TIMEOUT = _env_float("CONTENT_HTTP_TIMEOUT", 120)
+TTS_POOL = int(_env_float("CONTENT_TTS_POOL", 10))
+
+
+class PoolStats:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+            self.tls_handshakes = 0
+            self.http2_responses = 0
+
+    def add(self, field, count=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + count)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            hits = max(0, self.requests - self.new_connections)
+            return {
+                "name": self.name,
+                "requests": self.requests,
+                "pool_hits": hits,
+                "pool_misses": self.new_connections,
+                "hit_ratio": round(hits / self.requests, 3) if self.requests else None,
+                "tls_handshakes": self.tls_handshakes,
+                "http2_responses": self.http2_responses,
+            }
+
+
+HTTP_STATS = PoolStats("supabase-http")
+TTS_STATS = PoolStats("edge-tts")
+
+_lock = threading.Lock()
+_http_client = None
+_tts = {"loop": None, "connector": None, "factory": None}
+
+
+# --- Supabase (httpx) ---
+
+def _trace(event, info):
+    # События httpcore: подключение и TLS бывают только у нового соединения
+    if event == "connection.connect_tcp.complete":
+        HTTP_STATS.add("new_connections")
+    elif event == "connection.start_tls.complete":
+        HTTP_STATS.add("tls_handshakes")
+
+
+def _on_request(request):
+    HTTP_STATS.add("requests")
+    request.extensions["trace"] = _trace
+
+
+def _on_response(response):
+    if response.http_version == "HTTP/2":
+        HTTP_STATS.add("http2_responses")
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401 — нужен httpx для http2=True
+    except ImportError:
+        return False
+    return True
+
+
+def http_client():
+    """Общий httpx.Client процесса (создаётся при первом вызове)."""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                import httpx
+
+                _http_client = httpx.Client(
+                    http2=HTTP2 and _h2_available(),
+                    limits=httpx.Limits(max_connections=HTTP_POOL, max_keepalive_connections=HTTP_KEEPALIVE,
+                                        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY),
+                    timeout=HTTP_TIMEOUT,
+                    event_hooks={"request": [_on_request], "response": [_on_response]},
+                )
+    return _http_client
+
+
+# --- edge-tts (aiohttp) ---
+
+_connector_class = None
+
+
+def _shared_connector_class():
+    global _connector_class
+    if _connector_class is None:
+        import aiohttp
+
+        class SharedConnector(aiohttp.TCPConnector):
+            """Коннектор, который ClientSession внутри edge-tts не закрывает после каждой задачи."""
+
+            async def connect(self, req, *args, **kwargs):
+                TTS_STATS.add("requests")
+                return await super().connect(req, *args, **kwargs)
+
+            async def _create_connection(self, req, *args, **kwargs):
+                TTS_STATS.add("new_connections")
+                if req.is_ssl():
+                    TTS_STATS.add("tls_handshakes")
+                return await super()._create_connection(req, *args, **kwargs)
+
+            async def close(self, *args, **kwargs):
+                pass
+
+            async def aclose(self):
+                await super().close()
+
+        _connector_class = SharedConnector
+    return _connector_class
+
+
+def tts_connector():
+    """Общий коннектор edge-tts для текущего event loop (каждый asyncio.run — свой)."""
+    loop = asyncio.get_running_loop()
+    if _tts["loop"] is not loop or _tts["connector"] is None:
+        _tts["loop"] = loop
+        _tts["connector"] = _shared_connector_class()(limit=TTS_POOL, ttl_dns_cache=300,
+                                                       keepalive_timeout=HTTP_KEEPALIVE_EXPIRY)
+    return _tts["connector"]
+
+
+def set_tts(factory):
+    """Подменяет edge_tts.Communicate для communicate(); None — вернуть настоящий. Возвращает фабрику."""
+    _tts["factory"] = factory
+    return factory
+
+
+def communicate(text, voice, **kwargs):
+    """edge_tts.Communicate поверх общего коннектора (или подставная фабрика из set_tts)."""
+    if _tts["factory"] is not None:
+        return _tts["factory"](text, voice, **kwargs)
+    import edge_tts
+
+    try:
+        return edge_tts.Communicate(text, voice, connector=tts_connector(), **kwargs)
+    except TypeError:
+        # edge-tts до 6.1.10 не принимает connector — работаем по-старому
+        return edge_tts.Communicate(text, voice, **kwargs)
+
+
+async def close_tts():
+    """Закрывает коннектор edge-tts; вызывать в конце корутины, которую запускает asyncio.run."""
+    connector, _tts["connector"], _tts["loop"] = _tts["connector"], None, None
+    if connector is not None:
+        await connector.aclose()
+
+
+def close():
+    global _http_client
+    with _lock:
+        client, _http_client = _http_client, None
+    if client is not None:
+        client.close()
+
+
+# --- отчёт ---
+
+def snapshot() -> list:
+    return [HTTP_STATS.snapshot(), TTS_STATS.snapshot()]
+
+
+def print_summary():
+    for snap in snapshot():
+        if not snap["requests"]:
+            continue
+        print(f"🔌 {snap['name']}: запросов {snap['requests']}, из пула {snap['pool_hits']}, "
+              f"новых соединений {snap['pool_misses']}, TLS {snap['tls_handshakes']}"
+              + (f", HTTP/2 {snap['http2_responses']}" if snap["http2_responses"] else ""))
@@ -0,0 +1,51 @@
+"""
+Общая таблица аудио и транскрипций слов (word_assets).
+
+Раньше seed_lesson клал в каждый квиз options_metadata с полным
+{audio, pronunciation} на каждый вариант — одни и те же слова копировались
+в десятки квизов. Теперь квиз хранит только ссылки `option_words`
+(вариант -> ключ слова), а сами данные лежат одной строкой на слово.
+
+resolve_items подставляет options_metadata обратно при экспорте
+(документ урока, бандлы), поэтому плеер видит прежний формат.
+"""
+import copy
+
+WORD_ASSET_FIELDS = ("audio", "pronunciation")
+
+
+def word_key(option: str) -> str:
+    """Ключ слова: вариант без пояснения в скобках и без '?' (как для словаря)."""
+    return option.split(' (')[0].replace('?', '').strip()
+
+
+def resolve_item_data(item_type, data, words: dict):
+    """Копия data с options_metadata, собранными из таблицы слов."""
+    if item_type != "quiz" or not isinstance(data, dict) or "option_words" not in data:
+        return data
+    data = copy.deepcopy(data)
+    pron_map = data.get("pronunciation_map") or {}
+    metadata = {}
+    for opt, key in data["option_words"].items():
+        word = words.get(key) or {}
+        metadata[opt] = {
+            "audio": word.get("audio"),
+            # Транскрипция из самого квиза главнее общей (как pron_map.get(clean_opt) до word_assets)
+            "pronunciation": pron_map.get(key, "") or word.get("pronunciation", ""),
+        }
+    data["options_metadata"] = metadata
+    return data
+
+
+def resolve_items(item_rows, words: dict) -> list:
+    """Строки lesson_items с подставленными данными слов (исходные строки не меняются)."""
+    return [{**row, "data": resolve_item_data(row.get("type"), row.get("data"), words)} for row in item_rows]
+
+
+def referenced_keys(item_rows) -> set:
+    keys = set()
+    for row in item_rows:
+        data = row.get("data")
+        if row.get("type") == "quiz" and isinstance(data, dict):
+            keys.update((data.get("option_words") or {}).values())
+    return keys
@@ -42,6 +42,8 @@ export default function App() {
 
   return (
     <Router>
+      {/* Новый маршрут добавь и в netlify.toml (правила no-store для оболочки),
+          иначе CDN закэширует под ним устаревший index.html */}
       <Routes>
         {/* ЛОГИН */}
         <Route path="/login" element={!isAuthed ? <Login /> : <Navigate to="/map" />} />
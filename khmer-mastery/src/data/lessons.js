@@ -13,6 +13,41 @@ export const fetchLessonById = async (id) => {
   return data;
 };
 
+// Квизы ссылаются на общую таблицу word_assets (data.option_words: вариант -> khmer).
+// Документы уроков и бандлы приходят уже с options_metadata, а сырые lesson_items
+// дополняем здесь одним запросом на урок.
+const resolveWordAssets = async (items) => {
+  const keys = new Set();
+  items.forEach((item) => {
+    if (item?.type === 'quiz' && item.data?.option_words) {
+      Object.values(item.data.option_words).forEach((key) => keys.add(key));
+    }
+  });
+  if (keys.size === 0) return items;
+
+  const { data, error } = await supabase
+    .from('word_assets')
+    .select('khmer, audio, pronunciation')
+    .in('khmer', [...keys]);
+  if (error) throw error;
+  const words = new Map((data || []).map((row) => [row.khmer, row]));
+
+  return items.map((item) => {
+    if (item?.type !== 'quiz' || !item.data?.option_words) return item;
+    const pronunciationMap = item.data.pronunciation_map || {};
+    const optionsMetadata = {};
+    Object.entries(item.data.option_words).forEach(([opt, key]) => {
+      const word = words.get(key) || {};
+      optionsMetadata[opt] = {
+        audio: word.audio ?? null,
+        // Как content_engine/word_assets.resolve_item_data: null из word_assets не заменяем на ''
+        pronunciation: pronunciationMap[key] || (words.has(key) ? word.pronunciation : ''),
+      };
+    });
+    return { ...item, data: { ...item.data, options_metadata: optionsMetadata } };
+  });
+};
+
 export const fetchLessonItemsByLessonId = async (lessonId) => {
   const { data, error } = await supabase
     .from('lesson_items')
@@ -20,7 +55,7 @@ export const fetchLessonItemsByLessonId = async (lessonId) => {
     .eq('lesson_id', lessonId)
     .order('order_index', { ascending: true });
   if (error) throw error;
-  return data || [];
+  return resolveWordAssets(data || []);
 };
 
 export const fetchAllLessons = async () => {
@@ -31,3 +66,79 @@ export const fetchAllLessons = async () => {
   if (error) throw error;
   return data || [];
 };
+
+// Предсобранный документ урока (lesson_documents): урок + item-ы одним запросом.
+// Документ кэшируется по version: при повторном открытии запрашиваем только version.
+const lessonDocumentCache = new Map();
+
+export const fetchLessonDocument = async (lessonId) => {
+  const cached = lessonDocumentCache.get(lessonId);
+  const { data, error } = await supabase
+    .from('lesson_documents')
+    .select(cached ? 'version' : 'version, document')
+    .eq('lesson_id', lessonId)
+    .maybeSingle();
+  // Таблицы может ещё не быть в окружении — тогда работаем по-старому
+  if (error || !data) return null;
+
+  if (cached) {
+    if (cached.version === data.version) return cached;
+    // Урок пересидили — забираем новую версию целиком
+    lessonDocumentCache.delete(lessonId);
+    return fetchLessonDocument(lessonId);
+  }
+  if (!data.document) return null;
+  lessonDocumentCache.set(lessonId, data.document);
+  return data.document;
+};
+
+// Статические бандлы уроков с CDN (content_engine/compile_bundles.py).
+// Файлы уроков неизменяемы (хэш в имени), поэтому свежесть проверяем только по index.json.
+const CONTENT_BASE = '/content';
+let contentManifestPromise = null;
+
+const fetchContentManifest = () => {
+  if (!contentManifestPromise) {
+    contentManifestPromise = fetch(`${CONTENT_BASE}/index.json`, { cache: 'no-cache' })
+      .then((res) => (res.ok ? res.json() : null))
+      .catch(() => null);
+  }
+  return contentManifestPromise;
+};
+
+export const fetchLessonBundle = async (lessonId) => {
+  const manifest = await fetchContentManifest();
+  const entry = manifest?.lessons?.[String(lessonId)];
+  if (!entry) return null;
+  try {
+    const res = await fetch(`${CONTENT_BASE}/${entry.file}`);
+    return res.ok ? await res.json() : null;
+  } catch {
+    return null;
+  }
+};
+
+// Аудио и шрифты первых экранов урока качаем заранее и параллельно,
+// остальное браузер подтянет сам при первом нажатии.
+const PREFETCH_SCREENS = 3;
+const prefetchedAssets = new Set();
+
+export const prefetchLessonAssets = (assets, screens = PREFETCH_SCREENS) => {
+  if (!Array.isArray(assets) || typeof fetch === 'undefined') return;
+  assets
+    .filter((asset) => asset?.url && asset.screen < screens && !prefetchedAssets.has(asset.url))
+    .forEach((asset) => {
+      prefetchedAssets.add(asset.url);
+      fetch(asset.url, { priority: 'low' }).catch(() => prefetchedAssets.delete(asset.url));
+    });
+};
+
+export const fetchLessonWithItems = async (lessonId) => {
+  // CDN → lesson_documents → lessons + lesson_items
+  const document = (await fetchLessonBundle(lessonId)) || (await fetchLessonDocument(lessonId));
+  if (document?.lesson && Array.isArray(document.items)) {
+    prefetchLessonAssets(document.assets);
+    return [document.lesson, document.items];
+  }
+  return Promise.all([fetchLessonById(lessonId), fetchLessonItemsByLessonId(lessonId)]);
+};
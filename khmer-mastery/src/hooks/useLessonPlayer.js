@@ -1,6 +1,6 @@
 import { useCallback, useEffect, useRef, useState } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
-import { fetchLessonById, fetchLessonItemsByLessonId } from '../data/lessons';
+import { fetchLessonItemsByLessonId, fetchLessonWithItems } from '../data/lessons';
 import { fetchCurrentUser } from '../data/auth';
 import { markLessonCompleted } from '../data/progress';
 // ПРАВИЛЬНЫЙ ИМПОРТ: используем тот же путь, что в твоих файлах lessons.js и auth.js
@@ -95,9 +95,11 @@ export default function useLessonPlayer() {
       const resolvedIdentifier = resolveLessonIdentifier(id);
 
       // Загружаем всё параллельно, добавляя запрос к таблице alphabet
-      const [lesson, rawItemsResponse, alphabetResponse] = await Promise.all([
-        resolvedIdentifier !== null ? fetchLessonById(resolvedIdentifier) : (id === 'sandbox' ? fallbackLesson.current : null),
-        fetchLessonItemsByLessonId(resolvedIdentifier || id),
+      // Урок и его item-ы — одним запросом из lesson_documents (с фолбэком на lessons + lesson_items)
+      const [[lesson, rawItemsResponse], alphabetResponse] = await Promise.all([
+        resolvedIdentifier !== null
+          ? fetchLessonWithItems(resolvedIdentifier)
+          : Promise.all([id === 'sandbox' ? fallbackLesson.current : null, fetchLessonItemsByLessonId(id)]),
         supabase.from('alphabet').select('*')
       ]);
 